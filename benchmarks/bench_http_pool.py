@@ -0,0 +1,77 @@
+"""
+Benchmark / check: keep-alive connection reuse of the shared HTTP pool.
+
+Starts mock_llm_server in-process on a free port, makes --streams
+StreamingLLM.stream() calls and --fetches fetch() calls against it, and
+prints get_endpoint_stats() after each phase.  Exits with status 1 if two
+consecutive stream() calls did not share a connection (a streamed body that
+is not read to the end is closed instead of returned to the pool).
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_http_pool.py [--streams 10] [--fetches 10]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+import mock_llm_server  # noqa: E402
+from src.utils.llm.http_pool import get_endpoint_stats  # noqa: E402
+from src.utils.llm.streaming import StreamingLLM  # noqa: E402
+
+_MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def _start_mock() -> str:
+    cfg = dict(mock_llm_server._DEFAULTS, ttft_ms=5.0, tokens_per_s=0.0, tool_rounds=0)
+    server = mock_llm_server._Server(
+        ("127.0.0.1", 0), mock_llm_server._make_handler(cfg, mock_llm_server._Stats(), random.Random(0))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def _fmt(stats: dict) -> str:
+    return (f"requests={stats['requests']} handshakes={stats['handshakes']} "
+            f"reuse={stats['reuse_rate']:.0%} live={stats['live_connections']}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--streams", type=int, default=10)
+    ap.add_argument("--fetches", type=int, default=10)
+    args = ap.parse_args()
+
+    endpoint = _start_mock()
+    llm = StreamingLLM(endpoint, "bench-token", model="mock-model")
+
+    started = time.perf_counter()
+    for i in range(max(2, args.streams)):
+        llm.stream(_MESSAGES, on_data=lambda _: None)
+        if i == 1:
+            after_two = get_endpoint_stats(endpoint)
+    print(f"stream  {(time.perf_counter() - started) * 1000 / max(2, args.streams):7.2f} ms/call   "
+          f"{_fmt(get_endpoint_stats(endpoint))}")
+
+    started = time.perf_counter()
+    for _ in range(args.fetches):
+        llm.fetch(_MESSAGES)
+    if args.fetches:
+        print(f"fetch   {(time.perf_counter() - started) * 1000 / args.fetches:7.2f} ms/call   "
+              f"{_fmt(get_endpoint_stats(endpoint))}")
+
+    if after_two["handshakes"] != 1:
+        print(f"FAIL: two stream() calls used {after_two['handshakes']} connections", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
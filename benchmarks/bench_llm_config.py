@@ -0,0 +1,120 @@
+"""
+Benchmark: turn-start cost of loading the active LLM config.
+
+Every user_message (and every hang-triage make_llm call) starts by loading
+the active token, endpoint, model and params.  This compares:
+
+  legacy   the previous load_llm_config: pooled connection, KVManager reads
+           for active_token and model, a tokens query, a params.* list_keys
+           scan and one get_value per param
+  read     the single batched kv_store + tokens query (_read_llm_config),
+           i.e. the cost after a CLI change has bumped the config version
+  cached   load_llm_config on a warm cache: one Redis GET of the version key
+           plus a deepcopy
+
+Requires the docker-compose MySQL and Redis services and an active token
+(`slbp token use ...`).
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_llm_config.py [--repeat 200]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.data import get_pool  # noqa: E402
+from src.utils.llm import factory  # noqa: E402
+from src.utils.sql.kv_manager import KVManager  # noqa: E402
+
+
+def _legacy_load_llm_config() -> dict | None:
+    """The pre-cache implementation, kept here for comparison."""
+    pool = get_pool()
+    with pool.get_connection() as conn:
+        kv = KVManager(conn)
+        active_token = kv.get_value("active_token")
+        if not active_token:
+            return None
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT token_value, endpoint_url
+                FROM tokens
+                WHERE BINARY provider = BINARY %s
+                  AND BINARY token_name = BINARY %s
+                LIMIT 1
+                """,
+                (active_token["provider"], active_token.get("name", "")),
+            )
+            row = cursor.fetchone()
+        if not row:
+            return None
+        token_value, endpoint_url = row
+        model = kv.get_value("model") or None
+        param_keys = kv.list_keys(prefix="params.")
+        model_params = {
+            k[len("params.model."):]: kv.get_value(k)
+            for k in param_keys if k.startswith("params.model.")
+        }
+        extra = model_params.pop("request_extra_params", None)
+        if extra:
+            model_params.update(extra)
+        system_params = {
+            k[len("params.system."):]: kv.get_value(k)
+            for k in param_keys if k.startswith("params.system.")
+        }
+    return {
+        "endpoint_url": endpoint_url,
+        "token_value": token_value,
+        "model": model,
+        "model_params": model_params,
+        "system_params": system_params,
+    }
+
+
+def _measure(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<8} median {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=200, help="Calls per variant")
+    args = ap.parse_args()
+
+    legacy = _legacy_load_llm_config()
+    new = factory._read_llm_config()
+    if legacy != new:
+        print("WARNING: legacy and batched reads disagree:")
+        print(f"  legacy:  {legacy}")
+        print(f"  batched: {new}")
+    if new is None:
+        print("No active token configured — run `slbp token use` first.")
+        return
+
+    factory.load_llm_config()  # warm pool, Redis client and cache
+    _report("legacy", _measure(_legacy_load_llm_config, args.repeat))
+    _report("read", _measure(factory._read_llm_config, args.repeat))
+    _report("cached", _measure(factory.load_llm_config, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
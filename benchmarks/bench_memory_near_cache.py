@@ -0,0 +1,79 @@
+"""
+Benchmark: session-memory access with and without the RedisDict near cache.
+
+Replays the access pattern of session_memory_text_editor on one large value:
+each of --edits edits does `key in memory`, memory.get(key) and then writes
+the edited value back, and every --list-every edits the key list is read
+(as the memory tools' listings do).  Runs it three times on scratch hashes:
+
+  none      plain RedisDict (every read is a round trip with the value)
+  version   NearCache validating per-key version tokens
+  tracking  NearCache kept coherent by Redis client tracking (skipped when
+            the server does not support CLIENT TRACKING)
+
+and reports wall time per edit plus the near cache's hit ratio and the
+value bytes it kept off the wire.
+
+Requires the docker-compose Redis service.  Uses scratch keys and deletes
+them afterwards.
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_memory_near_cache.py [--value-mb 4] [--edits 50]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.utils.redis_client import get_redis  # noqa: E402
+from src.utils.redis_dict import NearCache, RedisDict  # noqa: E402
+
+
+def _run(memory: RedisDict, value: str, edits: int, list_every: int) -> float:
+    memory["doc"] = value
+    started = time.perf_counter()
+    for i in range(edits):
+        if "doc" in memory:
+            text = memory.get("doc", "")
+            memory["doc"] = text[:-8] + f"{i:08d}"
+        if i % list_every == 0:
+            sorted(memory.keys())
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--value-mb", type=float, default=4.0)
+    ap.add_argument("--edits", type=int, default=50)
+    ap.add_argument("--list-every", type=int, default=5)
+    args = ap.parse_args()
+
+    r = get_redis()
+    value = "lorem ipsum dolor sit amet\n" * int(args.value_mb * 1024 * 1024 / 27)
+    max_bytes = int(4 * args.value_mb * 1024 * 1024)
+    for name in ("none", "version", "tracking"):
+        cache = None if name == "none" else NearCache(r, max_bytes, coherence=name)
+        if cache is not None and cache.mode != name:
+            print(f"{name:<9} skipped (server has no client tracking)")
+            continue
+        hash_key = f"bench:{uuid.uuid4()}:memory"
+        try:
+            elapsed = _run(RedisDict(r, hash_key, near_cache=cache), value, args.edits, args.list_every)
+            line = f"{name:<9} {elapsed * 1000 / args.edits:8.2f} ms/edit"
+            if cache is not None:
+                s = cache.stats()
+                line += f"   hit_ratio {s['hit_ratio']:5.0%}   saved {s['bytes_saved'] / 1024 / 1024:8.1f} MB"
+            print(line)
+        finally:
+            r.delete(hash_key, f"{hash_key}:versions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: replay log size of one streamed LLM call, full vs delta snapshots.
+
+Simulates a call that streams --reasoning-tokens of reasoning and then
+--content-tokens of content, logging a replay_content_snapshot every
+--every tokens, and writes the snapshots to a scratch session's event stream
+twice:
+
+  full    every snapshot carries the whole text so far (the old format)
+  delta   ContentSnapshotEncoder: keyframes every --keyframe-every
+          snapshots, appended deltas in between
+
+For each it reports the stream size (bytes stored, as written by
+storage_codec, and entries) and the snapshot bytes a client receives when
+replaying from the start of the turn and from halfway through it.
+
+Requires the docker-compose Redis service.  Uses scratch session ids and
+deletes them afterwards.
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_replay_snapshots.py [--reasoning-tokens 20000] [--every 50]
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import uuid
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.utils.event_log import (  # noqa: E402
+    CONTENT_SNAPSHOT_EVENT,
+    ContentSnapshotEncoder,
+    get_events_since,
+    log_event,
+)
+from src.utils.redis_client import get_redis, get_redis_binary  # noqa: E402
+
+
+def _tokens(n: int, rng: random.Random) -> list[str]:
+    # Random pseudo-words, so the text compresses roughly like real prose
+    return ["".join(rng.choice("etaoinshrdlucmfwyp") for _ in range(rng.randint(2, 7))) + " " for _ in range(n)]
+
+
+def _snapshots(reasoning_tokens: int, content_tokens: int, every: int):
+    """(content, reasoning) every `every` tokens, and once at the end."""
+    rng = random.Random(0)
+    reasoning, content = _tokens(reasoning_tokens, rng), _tokens(content_tokens, rng)
+    reasoning_text, content_text = "".join(reasoning), "".join(content)
+    reasoning_ends = list(itertools.accumulate(map(len, reasoning), initial=0))
+    content_ends = list(itertools.accumulate(map(len, content), initial=0))
+    total = reasoning_tokens + content_tokens
+    for n in list(range(every, total, every)) + [total]:
+        yield (content_text[:content_ends[max(0, n - reasoning_tokens)]],
+               reasoning_text[:reasoning_ends[min(n, reasoning_tokens)]])
+
+
+def _write(r, session_id: str, args, encoder: ContentSnapshotEncoder | None) -> list[str]:
+    ids = []
+    for content, reasoning in _snapshots(args.reasoning_tokens, args.content_tokens, args.every):
+        data = {"turn_id": "t", "exchange_idx": 0}
+        if encoder is None:
+            data.update(assistant_content=content, reasoning=reasoning)
+        else:
+            data.update(encoder.encode(content, reasoning))
+        ids.append(log_event(r, session_id, CONTENT_SNAPSHOT_EVENT, data))
+    return ids
+
+
+def _stream_bytes(rb, session_id: str) -> int:
+    entries = rb.xrange(f"session:{session_id}:events", min="-", max="+")
+    return sum(len(v) for _, fields in entries for v in fields.values())
+
+
+def _replay_bytes(rb, session_id: str, last_id: str) -> int:
+    events = get_events_since(rb, session_id, last_id)
+    return len(json.dumps([e for e in events if e["type"] == CONTENT_SNAPSHOT_EVENT]))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reasoning-tokens", type=int, default=20000)
+    ap.add_argument("--content-tokens", type=int, default=2000)
+    ap.add_argument("--every", type=int, default=50, help="Tokens between snapshots")
+    ap.add_argument("--keyframe-every", type=int, default=20, help="Snapshots between keyframes")
+    args = ap.parse_args()
+
+    r, rb = get_redis(), get_redis_binary()
+    for name, encoder in (("full", None), ("delta", ContentSnapshotEncoder(args.keyframe_every))):
+        session_id = f"bench-{uuid.uuid4()}"
+        try:
+            ids = _write(r, session_id, args, encoder)
+            print(
+                f"{name:<6} stream {_stream_bytes(rb, session_id) / 1024:9.1f} KB in {len(ids)} entries   "
+                f"replay from start {_replay_bytes(rb, session_id, '0-0') / 1024:8.1f} KB   "
+                f"from midway {_replay_bytes(rb, session_id, ids[len(ids) // 2]) / 1024:8.1f} KB"
+            )
+        finally:
+            r.delete(f"session:{session_id}:events")
+
+
+if __name__ == "__main__":
+    main()
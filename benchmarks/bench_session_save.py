@@ -0,0 +1,109 @@
+"""
+Benchmark: cost of one session save against session length.
+
+The agentic loop saves the session after every tool batch.  For sessions of
+growing length (completed turns, each with --exchanges tool exchanges whose
+results are --result-bytes long) this measures saving after one new exchange
+was appended to the current turn:
+
+  legacy   the schema-2 save: session_to_dict of the whole session, one SETEX
+           of the JSON blob, then two EXPIREs
+  incr     session_store.save_session: header + the new exchange + TTL
+           refresh in one pipelined round trip
+
+Requires the docker-compose Redis service.  Uses scratch session ids and
+deletes them afterwards.
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_session_save.py [--turns 1,10,50,200] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.utils.redis_client import get_redis  # noqa: E402
+from src.utils.session_model import LLMExchange, Session, ToolCallRecord, Turn, session_to_dict  # noqa: E402
+from src.utils.session_store import delete_session, save_session  # noqa: E402
+
+_TTL = 3600
+
+
+def _legacy_save(r, session_id: str, session: Session) -> None:
+    """The schema-2 _save_session, kept here for comparison."""
+    r.setex(f"session:{session_id}", _TTL, json.dumps(session_to_dict(session)))
+    r.expire(f"session:{session_id}:memory", _TTL)
+    r.expire(f"session:{session_id}:events", _TTL)
+
+
+def _exchange(i: int, result_bytes: int) -> LLMExchange:
+    return LLMExchange(
+        assistant_content=f"Step {i}",
+        tool_calls=[ToolCallRecord(id=f"call-{i}", name="read_text_file",
+                                   args={"path": f"file_{i}.txt"}, result="x" * result_bytes)],
+    )
+
+
+def _session(turns: int, exchanges: int, result_bytes: int) -> Session:
+    session = Session(session_id="bench")
+    for t in range(turns):
+        turn = Turn(id=f"turn-{t}", user_text="do it", user_text_with_context="do it",
+                    exchanges=[_exchange(i, result_bytes) for i in range(exchanges)], completed=True)
+        turn.finalize({}, "done")
+        session.completed_turns.append(turn)
+    session.current_turn = Turn(id="current", user_text="again", user_text_with_context="again")
+    return session
+
+
+def _measure(save, session: Session, repeat: int, result_bytes: int) -> list[float]:
+    samples = []
+    for i in range(repeat):
+        session.current_turn.exchanges.append(_exchange(i, result_bytes))
+        t0 = time.perf_counter()
+        save(session)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _report(name: str, turns: int, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{turns:>6} turns  {name:<7} median {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--turns", default="1,10,50,200", help="Comma-separated session lengths (completed turns)")
+    ap.add_argument("--exchanges", type=int, default=5, help="Tool exchanges per completed turn")
+    ap.add_argument("--result-bytes", type=int, default=2000, help="Size of each tool result")
+    ap.add_argument("--repeat", type=int, default=50, help="Saves per variant and length")
+    args = ap.parse_args()
+
+    r = get_redis()
+    for turns in (int(n) for n in args.turns.split(",")):
+        legacy_id = f"bench-{uuid.uuid4()}"
+        incr_id = f"bench-{uuid.uuid4()}"
+        try:
+            legacy = _session(turns, args.exchanges, args.result_bytes)
+            _report("legacy", turns, _measure(lambda s: _legacy_save(r, legacy_id, s),
+                                              legacy, args.repeat, args.result_bytes))
+            incr = _session(turns, args.exchanges, args.result_bytes)
+            save_session(r, incr_id, incr, _TTL)  # the one-off full write a migration does
+            _report("incr", turns, _measure(lambda s: save_session(r, incr_id, s, _TTL),
+                                            incr, args.repeat, args.result_bytes))
+        finally:
+            delete_session(r, legacy_id)
+            delete_session(r, incr_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Microbenchmark: SSE parsing cost per streamed chat-completions response.
+
+Replays recorded response bodies through the previous line-based parser
+(iter_lines-style str decode + "data: " check + json.loads per line, str +=
+buffers) and through SSEParser + StreamAccumulator, feeding both the same
+network-sized chunks.
+
+Usage:
+    ./python_in_env.sh benchmarks/bench_sse_parser.py [recorded.sse ...]
+        [--chunk-size 1400] [--repeat 20]
+
+A recorded stream is the raw response body of a streamed /chat/completions
+call, e.g. captured with:
+    curl -N https://.../chat/completions -H ... -d @payload.json > run1.sse
+
+With no files, a synthetic reasoning-model stream (long reasoning trace,
+content, two tool calls, heartbeat frames) is generated instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.utils.llm.sse import JSON_DECODER, SSEParser, SSE_DONE  # noqa: E402
+from src.utils.llm.streaming import StreamAccumulator  # noqa: E402
+
+
+def _synthetic_stream(n_reasoning: int = 20000, n_content: int = 2000) -> bytes:
+    def frame(delta: dict) -> bytes:
+        obj = {
+            "id": "gen-bench", "object": "chat.completion.chunk", "created": 0,
+            "model": "bench-model",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        return b"data: " + json.dumps(obj).encode() + b"\n\n"
+
+    parts: list[bytes] = []
+    for i in range(n_reasoning):
+        if i % 500 == 0:
+            parts.append(b": OPENROUTER PROCESSING\n\n")
+        parts.append(frame({"role": "assistant", "content": None, "reasoning": f" tok{i}"}))
+    for i in range(n_content):
+        parts.append(frame({"content": f" word{i}"}))
+    for idx, name in enumerate(("list_dir", "read_text_file")):
+        parts.append(frame({"tool_calls": [{"index": idx, "id": f"call_{idx}", "type": "function",
+                                            "function": {"name": name, "arguments": ""}}]}))
+        for piece in ('{"pa', 'th": "src/', 'utils/llm', '", "depth": 2}'):
+            parts.append(frame({"tool_calls": [{"index": idx, "function": {"arguments": piece}}]}))
+    parts.append(b'data: {"choices":[],"usage":{"prompt_tokens":1000,"completion_tokens":22000}}\n\n')
+    parts.append(b"data: [DONE]\n\n")
+    return b"".join(parts)
+
+
+def _chunks(body: bytes, size: int) -> list[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def _legacy_parse(chunks: list[bytes]) -> tuple[int, str, str]:
+    """The pre-SSEParser loop: iter_lines(decode_unicode=True) + json.loads + str +=."""
+    pending = ""
+    reasoning = ""
+    content = ""
+    tool_args: dict[int, str] = {}
+    events = 0
+    done = False
+    for chunk in chunks:
+        pending += chunk.decode("utf-8")
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line = line.rstrip("\r")
+            if not line or not line.startswith("data: "):
+                continue
+            raw = line[len("data: "):].strip()
+            if raw == "[DONE]":
+                done = True
+                break
+            try:
+                obj = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            choices = obj.get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {}) or {}
+            if delta.get("tool_calls"):
+                for tc in delta["tool_calls"]:
+                    idx = tc.get("index", 0)
+                    tool_args[idx] = tool_args.get(idx, "") + (tc.get("function", {}).get("arguments") or "")
+                continue
+            events += 1
+            reasoning += delta.get("reasoning") or ""
+            content += delta.get("content") or ""
+        if done:
+            break
+    return events, reasoning, content
+
+
+def _new_parse(chunks: list[bytes]) -> tuple[int, str, str]:
+    parser = SSEParser()
+    acc = StreamAccumulator()
+    reasoning: list[str] = []
+    content: list[str] = []
+    events = 0
+    for chunk in chunks:
+        for obj in parser.feed(memoryview(chunk)):
+            if obj is SSE_DONE:
+                break
+            ev = acc.handle(obj)
+            if ev is None:
+                continue
+            events += 1
+            if ev.get("reasoning"):
+                reasoning.append(ev["reasoning"])
+            if ev.get("content"):
+                content.append(ev["content"])
+        if parser.done:
+            break
+    acc.result()
+    return events, "".join(reasoning), "".join(content)
+
+
+def _time(fn, chunks: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(chunks)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("files", nargs="*", help="Recorded SSE response bodies to replay")
+    ap.add_argument("--chunk-size", type=int, default=1400, help="Bytes per simulated network read")
+    ap.add_argument("--repeat", type=int, default=20, help="Runs per parser (best time is reported)")
+    args = ap.parse_args()
+
+    streams: list[tuple[str, bytes]] = []
+    for path in args.files:
+        with open(path, "rb") as f:
+            streams.append((os.path.basename(path), f.read()))
+    if not streams:
+        streams.append(("synthetic", _synthetic_stream()))
+
+    print(f"JSON decoder: {JSON_DECODER}   chunk size: {args.chunk_size} B   repeat: {args.repeat}")
+    print(f"{'stream':<24} {'size':>10} {'events':>8} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, body in streams:
+        chunks = _chunks(body, args.chunk_size)
+        legacy = _legacy_parse(chunks)
+        new = _new_parse(chunks)
+        if legacy != new:
+            print(f"{name:<24} MISMATCH between parsers — skipping")
+            continue
+        t_legacy = _time(_legacy_parse, chunks, args.repeat)
+        t_new = _time(_new_parse, chunks, args.repeat)
+        print(
+            f"{name:<24} {len(body) / 1024:>8.0f}KB {new[0]:>8} "
+            f"{t_legacy * 1000:>10.2f} {t_new * 1000:>10.2f} {t_legacy / t_new:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Load driver: N concurrent Socket.IO sessions against a running UI connector.
+
+Each client connects with its own sessionId, sends --turns user messages one
+after another (auto-approving any approval_request), and records time to
+first token frame and full turn latency (user_message -> message_done).
+
+Pair with mock_llm_server.py so the numbers measure the connector, not the
+provider:
+
+    python mock_llm_server.py --port 8089 --ttft-ms 200 --tokens-per-s 100 &
+    slbp token set -e http://127.0.0.1:8089/v1 mock dummy-token
+    slbp token use mock
+    slbp model use mock-model
+    slbp server run
+    ./python_in_env.sh benchmarks/load_connector.py --clients 50 --turns 3
+
+The connector URL defaults to the running server's flask port
+(.slbp-server.json); pass --url to override.  Against several connector
+processes (`slbp server run --connectors N`) use --transport websocket:
+the polling transport needs every request of a client to reach the same
+process.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+import socketio
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+
+def _default_url() -> str:
+    from src.utils.server_state import read_state
+    state = read_state() or {}
+    port = state.get("flask_port")
+    if not port:
+        raise SystemExit("No running server found in .slbp-server.json — start one or pass --url.")
+    return f"http://127.0.0.1:{port}"
+
+
+class _Client:
+    def __init__(self, url: str, prompt: str, turns: int, turn_timeout: float, transports: list[str] | None):
+        self.url = url
+        self.prompt = prompt
+        self.turns = turns
+        self.turn_timeout = turn_timeout
+        self.transports = transports
+        self.session_id = str(uuid.uuid4())
+        self.ttft: list[float] = []
+        self.latency: list[float] = []
+        self.frames = 0
+        self.errors: list[str] = []
+        self._turn_id = ""
+        self._sent_at = 0.0
+        self._first_token = False
+        self._done = threading.Event()
+        self._sio = socketio.Client(reconnection=False)
+        self._sio.on("token", self._on_token)
+        self._sio.on("message_done", self._on_done)
+        self._sio.on("error", self._on_error)
+        self._sio.on("approval_request", self._on_approval)
+
+    def _on_token(self, data):
+        if data.get("turn_id") != self._turn_id:
+            return
+        self.frames += 1
+        if not self._first_token:
+            self._first_token = True
+            self.ttft.append(time.perf_counter() - self._sent_at)
+
+    def _on_done(self, data):
+        if data.get("turn_id") == self._turn_id:
+            self.latency.append(time.perf_counter() - self._sent_at)
+            self._done.set()
+
+    def _on_error(self, data):
+        if not data.get("turn_id") or data.get("turn_id") == self._turn_id:
+            self.errors.append(str(data.get("message")))
+            self._done.set()
+
+    def _on_approval(self, data):
+        self._sio.emit("approval_response", {"id": data.get("id"), "approved": True})
+
+    def run(self) -> None:
+        try:
+            self._sio.connect(f"{self.url}?sessionId={self.session_id}", transports=self.transports, wait_timeout=30)
+        except Exception as exc:
+            self.errors.append(f"connect: {exc}")
+            return
+        try:
+            for _ in range(self.turns):
+                self._turn_id = str(uuid.uuid4())
+                self._first_token = False
+                self._done.clear()
+                self._sent_at = time.perf_counter()
+                self._sio.emit("user_message", {"text": self.prompt, "clientTurnId": self._turn_id})
+                if not self._done.wait(self.turn_timeout):
+                    self.errors.append(f"turn timed out after {self.turn_timeout:.0f}s")
+                    break
+        finally:
+            self._sio.disconnect()
+
+
+def _pct(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, max(0, int(round(q * len(samples))) - 1))]
+
+
+def _report(name: str, samples: list[float]) -> None:
+    if not samples:
+        print(f"{name:<10} (no samples)")
+        return
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<10} n={len(ms):<5} p50 {statistics.median(ms):8.1f} ms   "
+          f"p95 {_pct(ms, 0.95):8.1f} ms   p99 {_pct(ms, 0.99):8.1f} ms   max {max(ms):8.1f} ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="Connector base URL (default: running server's flask port)")
+    ap.add_argument("--clients", type=int, default=10, help="Concurrent sessions")
+    ap.add_argument("--turns", type=int, default=1, help="Sequential turns per session")
+    ap.add_argument("--prompt", default="List the files in the working directory.")
+    ap.add_argument("--ramp-s", type=float, default=0.0, help="Spread client start-up over this many seconds")
+    ap.add_argument("--turn-timeout", type=float, default=300.0)
+    ap.add_argument("--transport", choices=["auto", "polling", "websocket"], default="auto")
+    args = ap.parse_args()
+
+    url = args.url or _default_url()
+    transports = None if args.transport == "auto" else [args.transport]
+    clients = [_Client(url, args.prompt, args.turns, args.turn_timeout, transports) for _ in range(args.clients)]
+    threads = [threading.Thread(target=c.run, daemon=True) for c in clients]
+
+    print(f"Driving {args.clients} sessions x {args.turns} turns against {url}")
+    started = time.perf_counter()
+    for i, t in enumerate(threads):
+        t.start()
+        if args.ramp_s and args.clients > 1:
+            time.sleep(args.ramp_s / (args.clients - 1))
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ttft = [s for c in clients for s in c.ttft]
+    latency = [s for c in clients for s in c.latency]
+    errors = [e for c in clients for e in c.errors]
+    frames = sum(c.frames for c in clients)
+
+    _report("ttft", ttft)
+    _report("turn", latency)
+    print(f"completed {len(latency)}/{args.clients * args.turns} turns in {elapsed:.1f}s "
+          f"({len(latency) / elapsed:.2f} turns/s, {frames / elapsed:.0f} token frames/s)")
+    if errors:
+        print(f"{len(errors)} errors, e.g.:")
+        for e in sorted(set(errors))[:5]:
+            print(f"  {e}")
+
+
+if __name__ == "__main__":
+    main()
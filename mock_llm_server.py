@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible /chat/completions endpoint, for
+load-testing the UI connector without a live provider.
+
+Streams SSE responses with a configurable time to first token and token rate,
+can answer with scripted tool-call rounds, and can inject context-limit 400s,
+rate-limit/server errors and stalls that trip the client's read timeout.
+
+Usage:
+    python mock_llm_server.py [--port 8089] [--ttft-ms 300] [--tokens-per-s 80] ...
+
+Point a token at it:
+    slbp token set -e http://127.0.0.1:8089/v1 mock dummy-token
+    slbp token use mock
+    slbp model use mock-model
+
+Turn shape: while fewer than --tool-rounds assistant tool-call messages follow
+the last user message, the response is one round of the --tool-calls list;
+after that (and always for the connector's final-summary reprompt) it is plain
+content.  --scenario FILE replaces the flags with a JSON object of the same
+names (e.g. {"ttft_ms": 50, "tool_rounds": 2, "tool_calls": [...]}).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    "the connector streams tokens to the browser while tools run against the "
+    "working tree and results are stored in session memory for later steps"
+).split()
+
+_FINAL_SUMMARY_MARKER = "final summary"
+
+_CONTEXT_LIMIT_BODY = {
+    "error": {
+        "message": "This model's maximum context length is 8192 tokens. "
+                   "However, your messages resulted in 9000 tokens.",
+        "type": "invalid_request_error",
+        "code": "context_length_exceeded",
+    }
+}
+
+_DEFAULTS = {
+    "ttft_ms": 300.0,
+    "jitter_ms": 0.0,
+    "tokens_per_s": 80.0,
+    "reasoning_tokens": 0,
+    "content_tokens": 60,
+    "tool_rounds": 1,
+    "tool_calls": [{"name": "get_pwd", "arguments": {}}],
+    "context_limit_rate": 0.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "timeout_rate": 0.0,
+    "stall_s": 70.0,
+    "heartbeat_s": 0.0,
+}
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.injected = {"context_limit": 0, "error": 0, "timeout": 0}
+
+    def snapshot(self):
+        with self.lock:
+            return {"requests": self.requests, "active": self.active, "injected": dict(self.injected)}
+
+
+def _tool_rounds_since_last_user(messages):
+    rounds = 0
+    for msg in reversed(messages):
+        role = msg.get("role")
+        if role == "user":
+            return rounds, msg
+        if role == "assistant" and msg.get("tool_calls"):
+            rounds += 1
+    return rounds, None
+
+
+def _text_of(msg):
+    content = (msg or {}).get("content")
+    if isinstance(content, list):
+        return "".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return content or ""
+
+
+def _make_handler(cfg, stats, rng):
+    rng_lock = threading.Lock()
+
+    def roll(rate):
+        with rng_lock:
+            return rate > 0 and rng.random() < rate
+
+    class _MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Small SSE writes (and the chunked terminator) must not wait on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        # ---- helpers -------------------------------------------------------
+
+        def _send_json(self, status, obj):
+            body = json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _event(self, obj):
+            self._chunk(b"data: " + json.dumps(obj, separators=(",", ":")).encode() + b"\n\n")
+
+        # ---- routes --------------------------------------------------------
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "invalid JSON body"}})
+                return
+
+            with stats.lock:
+                stats.requests += 1
+                stats.active += 1
+            try:
+                self._complete(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                with stats.lock:
+                    stats.active -= 1
+
+        def _complete(self, payload):
+            if roll(cfg["context_limit_rate"]):
+                with stats.lock:
+                    stats.injected["context_limit"] += 1
+                self._send_json(400, _CONTEXT_LIMIT_BODY)
+                return
+            if roll(cfg["error_rate"]):
+                with stats.lock:
+                    stats.injected["error"] += 1
+                self._send_json(cfg["error_status"], {"error": {"message": "injected upstream error"}})
+                return
+            if roll(cfg["timeout_rate"]):
+                with stats.lock:
+                    stats.injected["timeout"] += 1
+                time.sleep(cfg["stall_s"])
+                self.close_connection = True
+                return
+
+            messages = payload.get("messages") or []
+            rounds, last_user = _tool_rounds_since_last_user(messages)
+            wants_tools = (
+                bool(payload.get("tools")) and bool(cfg["tool_calls"])
+                and rounds < cfg["tool_rounds"]
+                and _FINAL_SUMMARY_MARKER not in _text_of(last_user).lower()
+            )
+            prompt_tokens = len(json.dumps(messages)) // 4
+
+            with rng_lock:
+                ttft = max(0.0, cfg["ttft_ms"] + rng.uniform(-cfg["jitter_ms"], cfg["jitter_ms"])) / 1000
+            time.sleep(ttft)
+
+            if payload.get("stream"):
+                self._stream(payload, wants_tools, prompt_tokens)
+            else:
+                self._fetch(payload, wants_tools, prompt_tokens)
+
+        def _words(self, n):
+            with rng_lock:
+                return [rng.choice(_WORDS) + " " for _ in range(n)]
+
+        def _tool_call_list(self):
+            return [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tc["name"], "arguments": json.dumps(tc.get("arguments", {}))},
+                }
+                for tc in cfg["tool_calls"]
+            ]
+
+        def _fetch(self, payload, wants_tools, prompt_tokens):
+            content = "".join(self._words(cfg["content_tokens"])).strip()
+            message = {"role": "assistant", "content": None if wants_tools else content}
+            if wants_tools:
+                message["tool_calls"] = self._tool_call_list()
+            self._send_json(200, {
+                "id": f"mock-{uuid.uuid4().hex[:8]}",
+                "object": "chat.completion",
+                "model": payload.get("model", "mock-model"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if wants_tools else "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": cfg["content_tokens"],
+                          "total_tokens": prompt_tokens + cfg["content_tokens"]},
+            })
+
+        def _stream(self, payload, wants_tools, prompt_tokens):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            gen_id = f"mock-{uuid.uuid4().hex[:8]}"
+            model = payload.get("model", "mock-model")
+            interval = 1.0 / cfg["tokens_per_s"] if cfg["tokens_per_s"] > 0 else 0.0
+            last_heartbeat = time.monotonic()
+
+            def delta_event(delta, finish=None):
+                return {"id": gen_id, "object": "chat.completion.chunk", "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+
+            def pace():
+                nonlocal last_heartbeat
+                if interval:
+                    time.sleep(interval)
+                if cfg["heartbeat_s"] and time.monotonic() - last_heartbeat >= cfg["heartbeat_s"]:
+                    self._chunk(b": OPENROUTER PROCESSING\n\n")
+                    last_heartbeat = time.monotonic()
+
+            completion = 0
+            for word in self._words(cfg["reasoning_tokens"]):
+                self._event(delta_event({"role": "assistant", "content": None, "reasoning": word}))
+                completion += 1
+                pace()
+
+            if wants_tools:
+                # The last argument fragment carries finish_reason (an empty
+                # closing delta would be reported as a useless event).
+                tool_calls = self._tool_call_list()
+                for idx, tc in enumerate(tool_calls):
+                    self._event(delta_event({"tool_calls": [{
+                        "index": idx, "id": tc["id"], "type": "function",
+                        "function": {"name": tc["function"]["name"], "arguments": ""},
+                    }]}))
+                    args = tc["function"]["arguments"] or "{}"
+                    for i in range(0, len(args), 8):
+                        last = idx == len(tool_calls) - 1 and i + 8 >= len(args)
+                        self._event(delta_event(
+                            {"tool_calls": [{"index": idx, "function": {"arguments": args[i:i + 8]}}]},
+                            "tool_calls" if last else None,
+                        ))
+                        completion += 1
+                        pace()
+            else:
+                for word in self._words(cfg["content_tokens"]):
+                    self._event(delta_event({"content": word}))
+                    completion += 1
+                    pace()
+                self._event(delta_event({"content": ""}, "stop"))
+
+            self._event({"id": gen_id, "object": "chat.completion.chunk", "model": model, "choices": [],
+                         "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion,
+                                   "total_tokens": prompt_tokens + completion}})
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+
+    return _MockHandler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--scenario", help="JSON file overriding the options below")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--ttft-ms", type=float, default=_DEFAULTS["ttft_ms"], help="Delay before the first byte")
+    parser.add_argument("--jitter-ms", type=float, default=_DEFAULTS["jitter_ms"], help="Uniform +/- jitter on TTFT")
+    parser.add_argument("--tokens-per-s", type=float, default=_DEFAULTS["tokens_per_s"], help="Streaming rate (0 = as fast as possible)")
+    parser.add_argument("--reasoning-tokens", type=int, default=_DEFAULTS["reasoning_tokens"])
+    parser.add_argument("--content-tokens", type=int, default=_DEFAULTS["content_tokens"])
+    parser.add_argument("--tool-rounds", type=int, default=_DEFAULTS["tool_rounds"], help="Tool-call rounds per user message")
+    parser.add_argument(
+        "--tool-calls", default=json.dumps(_DEFAULTS["tool_calls"]),
+        help='JSON list of calls emitted per round, e.g. \'[{"name": "list_dir", "arguments": {"path": "."}}]\'',
+    )
+    parser.add_argument("--context-limit-rate", type=float, default=_DEFAULTS["context_limit_rate"], help="Fraction of requests answered with a context-limit 400")
+    parser.add_argument("--error-rate", type=float, default=_DEFAULTS["error_rate"], help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=_DEFAULTS["error_status"])
+    parser.add_argument("--timeout-rate", type=float, default=_DEFAULTS["timeout_rate"], help="Fraction of requests that stall for --stall-s")
+    parser.add_argument("--stall-s", type=float, default=_DEFAULTS["stall_s"])
+    parser.add_argument("--heartbeat-s", type=float, default=_DEFAULTS["heartbeat_s"], help="Interleave ': OPENROUTER PROCESSING' comments (0 = off)")
+    args = parser.parse_args()
+
+    cfg = {key: getattr(args, key) for key in _DEFAULTS}
+    cfg["tool_calls"] = json.loads(args.tool_calls)
+    if args.scenario:
+        with open(args.scenario, encoding="utf-8") as f:
+            cfg.update(json.load(f))
+
+    stats = _Stats()
+    server = _Server((args.host, args.port), _make_handler(cfg, stats, random.Random(args.seed)))
+    print(f"[mock_llm_server] Listening on http://{args.host}:{args.port}/v1 (stats: GET /v1/stats)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
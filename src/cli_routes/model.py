@@ -3,6 +3,7 @@ import click
 from src.data import get_pool
 from src.cli_obj import cli
 from src.utils.sql.kv_manager import KVManager
+from src.utils.llm.factory import bump_llm_config_version
 
 @cli.group()
 def model():
@@ -19,6 +20,7 @@ def sub_cmd_use(model_name):
     with pool.get_connection() as conn:
         KVManager(conn).set_value("model",model_name)
         conn.commit()
+    bump_llm_config_version()
     click.echo(f"Set current model to: {model_name or '(not set)'}")
 
 @model.command(name="show")
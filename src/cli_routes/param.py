@@ -6,6 +6,7 @@ from termcolor import colored
 from src.data import get_pool
 from src.cli_obj import cli
 from src.utils.sql.kv_manager import KVManager
+from src.utils.llm.factory import bump_llm_config_version
 
 _ALLOWED_PARAMS = {
     "model.temperature",
@@ -15,6 +16,8 @@ _ALLOWED_PARAMS = {
     "model.request_extra_params",
     "system.return_value_max_chars",
     "system.assistant_strip_truncation_chars",
+    "system.prompt_cache_hints",
+    "system.context_window",
 }
 
 _PARAM_DOCS = {
@@ -80,6 +83,25 @@ _PARAM_DOCS = {
             "  not set : leave interim assistant content unchanged (default)."
         ),
     },
+    "system.prompt_cache_hints": {
+        "type": "boolean (true / false)",
+        "description": (
+            "Attach {\"cache_control\": {\"type\": \"ephemeral\"}} breakpoints to the "
+            "system prompt and the newest message of every request. Needed for providers "
+            "that only cache explicitly marked prompt prefixes (e.g. Anthropic and Gemini "
+            "models via OpenRouter); providers with automatic prefix caching ignore it."
+        ),
+    },
+    "system.context_window": {
+        "type": "integer > 0",
+        "description": (
+            "Context window of the active model, in tokens. Used to estimate each "
+            "request's prompt size before it is sent and strip the conversation up "
+            "front when it would not fit. When not set, a built-in table of common "
+            "models (or the limit reported by an earlier context-limit error) is used; "
+            "unknown models are only stripped after the provider rejects a request."
+        ),
+    },
 }
 
 
@@ -120,6 +142,18 @@ def _parse_and_validate(name: str, raw_value: str):
             if value <= 0:
                 raise click.BadParameter("system.return_value_max_chars must be > 0", param_hint="value")
             return value
+        elif name == "system.context_window":
+            value = int(raw_value)
+            if value <= 0:
+                raise click.BadParameter("system.context_window must be > 0", param_hint="value")
+            return value
+        elif name == "system.prompt_cache_hints":
+            lowered = raw_value.strip().lower()
+            if lowered in ("true", "1", "yes", "on"):
+                return True
+            if lowered in ("false", "0", "no", "off"):
+                return False
+            raise click.BadParameter("system.prompt_cache_hints must be true or false", param_hint="value")
         elif name == "system.assistant_strip_truncation_chars":
             value = int(raw_value)
             if value < 0:
@@ -133,7 +167,10 @@ def _parse_and_validate(name: str, raw_value: str):
                 raise click.BadParameter("model.top_p must be between 0.0 and 1.0", param_hint="value")
             return value
     except ValueError:
-        int_params = {"model.top_k", "model.max_tokens", "system.return_value_max_chars", "system.assistant_strip_truncation_chars"}
+        int_params = {
+            "model.top_k", "model.max_tokens", "system.return_value_max_chars",
+            "system.assistant_strip_truncation_chars", "system.context_window",
+        }
         type_hint = "integer" if name in int_params else "float"
         raise click.BadParameter(f"value for '{name}' must be a {type_hint}", param_hint="value")
 
@@ -188,6 +225,7 @@ def sub_cmd_set(name, value):
     with pool.get_connection() as conn:
         KVManager(conn).set_value(f"params.{name}", typed_value)
         conn.commit()
+    bump_llm_config_version()
     click.echo(f"Set params.{name} = {typed_value}")
 
 
@@ -228,6 +266,7 @@ def sub_cmd_unset(name):
             return
         kv.delete_value(f"params.{name}")
         conn.commit()
+    bump_llm_config_version()
     click.echo(f"Unset params.{name}")
 
 
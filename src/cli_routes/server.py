@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import socket
 from pathlib import Path
 
 import click
@@ -63,10 +64,73 @@ def server():
     '--load-startup-tool-calls', is_flag=True, default=False,
     help='Execute tool calls from startup_tool_calls.json in the working directory on UI startup.',
 )
-def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hotfix_gpt_oss_20b_bad_parser, hotfix_gpt_oss_20b_bad_void_call, hotfix_suite_gpt_oss_20b, load_startup_tool_calls):
+@click.option(
+    '--token-frame-ms', default=16, type=int, show_default=True,
+    help=(
+        'Coalesce streamed token deltas into one Socket.IO frame per this many milliseconds. '
+        '0 emits one frame per delta.'
+    ),
+)
+@click.option(
+    '--token-frame-bytes', default=2048, type=int, show_default=True,
+    help='Flush a coalesced token frame early once it holds this many characters.',
+)
+@click.option(
+    '--speculative-tools', default=True, type=bool, show_default=True,
+    help=(
+        'Start side-effect-free tool calls that need no approval as soon as their arguments have '
+        'streamed in, instead of after the whole LLM response has finished.'
+    ),
+)
+@click.option(
+    '--tool-concurrency', default=4, type=int, show_default=True,
+    help=(
+        'Run up to this many independent tool calls from one LLM response at the same time '
+        '(calls whose declared resources do not conflict). 1 runs every call in sequence.'
+    ),
+)
+@click.option(
+    '--llm-transport', type=click.Choice(['live', 'record', 'replay']), default=None,
+    help=(
+        'live: call the LLM provider (default). record: call it and save every request/response '
+        'to a cassette. replay: serve saved cassettes instead of calling the provider. '
+        'Overrides SLBP_LLM_TRANSPORT.'
+    ),
+)
+@click.option(
+    '--cassette-dir', type=click.Path(file_okay=False), default=None,
+    help='Directory for LLM cassettes (default: cassettes/ in the project root). Overrides SLBP_LLM_CASSETTE_DIR.',
+)
+@click.option(
+    '--replay-speed', type=float, default=None,
+    help=(
+        'Replay pacing: 1 reproduces the recorded chunk timing, 10 is ten times faster, '
+        '0 replays without delays. Overrides SLBP_LLM_REPLAY_SPEED.'
+    ),
+)
+@click.option(
+    '--connectors', default=1, type=int, show_default=True,
+    help=(
+        'Run this many Flask/SocketIO connector processes on the same port (SO_REUSEPORT), '
+        'fanning Socket.IO rooms out through Redis.'
+    ),
+)
+@click.option(
+    '--workers', default=0, type=int, show_default=True,
+    help=(
+        'Run user turns in this many worker processes fed from a Redis job queue, instead of '
+        'inside the Flask/SocketIO process. 0 runs turns in the Flask process.'
+    ),
+)
+@click.option(
+    '--worker-slots', default=8, type=int, show_default=True,
+    help='Maximum concurrent turns per worker process (with --workers).',
+)
+def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hotfix_gpt_oss_20b_bad_parser, hotfix_gpt_oss_20b_bad_void_call, hotfix_suite_gpt_oss_20b, load_startup_tool_calls, token_frame_ms, token_frame_bytes, speculative_tools, tool_concurrency, llm_transport, cassette_dir, replay_speed, connectors, workers, worker_slots):
     """
     Start the server: launches the logging relay, static UI server, and the
-    Flask/SocketIO backend concurrently, forwarding all streams to stdout.
+    Flask/SocketIO backend (--connectors processes, plus --workers turn
+    workers) concurrently, forwarding all streams to stdout.
 
     Use `slbp ui open` in a separate terminal to open the UI in your browser.
 
@@ -76,6 +140,8 @@ def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hot
       - .env exists at the project root (copy from .env.example)
     """
     bash = find_bash()
+    if connectors > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        raise click.UsageError("--connectors > 1 needs SO_REUSEPORT, which this platform does not support.")
 
     # Allocate three free ports upfront so all processes know where to connect.
     flask_port = find_free_port()
@@ -105,6 +171,23 @@ def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hot
         flask_env["SLBP_HOTFIX_GPT_OSS_20B_BAD_VOID_CALL"] = "1"
     if load_startup_tool_calls:
         flask_env["SLBP_LOAD_STARTUP_TOOL_CALLS"] = "1"
+    flask_env["SLBP_TOKEN_FRAME_MS"] = str(token_frame_ms)
+    flask_env["SLBP_TOKEN_FRAME_BYTES"] = str(token_frame_bytes)
+    flask_env["SLBP_SPECULATIVE_TOOLS"] = "1" if speculative_tools else "0"
+    flask_env["SLBP_TOOL_CONCURRENCY"] = str(tool_concurrency)
+    if llm_transport:
+        flask_env["SLBP_LLM_TRANSPORT"] = llm_transport
+    if cassette_dir:
+        flask_env["SLBP_LLM_CASSETTE_DIR"] = os.path.abspath(cassette_dir)
+    if replay_speed is not None:
+        flask_env["SLBP_LLM_REPLAY_SPEED"] = str(replay_speed)
+    flask_env["SLBP_TURN_WORKERS"] = str(max(0, workers))
+    flask_env["SLBP_WORKER_SLOTS"] = str(max(1, worker_slots))
+    if connectors > 1 or workers > 0:
+        from src.utils.redis_client import redis_url
+        flask_env["SLBP_SOCKETIO_MESSAGE_QUEUE"] = redis_url()
+    if connectors > 1:
+        flask_env["SLBP_CONNECTOR_REUSEPORT"] = "1"
 
     processes = [
         ManagedProcess(
@@ -119,13 +202,21 @@ def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hot
             cwd=PROJECT_ROOT / "ui",
             env={"UI_PORT": str(ui_port), "FLASK_PORT": str(flask_port)},
         ),
-        ManagedProcess(
-            label="flask",
+    ]
+    for i in range(max(1, connectors)):
+        processes.append(ManagedProcess(
+            label="flask" if connectors <= 1 else f"flask-{i}",
             cmd=[bash, "-l", str(PROJECT_ROOT / "run_ui_connector.sh")],
             cwd=os.getcwd(),
             env=flask_env,
-        ),
-    ]
+        ))
+    for i in range(max(0, workers)):
+        processes.append(ManagedProcess(
+            label=f"worker-{i}",
+            cmd=[bash, "-l", str(PROJECT_ROOT / "run_turn_worker.sh")],
+            cwd=os.getcwd(),
+            env=flask_env,
+        ))
 
     click.echo("[slbp] Starting server processes. Press Ctrl+C to stop.")
     click.echo(f"[slbp] Run `slbp ui open` to open the UI in your browser.")
@@ -135,3 +226,23 @@ def server_run(load_skills, load_tools, pin_project_memory, tool_tracebacks, hot
     except KeyboardInterrupt:
         clear_state()
         click.echo("[slbp] Stopped.")
+
+
+@server.command(name="workers")
+def server_workers():
+    """Show turn queue depth and worker utilization (for `slbp server run --workers N`)."""
+    from src.ui_connector.turn_queue import queue_stats
+    from src.utils.redis_client import get_redis
+
+    stats = queue_stats(get_redis())
+    click.echo(
+        f"queued={stats['queued']}  running={stats['running']}  workers={stats['workers']}  "
+        f"busy={stats['busy']}/{stats['slots']} slots  utilization={stats['utilization']:.0%}"
+    )
+    for worker_id, w in sorted(stats["per_worker"].items()):
+        uptime = w["heartbeat"] - w["started"]
+        util = w["busy_s"] / (w["slots"] * uptime) if uptime > 0 else 0.0
+        click.echo(
+            f"  {worker_id}: busy={w['busy']}/{w['slots']}  turns={w['turns']}  "
+            f"utilization={util:.0%}  up={uptime:.0f}s"
+        )
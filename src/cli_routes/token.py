@@ -6,6 +6,7 @@ from src.cli_obj import cli
 
 from src.data import get_pool
 from src.utils.sql.kv_manager import KVManager
+from src.utils.llm.factory import bump_llm_config_version
 
 @cli.group()
 def token():
@@ -188,6 +189,7 @@ def sub_cmd_set(
                     (chosen_endpoint, token, token_id),
                 )
                 conn.commit()
+                bump_llm_config_version()
                 click.echo("Token updated.")
                 return
 
@@ -200,6 +202,7 @@ def sub_cmd_set(
                 (provider, chosen_endpoint, token_name, token),
             )
             conn.commit()
+            bump_llm_config_version()
             click.echo("Token added.")
             click.echo("""\
 Note: token not immediately used (set as active).
@@ -226,8 +229,115 @@ def sub_cmd_use(provider: str, name: str):
             "name": token_name,
         })
         conn.commit()
+    bump_llm_config_version()
     click.echo(f"""\
 Set active token to provider="{provider}" and name="{token_name}" for this session.
                """.strip())
 
 
+
+
+@token.group(name="pool")
+def pool_group():
+    """
+    Manage the pool of tokens that LLM calls are routed across.
+
+    With an empty pool every call goes to the active token.  Once tokens are
+    added, the server spreads calls across the active token plus the pool
+    members, preferring the lowest recent time-to-first-token and failing
+    over on 429/5xx/timeouts.
+    """
+
+
+def _read_token_pool(kv: KVManager) -> list[dict]:
+    return kv.get_value("token_pool") or []
+
+
+@pool_group.command(name="add")
+@click.option(
+    "--model", "-m", type=str, required=False, default=None,
+    help="Model to request from this member (defaults to the global model)"
+)
+@click.argument("provider", type=str, required=True, nargs=1)
+@click.argument("name", type=str, required=False, nargs=1, default="")
+def sub_cmd_pool_add(model: Optional[str], provider: str, name: str):
+    """
+    Add a stored token (by provider and optional name) to the routing pool.
+    """
+    pool = get_pool()
+    token_name = name or ""
+    with pool.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT endpoint_url
+                FROM tokens
+                WHERE BINARY provider = BINARY %s
+                  AND BINARY token_name = BINARY %s
+                LIMIT 1
+                """,
+                (provider, token_name),
+            )
+            row = cursor.fetchone()
+        if row is None:
+            click.echo(f'No token stored for provider="{provider}" and name="{token_name}". Add it with "slbp token set" first.')
+            return
+        if not row[0]:
+            warnings.warn("This token has no endpoint URL; the router will skip it until one is configured.")
+
+        kv = KVManager(conn)
+        members = [
+            m for m in _read_token_pool(kv)
+            if (m["provider"], m.get("name", "")) != (provider, token_name)
+        ]
+        entry = {"provider": provider, "name": token_name}
+        if model:
+            entry["model"] = model
+        members.append(entry)
+        kv.set_value("token_pool", members)
+        conn.commit()
+    bump_llm_config_version()
+    click.echo(f'Added provider="{provider}" name="{token_name}" to the token pool ({len(members)} member(s)).')
+
+
+@pool_group.command(name="remove")
+@click.argument("provider", type=str, required=True, nargs=1)
+@click.argument("name", type=str, required=False, nargs=1, default="")
+def sub_cmd_pool_remove(provider: str, name: str):
+    """
+    Remove a token from the routing pool (the token itself is kept).
+    """
+    pool = get_pool()
+    token_name = name or ""
+    with pool.get_connection() as conn:
+        kv = KVManager(conn)
+        members = _read_token_pool(kv)
+        remaining = [m for m in members if (m["provider"], m.get("name", "")) != (provider, token_name)]
+        if len(remaining) == len(members):
+            click.echo("Token is not in the pool. No changes made.")
+            return
+        kv.set_value("token_pool", remaining)
+        conn.commit()
+    bump_llm_config_version()
+    click.echo(f'Removed provider="{provider}" name="{token_name}" from the token pool ({len(remaining)} member(s) left).')
+
+
+@pool_group.command(name="list")
+def sub_cmd_pool_list():
+    """
+    List the routing pool.  The active token is always routed to as well.
+    """
+    pool = get_pool()
+    with pool.get_connection() as conn:
+        kv = KVManager(conn)
+        members = _read_token_pool(kv)
+        active = kv.get_value("active_token") or {}
+    if not members:
+        click.echo("Token pool is empty — all LLM calls go to the active token.")
+        return
+    print(f"{'Provider':<20} {'Name':<20} {'Model'}")
+    print("-" * 60)
+    if active:
+        print(f"{active.get('provider', ''):<20} {active.get('name') or '(no name)':<20} (global) [active]")
+    for m in members:
+        print(f"{m['provider']:<20} {m.get('name') or '(no name)':<20} {m.get('model') or '(global)'}")
@@ -30,6 +30,7 @@ from src.tools import session_memory_text_editor
 from src.tools import todo_list
 from src.tools import wikipedia
 from src.tools import write_text_file_from_session_memory
+from src.tools._result_cache import ToolResultCache
 from src.utils.tool_calling.arguments import validate_tool_args
 
 ALL_TOOL_DEFINITIONS: list[dict] = [
@@ -134,18 +135,34 @@ def execute_tool(
     args: dict,
     session_data: dict | None = None,
     special_resources: dict | None = None,
+    result_cache: ToolResultCache | None = None,
+    call_id: str = "",
 ) -> str:
+    """
+    Run one tool call and return its result text.  With a result_cache, a
+    repeat of an idempotent call made earlier in the turn is answered with a
+    reference to that call (call_id identifies this one for later repeats).
+    """
     module = _TOOL_MAP.get(name)
     if module is None:
         return f"Unknown tool: {name!r}"
     if session_data is None:
         session_data = {}
+    cache_key = None
+    if result_cache is not None:
+        cached = result_cache.lookup(name, args)
+        if cached is not None:
+            return cached
+        cache_key = result_cache.key(name, args)
+    result = None
     try:
         validate_tool_args(module.DEFINITION, args)
         fn = module.execute
         if special_resources is not None and _accepts_special_resources(fn):
-            return fn(args, session_data, special_resources)
-        return fn(args, session_data)
+            result = fn(args, session_data, special_resources)
+        else:
+            result = fn(args, session_data)
+        return result
     except (ToolHangError, ToolTimeoutError):
         raise
     except Exception as e:
@@ -153,6 +170,9 @@ def execute_tool(
             tb = traceback.format_exc()
             return f"Failed to execute tool {name}:\n{tb}".rstrip()
         return f"Failed to execute tool {name}:\n{e}"
+    finally:
+        if result_cache is not None:
+            result_cache.record(cache_key, module, args, call_id, result)
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+
+from src.tools._traits import Claims, concurrency_claims, is_idempotent
+from src.utils.llm.payload import canonical_json
+
+
+@dataclass
+class _Entry:
+    call_id: str
+    claims: Claims
+    expires_at: float | None
+    confirmed: bool = False
+
+
+class ToolResultCache:
+    """Results of idempotent tool calls made during one turn (see _traits.is_idempotent).
+
+    execute_tool() answers a repeat of an idempotent call (same tool, same
+    arguments) with a short reference to the earlier call instead of running
+    it again, and records every call it does run: a call whose claims conflict
+    with a cached entry's (it writes something the entry read or wrote)
+    invalidates that entry.
+
+    Only results the model has seen may be referred to, so an entry is used
+    once confirm(call_id) reports that its call's result went into the turn
+    (speculative runs can be discarded before that), and is dropped with
+    discard() once context stripping cuts that result from the payload.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, _Entry] = {}
+        self.hits = 0
+
+    @staticmethod
+    def key(name: str, args: dict | None) -> str:
+        return f"{name}:{canonical_json(args or {})}"
+
+    def lookup(self, name: str, args: dict | None) -> str | None:
+        """The result to return for a repeat of this call, or None to run it."""
+        key = self.key(name, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.confirmed:
+                return None
+            if entry.expires_at is not None and time.monotonic() >= entry.expires_at:
+                del self._entries[key]
+                return None
+            self.hits += 1
+            call_id = entry.call_id
+        return (
+            f"Same result as the earlier {name} call {call_id} with the same arguments "
+            f"(nothing it depends on has changed since); see that call's result above."
+        )
+
+    def record(self, key: str, module, args: dict | None, call_id: str, result: str | None) -> None:
+        """
+        Note that a call ran: drop entries it may have changed and, if it is
+        idempotent and succeeded (result is not None), cache it under key.
+        """
+        claims = concurrency_claims(module, args)
+        with self._lock:
+            stale = [k for k, entry in self._entries.items() if claims.conflicts_with(entry.claims)]
+            for k in stale:
+                del self._entries[k]
+            if result is None or not call_id or not is_idempotent(module, args):
+                return
+            existing = self._entries.get(key)
+            if existing is not None and existing.confirmed:
+                return
+            ttl = getattr(module, "IDEMPOTENT_TTL_S", None)
+            self._entries[key] = _Entry(
+                call_id=call_id,
+                claims=claims,
+                expires_at=time.monotonic() + ttl if ttl else None,
+            )
+
+    def discard(self, call_ids: set[str]) -> None:
+        """Forget entries whose result is no longer whole in the payload (context stripping)."""
+        if not call_ids:
+            return
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry.call_id in call_ids]:
+                del self._entries[key]
+
+    def confirm(self, call_id: str) -> None:
+        """call_id's result is now part of the turn; repeats may refer to it."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.call_id == call_id:
+                    entry.confirmed = True
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+
+# ---------------------------------------------------------------------------
+# Concurrency claims
+# ---------------------------------------------------------------------------
+#
+# A tool module may declare which shared resources a call reads and writes:
+#
+#   CONCURRENCY = {"reads": ["fs", "cwd"], "writes": ["mem:{memory_key}"]}
+#   CONCURRENCY_PER_ACTION = {"get": {"reads": ["mem:{key}"]}, ...}
+#
+# Resources:
+#   fs               the filesystem
+#   cwd              the process working directory
+#   mem:<key>        one session memory key; "mem:<prefix>*" is a key prefix,
+#                    "mem:*" all of session memory
+#   project_memory   project memory (MySQL)
+#   todo             the session todo list
+#   web:<url>        remote state behind a URL (a request that may change it)
+#   sandbox:<key>    runs of the program stored in mem:<key> in the code sandbox
+#
+# "{arg}" placeholders are filled from the call's arguments; a missing or
+# non-string argument widens the claim to a wildcard.  A "target" output of
+# session_memory / project_memory adds the matching write automatically.
+#
+# Two calls may run at the same time when neither writes a resource the other
+# reads or writes.  Modules without a declaration are exclusive: they never
+# overlap with any other call.
+#
+# The claims are also the tools' only side-effect declaration: a call is
+# read-only when it writes nothing but session memory, and side-effect free
+# when it writes nothing at all.
+
+_TARGET_KEY_ARGS = ("memory_key", "output_key", "target_session_memory_key", "target_session_key")
+
+
+@dataclass(frozen=True)
+class Claims:
+    reads: frozenset[str] = frozenset()
+    writes: frozenset[str] = frozenset()
+    exclusive: bool = False
+
+    def conflicts_with(self, other: "Claims") -> bool:
+        if self.exclusive or other.exclusive:
+            return True
+        return (
+            _overlaps(self.writes, other.reads | other.writes)
+            or _overlaps(other.writes, self.reads)
+        )
+
+
+EXCLUSIVE = Claims(exclusive=True)
+
+
+def _resource_overlap(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    if a.endswith("*") and b.startswith(a[:-1]):
+        return True
+    if b.endswith("*") and a.startswith(b[:-1]):
+        return True
+    return False
+
+
+def _overlaps(left: frozenset[str], right: frozenset[str]) -> bool:
+    return any(_resource_overlap(a, b) for a in left for b in right)
+
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def _fill(template: str, args: dict) -> str:
+    """Fill {arg} placeholders; anything unknown truncates the claim to a prefix wildcard."""
+    m = _PLACEHOLDER.search(template)
+    if m is None:
+        return template
+    value = args.get(m.group(1))
+    if not isinstance(value, str) or not value:
+        return template[:m.start()] + "*"
+    return _fill(template[:m.start()] + value + template[m.end():], args)
+
+
+def concurrency_claims(module, args: dict | None) -> Claims:
+    """Resolve the resources one call of this tool reads and writes."""
+    args = args or {}
+    spec = None
+    per_action = getattr(module, "CONCURRENCY_PER_ACTION", None)
+    if per_action is not None:
+        action = args.get("action")
+        if action and action in per_action:
+            spec = per_action[action]
+    if spec is None:
+        spec = getattr(module, "CONCURRENCY", None)
+    if spec is None:
+        return EXCLUSIVE
+
+    reads = {_fill(r, args) for r in spec.get("reads", ())}
+    writes = {_fill(w, args) for w in spec.get("writes", ())}
+
+    target = args.get("target")
+    if target == "session_memory":
+        key = next((args[k] for k in _TARGET_KEY_ARGS if isinstance(args.get(k), str) and args[k]), None)
+        writes.add(f"mem:{key}" if key else "mem:*")
+    elif target == "project_memory":
+        writes.add("project_memory")
+
+    return Claims(frozenset(reads), frozenset(writes))
+
+
+def is_read_only(module, args: dict | None) -> bool:
+    """Return True if this tool call has no effects outside the current session.
+
+    A read-only call may read the filesystem, the network or project memory and
+    may write its output into session memory (its claims write only mem:*
+    resources), but must not modify files, run commands, change the working
+    directory or write project memory.  Calls without claims are not read-only.
+    """
+    claims = concurrency_claims(module, args)
+    return not claims.exclusive and all(w.startswith("mem:") for w in claims.writes)
+
+
+def is_side_effect_free(module, args: dict | None) -> bool:
+    """Return True if this call's concurrency claims write nothing at all.
+
+    Such a call can be started speculatively (before the model's response has
+    finished streaming) and its result discarded if the response is retried
+    or the turn is cancelled, without leaving anything behind.
+    """
+    claims = concurrency_claims(module, args)
+    return not claims.exclusive and not claims.writes
+
+
+# ---------------------------------------------------------------------------
+# Idempotence
+# ---------------------------------------------------------------------------
+#
+# A tool module may declare that repeating a call with the same arguments
+# returns the same result for as long as nothing it reads has changed:
+#
+#   IDEMPOTENT = True
+#   IDEMPOTENT_PER_ACTION = {"get": True, ...}
+#   IDEMPOTENT_TTL_S = 300     # optional: the result also depends on outside
+#                              # state (the network), reuse it for at most this long
+#
+# "What it reads" is the call's concurrency claims, so an idempotent module
+# must declare CONCURRENCY / CONCURRENCY_PER_ACTION.  Within one turn,
+# ToolResultCache (src/tools/_result_cache.py) answers a repeat with a short
+# reference to the earlier call until some call whose claims conflict with
+# it runs.
+
+
+def is_idempotent(module, args: dict | None) -> bool:
+    """Return True if repeats of this call may be answered from an earlier result.
+
+    Checks IDEMPOTENT_PER_ACTION[action] first; falls back to module-level
+    IDEMPOTENT (default False).  Calls without declared concurrency claims are
+    never idempotent.
+    """
+    if concurrency_claims(module, args).exclusive:
+        return False
+    per_action = getattr(module, "IDEMPOTENT_PER_ACTION", None)
+    if per_action is not None and args:
+        action = args.get("action")
+        if action and action in per_action:
+            return bool(per_action[action])
+    return bool(getattr(module, "IDEMPOTENT", False))
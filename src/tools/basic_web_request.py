@@ -18,6 +18,7 @@ from src.data import get_pool
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 800
+CONCURRENCY = {"writes": ["web:{url}"]}  # any method may change remote state
 
 DEFAULT_TIMEOUT = 30  # informational; actual value comes from args
 TIMEOUT_HINT = None
@@ -17,6 +17,9 @@ _ACCEPT = "application/json"
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 800
+CONCURRENCY = {"reads": []}
+IDEMPOTENT = True
+IDEMPOTENT_TTL_S = 300
 
 DEFAULT_TIMEOUT = 15  # seconds
 TIMEOUT_HINT = None
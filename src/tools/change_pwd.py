@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 
 LEAVE_OUT = "KEEP"
+CONCURRENCY = {"reads": ["fs"], "writes": ["cwd"]}
 
 DEFINITION: dict = {
     "type": "function",
@@ -13,6 +13,7 @@ MAX_ALLOWABLE_TIMEOUT = 120  # hard cap — never allow the LLM to set higher
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 1000
+CONCURRENCY = {"reads": ["mem:{session_memory_key_code}"], "writes": ["sandbox:{session_memory_key_code}"]}
 
 _PISTON_EXECUTE_PATH = "/api/v2/execute"
 _piston_port: int | None = None
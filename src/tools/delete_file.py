@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 
 LEAVE_OUT = "PARAMS_ONLY"
+CONCURRENCY = {"reads": ["cwd"], "writes": ["fs"]}
 
 DEFINITION: dict = {
     "type": "function",
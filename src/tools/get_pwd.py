@@ -6,6 +6,8 @@ from src.data import get_pool
 from src.utils.sql.kv_manager import KVManager
 
 LEAVE_OUT = "KEEP"
+CONCURRENCY = {"reads": ["cwd"]}
+IDEMPOTENT = True
 
 DEFINITION: dict = {
     "type": "function",
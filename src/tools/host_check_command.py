@@ -3,6 +3,7 @@ from __future__ import annotations
 import shutil
 
 LEAVE_OUT = "KEEP"
+CONCURRENCY = {"reads": []}
 
 DEFINITION = {
     "type": "function",
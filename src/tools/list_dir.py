@@ -9,6 +9,8 @@ from src.utils.sql.kv_manager import KVManager
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 400
+CONCURRENCY = {"reads": ["fs", "cwd"]}
+IDEMPOTENT = True
 
 DEFAULT_TIMEOUT = 30  # seconds
 TIMEOUT_HINT = "list_dir timed out; consider restricting traversal depth (use the 'depth' parameter)"
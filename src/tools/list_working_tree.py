@@ -5,6 +5,8 @@ from src.tools._subprocess import run_command
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 600
+CONCURRENCY = {"reads": ["fs", "cwd"]}
+IDEMPOTENT = True
 
 DEFAULT_TIMEOUT = 15  # seconds
 TIMEOUT_HINT = None
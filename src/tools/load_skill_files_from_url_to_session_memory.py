@@ -7,6 +7,7 @@ import httpx
 from src.utils.http.helpers import ensure_session_memory
 
 LEAVE_OUT = "PARAMS_ONLY"
+CONCURRENCY = {"writes": ["mem:skill-files.{skill_name}.*"]}
 
 DEFAULT_TIMEOUT = 30  # informational; actual value comes from args
 TIMEOUT_HINT = None
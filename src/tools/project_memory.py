@@ -17,6 +17,14 @@ LEAVE_OUT_PER_ACTION = {
     "search_by_regex":  ("SHORT",       500),
 }
 
+CONCURRENCY = {"reads": ["mem:{from_session_key}"], "writes": ["project_memory"]}
+
+CONCURRENCY_PER_ACTION = {
+    "get":              {"reads": ["project_memory"]},
+    "list":             {"reads": ["project_memory"]},
+    "search_by_regex":  {"reads": ["project_memory"]},
+}
+
 DEFINITION: dict = {
     "type": "function",
     "function": {
@@ -4,6 +4,7 @@ import os
 
 
 LEAVE_OUT = "PARAMS_ONLY"
+CONCURRENCY = {"reads": ["fs", "cwd"], "writes": ["mem:{memory_key}"]}
 
 DEFINITION: dict = {
     "type": "function",
@@ -4,6 +4,7 @@ import shutil
 from pathlib import Path
 
 LEAVE_OUT = "PARAMS_ONLY"
+CONCURRENCY = {"reads": ["cwd"], "writes": ["fs"]}
 
 DEFINITION: dict = {
     "type": "function",
@@ -16,6 +16,7 @@ from src.data import get_pool
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 800
+CONCURRENCY = {"reads": []}
 
 DEFAULT_TIMEOUT = 20       # seconds per request
 DEFAULT_MAX_RETRIES = 3    # transient-failure retries
@@ -20,6 +20,8 @@ from python_ripgrep import search as _rg_search
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 600
+CONCURRENCY = {"reads": ["fs", "cwd"]}
+IDEMPOTENT = True
 
 DEFINITION: dict = {
     "type": "function",
@@ -22,6 +22,24 @@ LEAVE_OUT_PER_ACTION = {
     "search_by_regex":  ("SHORT",       500),
 }
 
+CONCURRENCY_PER_ACTION = {
+    "get":              {"reads": ["mem:{key}"]},
+    "list":             {"reads": ["mem:*"]},
+    "extract_json":     {"reads": ["mem:{key}"]},
+    "search_by_regex":  {"reads": ["mem:*"]},
+    "set":              {"writes": ["mem:{key}"]},
+    "delete":           {"writes": ["mem:{key}"]},
+    "append":           {"writes": ["mem:{key}"]},
+    "concat":           {"reads": ["mem:{key_a}", "mem:{key_b}"], "writes": ["mem:{dest_key}"]},
+    "copy":             {"reads": ["mem:{source_key}"], "writes": ["mem:{dest_key}"]},
+    "rename":           {"writes": ["mem:{source_key}", "mem:{dest_key}"]},
+}
+
+IDEMPOTENT_PER_ACTION = {
+    "get": True,
+    "extract_json": True,
+}
+
 DEFINITION: dict = {
     "type": "function",
     "function": {
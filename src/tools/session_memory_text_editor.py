@@ -33,6 +33,17 @@ LEAVE_OUT_PER_ACTION = {
     "apply_patch":         ("KEEP",        0),
 }
 
+CONCURRENCY = {"writes": ["mem:{key}"]}  # module-level fallback for editing actions
+
+CONCURRENCY_PER_ACTION = {
+    "read_lines":          {"reads": ["mem:{key}"]},
+    "read_char_range":     {"reads": ["mem:{key}"]},
+    "count_chars":         {"reads": ["mem:{key}"]},
+    "count_lines":         {"reads": ["mem:{key}"]},
+    "check_eol":           {"reads": ["mem:{key}"]},
+    "check_indentation":   {"reads": ["mem:{key}"]},
+}
+
 DEFINITION: dict = {
     "type": "function",
     "function": {
@@ -4,6 +4,7 @@ import json
 import re
 
 LEAVE_OUT = "KEEP"
+CONCURRENCY = {"writes": ["todo"]}
 
 DEFINITION: dict = {
     "type": "function",
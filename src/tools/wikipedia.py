@@ -13,6 +13,9 @@ from src.utils.exceptions import ToolTimeoutError
 
 LEAVE_OUT = "SHORT"
 TOOL_SHORT_AMOUNT = 1000
+CONCURRENCY = {"reads": []}
+IDEMPOTENT = True
+IDEMPOTENT_TTL_S = 600
 
 DEFAULT_TIMEOUT = 15  # seconds
 
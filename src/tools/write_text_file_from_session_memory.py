@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 LEAVE_OUT = "PARAMS_ONLY"
+CONCURRENCY = {"reads": ["cwd", "mem:{memory_key}"], "writes": ["fs"]}
 
 DEFINITION: dict = {
     "type": "function",
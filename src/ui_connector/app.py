@@ -10,7 +10,17 @@ app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret")
 
 _cors_origin = os.environ.get("CORS_ORIGIN", "http://localhost:5173")
 
-socketio = SocketIO(app, cors_allowed_origins=_cors_origin, async_mode="threading")
+# Set when several processes serve sessions (`slbp server run --connectors N`
+# and/or `--workers N`): every emit goes through this Redis channel, so room
+# broadcasts reach sockets held by any connector process.
+_message_queue = os.environ.get("SLBP_SOCKETIO_MESSAGE_QUEUE") or None
+
+if os.environ.get("SLBP_PROCESS_ROLE") == "turn_worker":
+    # Write-only instance: a worker has no sockets of its own.
+    socketio = SocketIO(message_queue=_message_queue, async_mode="threading")
+else:
+    socketio = SocketIO(app, cors_allowed_origins=_cors_origin, async_mode="threading",
+                        message_queue=_message_queue)
 
 # Import handlers so their @socketio.on decorators register against the
 # socketio instance created above.  Import is deferred here to avoid
@@ -3,6 +3,7 @@ Entry point for the UI connector Flask/SocketIO server.
 """
 
 import os
+import socket
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -16,7 +17,27 @@ sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from src.ui_connector.app import app, socketio  # noqa: E402
 
+
+def _serve_reuseport(port: int) -> None:
+    """
+    Serve on a SO_REUSEPORT socket so several connector processes can listen
+    on the same port; the kernel spreads new connections across them.  The UI
+    only uses the websocket transport, so no sticky sessions are needed.
+    """
+    from werkzeug.serving import make_server
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", port))
+    sock.listen(128)
+    make_server("0.0.0.0", port, app, threaded=True, fd=sock.fileno()).serve_forever()
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("FLASK_PORT", 5000))
-    print(f"[ui_connector] Starting on port {port}")
-    socketio.run(app, host="0.0.0.0", port=port)
+    print(f"[ui_connector] Starting on port {port} (pid {os.getpid()})")
+    if os.environ.get("SLBP_CONNECTOR_REUSEPORT") == "1":
+        _serve_reuseport(port)
+    else:
+        socketio.run(app, host="0.0.0.0", port=port)
@@ -4,7 +4,8 @@ import json
 import os
 import threading
 import time
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 import redis
 from flask import request
@@ -16,23 +17,47 @@ from src.data import get_pool
 
 from src.utils.sql.kv_manager import KVManager
 from src.utils.llm.streaming import StreamingLLM
-from src.utils.llm.factory import load_llm_config
+from src.utils.llm.factory import llm_from_config, load_llm_config
+from src.utils.llm.router import Endpoint, RoutedStreamingLLM, router_stats
+from src.utils.llm.tokens import TokenBudget, learn_context_window
+from src.utils.llm.http_pool import get_endpoint_stats
+from src.utils.llm.payload import (
+    PayloadBuilder,
+    canonical_tool_definitions,
+    record_prompt_cache_usage,
+    with_cache_hints,
+)
+from src.ui_connector.token_frames import TokenFrameBuffer
+from src.ui_connector.speculative_tools import SpeculativeResult, SpeculativeToolRunner
+from src.ui_connector.turn_control import TurnControl, publish_control, request_cancel
+from src.ui_connector.turn_queue import SHARED_CWD, enqueue_turn, queue_stats
 from src.tools import ALL_TOOL_DEFINITIONS, execute_tool, check_needs_approval, _TOOL_MAP, _custom_tool_plugins
 from src.tools.todo_list import format_items_for_ui as _todo_format_items_for_ui
+from src.tools._memory import ensure_session_memory
+from src.tools._result_cache import ToolResultCache
+from src.tools._traits import EXCLUSIVE, Claims, concurrency_claims, is_side_effect_free
 from src.logic.system_prompt import build_system_prompt
-from src.utils.conversation_strip import strip_down_messages
+from src.utils.conversation_strip import STRIP_LEVELS, strip_to_budget, stripped_tool_call_ids
 from src.utils.emitting_kv_manager import EmittingKVManager
-from src.utils.redis_dict import RedisDict
+from src.utils.redis_dict import RedisDict, get_near_cache
 from src.utils.request_error_formatting import format_http_error
 from src.utils.env_info import get_env_context, get_os, get_shell
 from src.utils.session_model import (
     Session, Turn, LLMExchange, ToolCallRecord,
-    session_to_dict, session_from_dict, turn_to_dict, turn_from_dict,
+    turn_to_dict, turn_from_dict,
     CURRENT_SCHEMA_VERSION,
 )
-from src.utils.event_log import log_event, get_events_since, REPLAY_EXCLUDED_EVENTS
+from src.utils.session_store import delete_session, load_session, load_turns, save_session
+from src.utils.event_log import (
+    CONTENT_SNAPSHOT_EVENT,
+    ContentSnapshotEncoder,
+    EventLogWriter,
+    REPLAY_EXCLUDED_EVENTS,
+    iter_event_pages,
+)
 from src.utils.exceptions import ToolHangError, ToolTimeoutError
-from src.utils.docker_compose import get_service_port
+from src.utils.redis_client import get_redis, get_redis_binary
+from src.utils.storage_codec import codec_stats
 from termcolor import colored
 
 SYSTEM_PROMPT = build_system_prompt(
@@ -45,6 +70,24 @@ _initial_cwd: str = os.getcwd()
 _pin_project_memory: bool = os.environ.get("SLBP_PIN_PROJECT_MEMORY", "1") != "0"
 _hotfix_bad_parser: bool = os.environ.get("SLBP_HOTFIX_GPT_OSS_20B_BAD_PARSER") == "1"
 _hotfix_void_call: bool = os.environ.get("SLBP_HOTFIX_GPT_OSS_20B_BAD_VOID_CALL") == "1"
+_speculative_tools: bool = os.environ.get("SLBP_SPECULATIVE_TOOLS", "1") != "0"
+_tool_concurrency: int = max(1, int(os.environ.get("SLBP_TOOL_CONCURRENCY", "4")))
+# > 0: user turns are queued for that many worker processes instead of run here
+_turn_workers: int = int(os.environ.get("SLBP_TURN_WORKERS", "0"))
+# Set when several connector and/or worker processes share sessions (see app.py)
+_multi_process: bool = bool(os.environ.get("SLBP_SOCKETIO_MESSAGE_QUEUE"))
+_token_frame_ms: float = float(os.environ.get("SLBP_TOKEN_FRAME_MS", "16"))
+_token_frame_bytes: int = int(os.environ.get("SLBP_TOKEN_FRAME_BYTES", "2048"))
+# Minimum spacing between replay_content_snapshot writes while a call streams
+_snapshot_interval_s: float = float(os.environ.get("SLBP_SNAPSHOT_INTERVAL_MS", "1000")) / 1000
+# Every Nth replay_content_snapshot of a call carries the full text; the rest are deltas
+_snapshot_keyframe_every: int = int(os.environ.get("SLBP_SNAPSHOT_KEYFRAME_EVERY", "20"))
+# Stream entries per event_replay page sent to a resuming client
+_replay_page_size: int = max(1, int(os.environ.get("SLBP_REPLAY_PAGE_SIZE", "200")))
+# Completed turns sent in full on resume; older ones are headers until get_turn_detail
+_resume_full_turns: int = int(os.environ.get("SLBP_RESUME_FULL_TURNS", "10"))
+# Tool results longer than this reach the UI as a preview until get_tool_result
+_ui_result_max_chars: int = int(os.environ.get("SLBP_UI_RESULT_MAX_CHARS", "2000"))
 
 
 def _get_default_project() -> str:
@@ -64,6 +107,8 @@ if _skills_enabled:
         pass
 
 _builtin_tool_count: int = len(ALL_TOOL_DEFINITIONS) - sum(p["count"] for p in _custom_tool_plugins)
+# Tools list as sent to the LLM: fixed order and key order, so the request prefix is cacheable
+_LLM_TOOL_DEFINITIONS: list[dict] = canonical_tool_definitions(ALL_TOOL_DEFINITIONS)
 
 _startup_tool_calls: list[dict] = []
 if os.environ.get("SLBP_LOAD_STARTUP_TOOL_CALLS") == "1":
@@ -84,9 +129,6 @@ if os.environ.get("SLBP_LOAD_STARTUP_TOOL_CALLS") == "1":
 
 _sid_to_session_id: dict[str, str] = {}
 
-# Maps session_id -> Event; set by handle_cancel_turn to signal the running agentic loop
-_cancel_flags: dict[str, threading.Event] = {}
-
 
 # ---------------------------------------------------------------------------
 # Backend log emitter
@@ -98,9 +140,13 @@ _log_counter_lock = threading.Lock()
 
 def _emit_backend_log(session_id: str, text: str) -> None:
     global _log_counter
-    with _log_counter_lock:
-        _log_counter += 1
-        n = _log_counter
+    if _multi_process:
+        # Log ids key the UI's log list, so they must be unique across processes
+        n = _get_redis().incr("slbp:backend_log_id")
+    else:
+        with _log_counter_lock:
+            _log_counter += 1
+            n = _log_counter
     socketio.emit("backend_log", {"id": n, "text": text}, room=session_id)
 
 
@@ -108,78 +154,86 @@ def _emit_backend_log(session_id: str, text: str) -> None:
 # Event log + emit helper
 # ---------------------------------------------------------------------------
 
-def _emit_and_log(session_id: str, event_type: str, data: dict) -> None:
-    """Emit a socket event to the session room and log it to Redis Streams (if not excluded)."""
+_event_log: EventLogWriter | None = None
+_event_log_lock = threading.Lock()
+
+
+def _get_event_log() -> EventLogWriter:
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            # Several processes: the one resuming a client cannot flush the
+            # buffer of the one running the turn, so nothing is held back
+            _event_log = EventLogWriter(_get_redis(), write_through=_multi_process)
+        return _event_log
+
+
+def _emit_and_log(session_id: str, event_type: str, data: dict) -> str | None:
+    """
+    Emit a socket event to the session room and log it to Redis Streams (if not excluded).
+    Returns the event's stream ID, or None if it was not logged.
+    """
+    event_id = None
     if event_type not in REPLAY_EXCLUDED_EVENTS:
         try:
-            r = _get_redis()
-            event_id = log_event(r, session_id, event_type, data)
+            event_id = _get_event_log().log(session_id, event_type, data)
             data = {**data, "event_id": event_id}
         except Exception as exc:
             print(f"[event_log] Failed to log event {event_type!r}: {exc}", flush=True)
     socketio.emit(event_type, data, room=session_id)
+    return event_id
 
 
 # ---------------------------------------------------------------------------
 # Approval gate
 # ---------------------------------------------------------------------------
 
-# Maps socket session ID to {"event": threading.Event, "approved": bool | None}
-_pending_approvals: dict[str, dict] = {}
-
 _APPROVAL_TIMEOUT = 60  # seconds
 
 
-def _request_approval(sid: str, session_id: str, tool_id: str, tool_name: str, args: dict, turn_id: str = "") -> bool:
+def _request_approval(
+    control: TurnControl, session_id: str, tool_id: str, tool_name: str, args: dict, turn_id: str = "",
+) -> bool:
     """
     Emit an approval_request event and block until approved, denied, or timed out.
-    Returns True if approved, False otherwise.
+    The answer arrives through the turn's TurnControl from whichever process
+    holds the answering socket.  Returns True if approved, False otherwise.
     """
-    ev = threading.Event()
-    _pending_approvals[sid] = {"event": ev, "approved": None, "turn_id": turn_id}
-    _emit_and_log(session_id, "approval_request", {"id": tool_id, "tool_name": tool_name, "args": args, "turn_id": turn_id})
-    timed_out = not ev.wait(timeout=_APPROVAL_TIMEOUT)
-    entry = _pending_approvals.pop(sid, {})
-    if timed_out:
+    approved = control.request_approval(
+        tool_id,
+        lambda: _emit_and_log(session_id, "approval_request", {
+            "id": tool_id, "tool_name": tool_name, "args": args, "turn_id": turn_id,
+        }),
+        timeout=_APPROVAL_TIMEOUT,
+    )
+    if approved is None:
         _emit_and_log(session_id, "approval_timeout", {"id": tool_id, "tool_name": tool_name, "turn_id": turn_id})
         return False
-    return bool(entry.get("approved", False))
+    _emit_and_log(session_id, "approval_resolved", {"id": tool_id, "approved": approved, "turn_id": turn_id})
+    return approved
 
 
 # ---------------------------------------------------------------------------
 # Redis helpers
 # ---------------------------------------------------------------------------
 
-_redis_client: redis.Redis | None = None
-
 def _get_redis() -> redis.Redis:
-    global _redis_client
-    if _redis_client is None:
-        _redis_client = redis.Redis(
-            host=os.environ.get("REDIS_HOST", "127.0.0.1"),
-            port=get_service_port("redis", 6379),
-            decode_responses=True,
-        )
-    return _redis_client
+    return get_redis()
 
 
 _SESSION_TTL = 3600
 
 
-def _load_session(session_id: str) -> Session:
+def _load_session(session_id: str, hydrate: bool = False) -> Session:
+    """
+    Completed turns are loaded as condensed summaries unless hydrate is set
+    (only the UI needs their exchanges; the LLM payload uses the summaries).
+    """
     r = _get_redis()
-    raw = r.get(f"session:{session_id}")
-    if raw:
-        try:
-            d = json.loads(raw)
-            if d.get("schema_version", 0) != CURRENT_SCHEMA_VERSION:
-                # Schema mismatch — start fresh
-                session = Session(session_id=session_id)
-            else:
-                session = session_from_dict(d)
-        except Exception:
-            session = Session(session_id=session_id)
-    else:
+    try:
+        session = load_session(get_redis_binary(), session_id, _SESSION_TTL, hydrate=hydrate)
+    except Exception as exc:
+        print(f"[ui_connector] Failed to load session {session_id}: {exc}", flush=True)
         session = Session(session_id=session_id)
 
     mem_hash_key = f"session:{session_id}:memory"
@@ -192,24 +246,19 @@ def _load_session(session_id: str) -> Session:
         except Exception as exc:
             print(f"[session_memory] _on_memory_change error (key={key!r}, session_id={session_id!r}): {exc}", flush=True)
 
-    session.session_data["memory"] = RedisDict(r, mem_hash_key, on_change=_on_memory_change)
+    session.session_data["memory"] = RedisDict(
+        r, mem_hash_key, on_change=_on_memory_change, near_cache=get_near_cache(r)
+    )
     return session
 
 
 def _save_session(session_id: str, session: Session) -> None:
-    r = _get_redis()
-    blob = session_to_dict(session)
-    r.setex(f"session:{session_id}", _SESSION_TTL, json.dumps(blob))
-    r.expire(f"session:{session_id}:memory", _SESSION_TTL)
-    r.expire(f"session:{session_id}:events", _SESSION_TTL)
+    save_session(get_redis_binary(), session_id, session, _SESSION_TTL)
 
 
 def _delete_session(session_id: str) -> None:
     """Only called from CLI/test utilities, not from handle_disconnect."""
-    r = _get_redis()
-    r.delete(f"session:{session_id}")
-    r.delete(f"session:{session_id}:memory")
-    r.delete(f"session:{session_id}:events")
+    delete_session(get_redis_binary(), session_id)
 
 
 # ---------------------------------------------------------------------------
@@ -221,20 +270,6 @@ def _load_llm_config() -> dict | None:
     return load_llm_config()
 
 
-# ---------------------------------------------------------------------------
-# Payload construction
-# ---------------------------------------------------------------------------
-
-def _build_llm_payload(session: Session, current_turn: Turn) -> list[dict]:
-    """Assemble the message list actually sent to the LLM endpoint."""
-    messages: list[dict] = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for turn in session.completed_turns:
-        messages.append({"role": "user", "content": turn.condensed_user})
-        messages.append({"role": "assistant", "content": turn.condensed_assistant})
-    messages.extend(current_turn.to_messages())
-    return messages
-
-
 # ---------------------------------------------------------------------------
 # Context-limit / timeout detection helpers
 # ---------------------------------------------------------------------------
@@ -280,54 +315,93 @@ def _is_retryable_error(exc: Exception) -> bool:
 # ---------------------------------------------------------------------------
 
 def _run_llm_call(
-    streaming_llm: StreamingLLM,
+    streaming_llm: StreamingLLM | RoutedStreamingLLM,
     payload: list[dict],
     session_id: str,
     turn_id: str,
     exchange_idx: int,
     is_cancelled: Any = None,
+    speculation: SpeculativeToolRunner | None = None,
+    cache_hints: bool = False,
+    builder: PayloadBuilder | None = None,
 ) -> tuple[object, str, str]:
     """
     Run one LLM call (streaming or non-streaming) and emit token events.
+    Tool calls that complete mid-stream are offered to speculation, if given.
+    cache_hints adds prompt-cache breakpoints to the outgoing messages.
+    builder, if given, pre-serializes them (reusing the encoding of every
+    message it has sent before).
     Returns (result, content_for_history, reasoning_accumulated).
     Raises on HTTP/network errors.
     """
-    acc: dict[str, str] = {"content": "", "reasoning": ""}
-    token_count = 0
+    last_snapshot = time.monotonic()
+    snapshots = ContentSnapshotEncoder(_snapshot_keyframe_every)
+
+    def emit_frame(kind: str, text: str) -> None:
+        socketio.emit("token", {
+            "type": kind, "text": text,
+            "turn_id": turn_id,
+        }, room=session_id)
+
+    def on_flush(frames: TokenFrameBuffer) -> None:
+        # Runs right after a frame is emitted, so the snapshot never gets ahead
+        # of what live clients have received (a reconnecting client resumes
+        # from the snapshot and then appends subsequent token frames).
+        nonlocal last_snapshot
+        now = time.monotonic()
+        if now - last_snapshot >= _snapshot_interval_s:
+            last_snapshot = now
+            _emit_content_snapshot(session_id, turn_id, exchange_idx, snapshots,
+                                   frames.text("content"), frames.text("reasoning"))
+
+    frames = TokenFrameBuffer(emit_frame, _token_frame_ms, _token_frame_bytes, on_flush=on_flush)
 
     def on_data(chunk: dict) -> None:
-        nonlocal token_count
         if chunk.get("reasoning"):
-            acc["reasoning"] += chunk["reasoning"]
-            socketio.emit("token", {
-                "type": "reasoning", "text": chunk["reasoning"],
-                "turn_id": turn_id,
-            }, room=session_id)
+            frames.push("reasoning", chunk["reasoning"])
         if chunk.get("content"):
-            acc["content"] += chunk["content"]
-            socketio.emit("token", {
-                "type": "content", "text": chunk["content"],
-                "turn_id": turn_id,
-            }, room=session_id)
-            token_count += 1
-            if token_count % 50 == 0:
-                _emit_content_snapshot(session_id, turn_id, exchange_idx, acc["content"], acc["reasoning"])
+            frames.push("content", chunk["content"])
 
-    result = streaming_llm.stream(payload, on_data, tools=ALL_TOOL_DEFINITIONS, is_cancelled=is_cancelled)
-    _emit_content_snapshot(session_id, turn_id, exchange_idx, acc["content"], acc["reasoning"])
-    return result, acc["content"], acc["reasoning"]
+    messages = payload
+    if cache_hints:
+        messages = builder.with_cache_hints(payload) if builder is not None else with_cache_hints(payload)
+    if builder is not None:
+        messages = builder.encode(messages)
+
+    try:
+        result = streaming_llm.stream(
+            messages, on_data,
+            tools=_LLM_TOOL_DEFINITIONS, is_cancelled=is_cancelled,
+            on_tool_call_start=frames.flush,
+            on_tool_call_ready=speculation.offer if speculation is not None else None,
+        )
+    finally:
+        frames.close()
+    content, reasoning = frames.text("content"), frames.text("reasoning")
+    _emit_content_snapshot(session_id, turn_id, exchange_idx, snapshots, content, reasoning)
+
+    stats = frames.stats()
+    if stats["frames"]:
+        _emit_backend_log(
+            session_id,
+            f"Token frames: {stats['frames']} frames / {stats['deltas']} deltas in {stats['seconds']:.1f}s "
+            f"({stats['frames_per_s']:.1f} frames/s, {stats['bytes_per_s'] / 1024:.1f} KB/s)",
+        )
+    return result, content, reasoning
 
 
 def _emit_content_snapshot(
-    session_id: str, turn_id: str, exchange_idx: int,
+    session_id: str, turn_id: str, exchange_idx: int, snapshots: ContentSnapshotEncoder,
     assistant_content: str, reasoning: str,
 ) -> None:
-    """Emit a replay_content_snapshot event (logged to Redis Streams for replay)."""
-    _emit_and_log(session_id, "replay_content_snapshot", {
+    """
+    Emit a replay_content_snapshot event (logged to Redis Streams for replay).
+    Only keyframes carry the full text; replay rebuilds it from deltas.
+    """
+    _emit_and_log(session_id, CONTENT_SNAPSHOT_EVENT, {
         "turn_id": turn_id,
         "exchange_idx": exchange_idx,
-        "assistant_content": assistant_content,
-        "reasoning": reasoning,
+        **snapshots.encode(assistant_content, reasoning),
     })
 
 
@@ -336,50 +410,103 @@ def _emit_content_snapshot(
 # ---------------------------------------------------------------------------
 
 def _run_llm_call_with_retry(
-    streaming_llm: StreamingLLM,
+    streaming_llm: StreamingLLM | RoutedStreamingLLM,
     payload: list[dict],
     session_id: str,
     turn_id: str,
     exchange_idx: int,
     assistant_truncation_chars: int | None = None,
     is_cancelled: Any = None,
+    speculation: SpeculativeToolRunner | None = None,
+    cache_hints: bool = False,
+    budget: TokenBudget | None = None,
+    current_turn_start: int | None = None,
+    builder: PayloadBuilder | None = None,
+    result_cache: ToolResultCache | None = None,
 ) -> tuple[object, str, str]:
     """
     Run an LLM call; on timeout or context-limit error, strip the payload
-    and retry once.
+    one ladder level further than before and retry once.
+    If a token budget is given and the payload is estimated not to fit the
+    model's context window, it is stripped (escalating through the ladder
+    levels until it fits) before the first attempt.
+    Results stripped from the payload are dropped from result_cache, so
+    repeats of those calls run again instead of referring to them.
     Returns (result, content_for_history, reasoning).
     """
+    original = payload
+    applied = 0
+    if budget is not None:
+        payload, level = strip_to_budget(
+            original, _TOOL_MAP, budget,
+            assistant_truncation_chars=assistant_truncation_chars,
+            current_turn_start=current_turn_start,
+        )
+        if level is not None:
+            applied = STRIP_LEVELS.index(level) + 1
+            _emit_backend_log(
+                session_id,
+                colored(
+                    f"Pre-flight: ~{budget.estimate(original)} prompt tokens > budget {budget.limit}, "
+                    f"stripped context ({level}) to ~{budget.estimate(payload)}", "yellow",
+                )
+            )
+            if result_cache is not None:
+                result_cache.discard(stripped_tool_call_ids(original, payload))
+
     try:
-        return _run_llm_call(streaming_llm, payload, session_id, turn_id, exchange_idx, is_cancelled=is_cancelled)
+        return _run_llm_call(
+            streaming_llm, payload, session_id, turn_id, exchange_idx,
+            is_cancelled=is_cancelled, speculation=speculation, cache_hints=cache_hints,
+            builder=builder,
+        )
     except Exception as exc:
         if not _is_retryable_error(exc):
             raise
 
         reason = "timeout" if _is_timeout_error(exc) else "context limit exceeded"
+        if budget is not None and _is_context_limit_error(exc):
+            learn_context_window(budget.model, exc.response.text)
+
+        stripped, level = strip_to_budget(
+            original, _TOOL_MAP, budget,
+            assistant_truncation_chars=assistant_truncation_chars,
+            current_turn_start=current_turn_start,
+            min_level=min(applied + 1, len(STRIP_LEVELS)),
+        )
         _emit_backend_log(
             session_id,
-            colored(f"LLM call failed ({reason}), retrying with stripped context…", "yellow")
+            colored(f"LLM call failed ({reason}), retrying with stripped context ({level})…", "yellow")
         )
-
-        stripped = strip_down_messages(
-            payload, _TOOL_MAP,
-            assistant_truncation_chars=assistant_truncation_chars,
+        if speculation is not None:
+            speculation.reset()
+        if result_cache is not None:
+            result_cache.discard(stripped_tool_call_ids(original, stripped))
+        if budget is not None:
+            budget.estimate(stripped)
+        return _run_llm_call(
+            streaming_llm, stripped, session_id, turn_id, exchange_idx,
+            is_cancelled=is_cancelled, speculation=speculation, cache_hints=cache_hints,
+            builder=builder,
         )
-        return _run_llm_call(streaming_llm, stripped, session_id, turn_id, exchange_idx, is_cancelled=is_cancelled)
 
 
 # ---------------------------------------------------------------------------
 # Tool execution
 # ---------------------------------------------------------------------------
 
-def _stub_tool_result(full_result: str, max_chars: int, session_data: dict) -> str:
+def _new_stub_key(memory: dict, taken: Any = ()) -> str:
     import secrets
-    memory = session_data.get("memory", {})
     while True:
-        code = secrets.token_hex(4)
-        key = f"stubs.{code}"
-        if key not in memory:
-            break
+        key = f"stubs.{secrets.token_hex(4)}"
+        if key not in taken and key not in memory:
+            return key
+
+
+def _stub_tool_result(full_result: str, max_chars: int, session_data: dict, key: str | None = None) -> str:
+    memory = session_data.get("memory", {})
+    if key is None:
+        key = _new_stub_key(memory)
     memory[key] = full_result
     total = len(full_result)
     overflow = total - max_chars
@@ -392,19 +519,130 @@ def _stub_tool_result(full_result: str, max_chars: int, session_data: dict) -> s
     )
 
 
+def _normalize_tool_call(tc: Any) -> None:
+    """Apply the enabled model hotfixes to one tool call, in place."""
+    if _hotfix_bad_parser and "<|channel|>" in tc.name:
+        clean = tc.name.split("<|channel|>")[0]
+        if clean in _TOOL_MAP:
+            tc.name = clean
+    if _hotfix_void_call:
+        module = _TOOL_MAP.get(tc.name)
+        if module is not None:
+            props = getattr(module, "DEFINITION", {}).get("function", {}).get("parameters", {}).get("properties")
+            if not props and tc.arguments:
+                tc.arguments = {}
+
+
+def _make_speculation(
+    session: Session, session_id: str, result_cache: ToolResultCache | None = None,
+) -> SpeculativeToolRunner | None:
+    """
+    Build the runner that starts side-effect-free, approval-free tool calls
+    while the LLM response is still streaming (None when disabled).
+    """
+    if not _speculative_tools:
+        return None
+    special_resources = {
+        "emitting_kv_manager": EmittingKVManager(get_pool(), socketio, session_id),
+        "on_log": lambda msg: _emit_backend_log(session_id, msg),
+    }
+
+    def is_eligible(tc: Any) -> bool:
+        _normalize_tool_call(tc)
+        module = _TOOL_MAP.get(tc.name)
+        if module is None or getattr(module, "STREAMS_RESULT", False):
+            return False
+        return is_side_effect_free(module, tc.arguments) and not check_needs_approval(tc.name, tc.arguments)
+
+    def run(tc: Any) -> str:
+        session.session_data["__pinned_project__"] = _initial_cwd if _pin_project_memory else None
+        return execute_tool(tc.name, tc.arguments, session.session_data, special_resources,
+                            result_cache=result_cache, call_id=tc.id)
+
+    return SpeculativeToolRunner(is_eligible, run)
+
+
+def _plan_tool_waves(tool_calls: list, stub_keys: dict[int, str] | None = None) -> list[list[int]]:
+    """
+    Split tool calls (by position) into waves of consecutive calls whose
+    declared resource claims do not conflict, so each wave can run at once
+    without changing the outcome of running the calls in order.  Calls that
+    need approval or stream their result always get a wave to themselves.
+    stub_keys (position -> session memory key) are the keys long results
+    will be stubbed to; each call also claims a write of its key.
+    """
+    waves: list[list[int]] = []
+    current: list[int] = []
+    current_claims: list[Claims] = []
+    for position, tc in enumerate(tool_calls):
+        module = _TOOL_MAP.get(tc.name)
+        if (
+            _tool_concurrency <= 1 or module is None
+            or getattr(module, "STREAMS_RESULT", False)
+            or check_needs_approval(tc.name, tc.arguments)
+        ):
+            claims = EXCLUSIVE
+        else:
+            claims = concurrency_claims(module, tc.arguments)
+            if stub_keys is not None:
+                claims = Claims(claims.reads, claims.writes | {f"mem:{stub_keys[position]}"})
+        if current and any(claims.conflicts_with(other) for other in current_claims):
+            waves.append(current)
+            current, current_claims = [], []
+        current.append(position)
+        current_claims.append(claims)
+    if current:
+        waves.append(current)
+    return waves
+
+
+def _run_tool_call(
+    tc: Any,
+    session: Session,
+    session_id: str,
+    turn_id: str,
+    special_resources: dict,
+    result_cache: ToolResultCache | None = None,
+) -> tuple[str, int]:
+    """Execute one tool call (on any thread); returns (result, finished_at ms)."""
+    resources = dict(special_resources)
+    # Inject streaming callback into special_resources if the tool supports it
+    if getattr(_TOOL_MAP.get(tc.name), "STREAMS_RESULT", False):
+        def _on_chunk(chunk: str, _id: str = tc.id) -> None:
+            socketio.emit("tool_result_chunk", {
+                "id": _id, "chunk": chunk, "turn_id": turn_id,
+            }, room=session_id)
+        resources["on_chunk"] = _on_chunk
+    try:
+        tool_result = execute_tool(tc.name, tc.arguments, session.session_data, resources,
+                                   result_cache=result_cache, call_id=tc.id)
+    except ToolHangError as e:
+        tool_result = f"HANG: {e}"
+    except ToolTimeoutError as e:
+        tool_result = f"TIMEOUT: {e}"
+    return tool_result, int(time.time() * 1000)
+
+
 def _execute_tools(
     result: Any,
     content_for_history: str,
     session: Session,
-    sid: str,
+    request_approval: Callable[[str, str, dict, str], bool],
     session_id: str,
     current_turn: Turn,
     return_value_max_chars: int | None = None,
+    speculation: SpeculativeToolRunner | None = None,
+    result_cache: ToolResultCache | None = None,
 ) -> tuple[bool, str | None, LLMExchange]:
     """
     Execute all tool calls in result, emit events, and build an LLMExchange record.
+    Consecutive calls with non-conflicting concurrency claims run at the same
+    time on up to _tool_concurrency threads; records and events keep call order.
+    Calls already run by speculation while the response streamed reuse that result.
+    Repeats of idempotent calls are answered from result_cache, if given.
+    request_approval(tool_id, tool_name, args, turn_id) gates calls that need approval.
     Returns (was_impossible, reason_or_none, exchange).
-    Always pops _report_impossible from session_data before returning.
+    Always pops _report_impossible from session_data and closes speculation before returning.
     """
     special_resources = {
         "emitting_kv_manager": EmittingKVManager(get_pool(), socketio, session_id),
@@ -412,19 +650,8 @@ def _execute_tools(
     }
     turn_id = current_turn.id
 
-    if _hotfix_bad_parser:
-        for tc in result.tool_calls:
-            if "<|channel|>" in tc.name:
-                clean = tc.name.split("<|channel|>")[0]
-                if clean in _TOOL_MAP:
-                    tc.name = clean
-    if _hotfix_void_call:
-        for tc in result.tool_calls:
-            module = _TOOL_MAP.get(tc.name)
-            if module is not None:
-                props = getattr(module, "DEFINITION", {}).get("function", {}).get("parameters", {}).get("properties")
-                if not props and tc.arguments:
-                    tc.arguments = {}
+    for tc in result.tool_calls:
+        _normalize_tool_call(tc)
 
     exchange = LLMExchange(
         assistant_content=content_for_history,
@@ -435,76 +662,102 @@ def _execute_tools(
     reason: str | None = None
 
     try:
-        for tc in result.tool_calls:
-            _emit_and_log(session_id, "tool_call", {
-                "id": tc.id, "name": tc.name, "args": tc.arguments,
-                "turn_id": turn_id,
-            })
-
-            tool_record = ToolCallRecord(id=tc.id, name=tc.name, args=tc.arguments)
+        # Independent calls run together in waves of consecutive, non-conflicting
+        # calls.  Events are emitted from this thread in call order: every
+        # tool_call of a wave, then every tool_call_start, then each tool_result
+        # as soon as it and all calls before it have finished.
+        ensure_session_memory(session.session_data)
+        session.session_data["__pinned_project__"] = _initial_cwd if _pin_project_memory else None
+        # Keys for stubbing long results are picked up front, so the waves
+        # account for the write (a later call listing session memory would
+        # see it when run in order)
+        stub_keys: dict[int, str] | None = None
+        if return_value_max_chars is not None:
+            stub_keys = {}
+            for position in range(len(result.tool_calls)):
+                stub_keys[position] = _new_stub_key(session.session_data["memory"], stub_keys.values())
+        with ThreadPoolExecutor(max_workers=_tool_concurrency, thread_name_prefix="tool") as pool:
+            for wave in _plan_tool_waves(result.tool_calls, stub_keys):
+                pending: list[tuple[Any, ToolCallRecord, SpeculativeResult | None]] = []
+                for position in wave:
+                    tc = result.tool_calls[position]
+                    _emit_and_log(session_id, "tool_call", {
+                        "id": tc.id, "name": tc.name, "args": tc.arguments,
+                        "turn_id": turn_id,
+                    })
 
-            if check_needs_approval(tc.name, tc.arguments):
-                approved = _request_approval(sid, session_id, tc.id, tc.name, tc.arguments, turn_id=turn_id)
-                if not approved:
-                    denial = "DENIED: User did not approve this action."
-                    tool_record.result = denial
+                    tool_record = ToolCallRecord(id=tc.id, name=tc.name, args=tc.arguments)
+
+                    try:
+                        speculated = speculation.take(position, tc) if speculation is not None else None
+                    except ToolHangError as e:
+                        speculated = SpeculativeResult(tc, f"HANG: {e}", int(time.time() * 1000), int(time.time() * 1000))
+                    except ToolTimeoutError as e:
+                        speculated = SpeculativeResult(tc, f"TIMEOUT: {e}", int(time.time() * 1000), int(time.time() * 1000))
+
+                    if speculated is None and check_needs_approval(tc.name, tc.arguments):
+                        approved = request_approval(tc.id, tc.name, tc.arguments, turn_id)
+                        if not approved:
+                            denial = "DENIED: User did not approve this action."
+                            tool_record.result = denial
+                            exchange.tool_calls.append(tool_record)
+                            _emit_and_log(session_id, "tool_result", {
+                                "id": tc.id, "result": denial, "turn_id": turn_id,
+                            })
+                            reason = f"User denied approval to run '{tc.name}'."
+                            session.session_data["_report_impossible"] = reason
+                            was_impossible = True
+                            return was_impossible, reason, exchange
+
+                    pending.append((tc, tool_record, speculated))
+
+                inline = len(pending) == 1
+                futures = []
+                for tc, tool_record, speculated in pending:
+                    started_at = speculated.started_at if speculated is not None else int(time.time() * 1000)
+                    tool_record.started_at = started_at
+                    _emit_and_log(session_id, "tool_call_start", {
+                        "id": tc.id, "turn_id": turn_id, "started_at": started_at,
+                    })
+                    if speculated is not None:
+                        futures.append(None)
+                    elif inline:
+                        futures.append(_run_tool_call(tc, session, session_id, turn_id, special_resources,
+                                                      result_cache))
+                    else:
+                        futures.append(pool.submit(_run_tool_call, tc, session, session_id, turn_id,
+                                                   special_resources, result_cache))
+
+                for position, (tc, tool_record, speculated), future in zip(wave, pending, futures):
+                    if speculated is not None:
+                        tool_result, finished_at = speculated.result, speculated.finished_at
+                    elif inline:
+                        tool_result, finished_at = future
+                    else:
+                        tool_result, finished_at = future.result()
+                    tool_record.finished_at = finished_at
+
+                    if return_value_max_chars is not None and len(tool_result) > return_value_max_chars:
+                        tool_result = _stub_tool_result(tool_result, return_value_max_chars, session.session_data,
+                                                        key=stub_keys[position])
+                        tool_record.was_stubbed = True
+
+                    tool_record.result = tool_result
                     exchange.tool_calls.append(tool_record)
+                    if result_cache is not None:
+                        result_cache.confirm(tc.id)
+
                     _emit_and_log(session_id, "tool_result", {
-                        "id": tc.id, "result": denial, "turn_id": turn_id,
+                        "id": tc.id, "result": tool_result, "turn_id": turn_id,
+                        "started_at": tool_record.started_at, "finished_at": finished_at,
                     })
-                    reason = f"User denied approval to run '{tc.name}'."
-                    session.session_data["_report_impossible"] = reason
-                    was_impossible = True
-                    return was_impossible, reason, exchange
-
-            # Inject streaming callback into special_resources if the tool supports it
-            module = _TOOL_MAP.get(tc.name)
-            if getattr(module, "STREAMS_RESULT", False):
-                _tc_id = tc.id
-                def _on_chunk(chunk: str, _id: str = _tc_id) -> None:
-                    socketio.emit("tool_result_chunk", {
-                        "id": _id, "chunk": chunk, "turn_id": turn_id,
-                    }, room=session_id)
-                special_resources["on_chunk"] = _on_chunk
-            else:
-                special_resources.pop("on_chunk", None)
-
-            started_at = int(time.time() * 1000)
-            tool_record.started_at = started_at
-            _emit_and_log(session_id, "tool_call_start", {
-                "id": tc.id, "turn_id": turn_id, "started_at": started_at,
-            })
-
-            session.session_data["__pinned_project__"] = _initial_cwd if _pin_project_memory else None
-            try:
-                tool_result = execute_tool(tc.name, tc.arguments, session.session_data, special_resources)
-            except ToolHangError as e:
-                tool_result = f"HANG: {e}"
-            except ToolTimeoutError as e:
-                tool_result = f"TIMEOUT: {e}"
-
-            finished_at = int(time.time() * 1000)
-            tool_record.finished_at = finished_at
-            special_resources.pop("on_chunk", None)
-
-            if return_value_max_chars is not None and len(tool_result) > return_value_max_chars:
-                tool_result = _stub_tool_result(tool_result, return_value_max_chars, session.session_data)
-                tool_record.was_stubbed = True
-
-            tool_record.result = tool_result
-            exchange.tool_calls.append(tool_record)
-
-            _emit_and_log(session_id, "tool_result", {
-                "id": tc.id, "result": tool_result, "turn_id": turn_id,
-                "started_at": started_at, "finished_at": finished_at,
-            })
-            if tc.name == "change_pwd":
-                _emit_and_log(session_id, "pwd_update", {"path": os.getcwd().replace("\\", "/")})
-            if tc.name == "todo_list":
-                _raw = session.session_data.get("todo_list") or []
-                _emit_and_log(session_id, "todo_list_update", {
-                    "items": _todo_format_items_for_ui(_raw), "turn_id": turn_id,
-                })
+                    if tc.name == "change_pwd":
+                        _emit_and_log(session_id, "pwd_update", {"path": os.getcwd().replace("\\", "/")})
+                    if tc.name == "todo_list":
+                        _raw = session.session_data.get("todo_list") or []
+                        _emit_and_log(session_id, "todo_list_update", {
+                            "items": _todo_format_items_for_ui(_raw), "turn_id": turn_id,
+                        })
 
         if session.session_data.get("_report_impossible"):
             reason = session.session_data.get("_report_impossible")
@@ -514,6 +767,8 @@ def _execute_tools(
 
     finally:
         session.session_data.pop("_report_impossible", None)
+        if speculation is not None:
+            speculation.close()
 
 
 # ---------------------------------------------------------------------------
@@ -536,6 +791,41 @@ def _get_open_items(todo_list: list) -> list[str]:
     return result
 
 
+# ---------------------------------------------------------------------------
+# Turns as sent to the UI
+# ---------------------------------------------------------------------------
+
+_UI_RESULT_PREVIEW_CHARS = 200
+
+
+def _turn_header(turn: Turn) -> dict:
+    """A completed turn without its exchanges; the UI asks for the rest with get_turn_detail."""
+    return {
+        "id": turn.id,
+        "user_text": turn.user_text,
+        "todo_snapshot": turn.todo_snapshot,
+        "was_impossible": turn.was_impossible,
+        "impossible_reason": turn.impossible_reason,
+        "was_cancelled": turn.was_cancelled,
+        "completed": turn.completed,
+        "exchanges": [],
+        "detail": False,
+    }
+
+
+def _turn_for_ui(turn: Turn) -> dict:
+    """turn_to_dict, with long tool results cut to a preview (fetched whole with get_tool_result)."""
+    d = turn_to_dict(turn)
+    for ex in d["exchanges"]:
+        for tc in ex["tool_calls"]:
+            result = tc.get("result")
+            if result is not None and len(result) > _ui_result_max_chars:
+                tc["result"] = result[:_UI_RESULT_PREVIEW_CHARS]
+                tc["result_size"] = len(result)
+                tc["result_elided"] = True
+    return d
+
+
 # ---------------------------------------------------------------------------
 # Socket event handlers
 # ---------------------------------------------------------------------------
@@ -574,22 +864,61 @@ def handle_resume_session(data: dict):
         emit("session_state", {"schemaInvalid": True})
         return
 
-    completed_turns_data = [turn_to_dict(t) for t in session.completed_turns]
-    current_turn_data = turn_to_dict(session.current_turn) if session.current_turn else None
+    # Only the most recent turns go out in full; the rest are headers
+    n_full = min(_resume_full_turns, len(session.completed_turns))
+    older = session.completed_turns[:len(session.completed_turns) - n_full]
+    recent = session.completed_turns[len(older):]
+    recent_full = load_turns(get_redis_binary(), session_id, [t.id for t in recent]) if recent else []
+    completed_turns_data = [_turn_header(t) for t in older] + [
+        _turn_for_ui(full) if full is not None else _turn_header(t) for t, full in zip(recent, recent_full)
+    ]
+    current_turn_data = _turn_for_ui(session.current_turn) if session.current_turn else None
     emit("session_state", {
         "startupDone": session.startup_done,
         "completedTurns": completed_turns_data,
         "currentTurn": current_turn_data,
     })
 
-    # Always emit event_replay (even if empty) — frontend uses it as the "restore done" signal
+    # Replay in bounded pages; the client resumes from each page's cursor if
+    # the connection drops meanwhile.  A final event_replay with done=True is
+    # always emitted (even if nothing was replayed).
+    cursor = last_event_id
     try:
-        r = _get_redis()
-        events = get_events_since(r, session_id, last_event_id)
+        _get_event_log().flush(session_id)
+        for events, cursor in iter_event_pages(get_redis_binary(), session_id, last_event_id, _replay_page_size):
+            emit("event_replay", {"events": events, "cursor": cursor, "done": False})
     except Exception as exc:
         print(f"[ui_connector] Event replay error for session {session_id}: {exc}", flush=True)
-        events = []
-    emit("event_replay", {"events": events})
+    emit("event_replay", {"events": [], "cursor": cursor, "done": True})
+
+
+@socketio.on("get_turn_detail")
+def handle_get_turn_detail(data: dict):
+    """Send one turn in full (with long tool results as previews) to the requesting client."""
+    session_id = _sid_to_session_id.get(request.sid)
+    turn_id = (data or {}).get("turnId")
+    if not session_id or not turn_id:
+        return
+    turn = load_turns(get_redis_binary(), session_id, [turn_id])[0]
+    if turn is None:
+        emit("turn_detail", {"turn_id": turn_id, "turn": None})
+        return
+    emit("turn_detail", {"turn_id": turn_id, "turn": _turn_for_ui(turn)})
+
+
+@socketio.on("get_tool_result")
+def handle_get_tool_result(data: dict):
+    """Send the whole result of one tool call whose result the UI only has a preview of."""
+    session_id = _sid_to_session_id.get(request.sid)
+    turn_id = (data or {}).get("turnId")
+    tool_id = (data or {}).get("toolId")
+    if not session_id or not turn_id or not tool_id:
+        return
+    turn = load_turns(get_redis_binary(), session_id, [turn_id])[0]
+    result = None
+    if turn is not None:
+        result = next((tc.result for ex in turn.exchanges for tc in ex.tool_calls if tc.id == tool_id), None)
+    emit("tool_result_detail", {"turn_id": turn_id, "id": tool_id, "result": result})
 
 
 @socketio.on("disconnect")
@@ -597,23 +926,19 @@ def handle_disconnect():
     sid = request.sid
     session_id = _sid_to_session_id.pop(sid, None)
     print(f"[ui_connector] Client disconnected: {sid} (session={session_id})", flush=True)
-    # Release any pending approval for this SID
-    pending = _pending_approvals.pop(sid, None)
-    if pending and not pending["event"].is_set():
-        pending["approved"] = False
-        pending["event"].set()
+    # Release any approval the turn started from this SID is waiting on
+    if session_id:
+        publish_control(_get_redis(), session_id, {"type": "disconnect", "sid": sid})
     # Do NOT delete the session — it persists for reconnect
 
 
 @socketio.on("cancel_turn")
-def handle_cancel_turn():
+def handle_cancel_turn(data: dict | None = None):
     sid = request.sid
     session_id = _sid_to_session_id.get(sid)
     if not session_id:
         return
-    flag = _cancel_flags.get(session_id)
-    if flag:
-        flag.set()
+    request_cancel(_get_redis(), session_id, (data or {}).get("turnId"))
     print(f"[ui_connector] Cancel requested for session {session_id}", flush=True)
 
 
@@ -621,7 +946,8 @@ def handle_cancel_turn():
 def handle_get_pwd():
     sid = request.sid
     session_id = _sid_to_session_id.get(sid, sid)
-    socketio.emit("pwd_update", {"path": os.getcwd().replace("\\", "/")}, room=session_id)
+    cwd = _restore_shared_cwd(_get_redis()) if _multi_process else os.getcwd()
+    socketio.emit("pwd_update", {"path": cwd.replace("\\", "/")}, room=session_id)
 
 
 @socketio.on("get_skills_info")
@@ -717,11 +1043,7 @@ def handle_approval_response(data: dict):
     session_id = _sid_to_session_id.get(sid, sid)
     tool_id = data.get("id")
     approved = bool(data.get("approved"))
-    pending = _pending_approvals.get(sid)
-    if pending:
-        pending["approved"] = approved
-        _emit_and_log(session_id, "approval_resolved", {"id": tool_id, "approved": approved, "turn_id": pending.get("turn_id", "")})
-        pending["event"].set()
+    publish_control(_get_redis(), session_id, {"type": "approval", "id": tool_id, "approved": approved})
 
 
 @socketio.on("run_startup_tool_calls")
@@ -740,6 +1062,8 @@ def handle_run_startup_tool_calls():
     if session.startup_done:
         socketio.emit("startup_tool_calls_done", {"count": 0, "skipped": True}, room=session_id)
         return
+    if _multi_process:
+        _restore_shared_cwd(_get_redis())
 
     special_resources = {
         "emitting_kv_manager": EmittingKVManager(get_pool(), socketio, session_id),
@@ -766,6 +1090,8 @@ def handle_run_startup_tool_calls():
 
     session.startup_done = True
     _save_session(session_id, session)
+    if _multi_process:
+        _get_redis().set(SHARED_CWD, os.getcwd())
     socketio.emit("startup_tool_calls_done", {"count": len(_startup_tool_calls)}, room=session_id)
 
 
@@ -786,6 +1112,73 @@ def handle_user_message(data: dict):
         import uuid
         turn_id = str(uuid.uuid4())
 
+    if _turn_workers:
+        r = _get_redis()
+        enqueue_turn(r, session_id, text, turn_id, sid)
+        stats = queue_stats(r)
+        _emit_backend_log(
+            session_id,
+            colored("Turn queue: ", "cyan") +
+            f"queued={stats['queued']}, running={stats['running']}, "
+            f"workers={stats['workers']}, busy={stats['busy']}/{stats['slots']} slots, "
+            f"utilization={stats['utilization']:.0%}"
+        )
+        return
+
+    run_turn_job({"session_id": session_id, "text": text, "turn_id": turn_id, "sid": sid})
+
+
+def _restore_shared_cwd(r: redis.Redis) -> str:
+    """Multi-process mode: adopt the working directory last left by any process; returns it."""
+    cwd = r.get(SHARED_CWD)
+    if cwd and cwd != os.getcwd():
+        try:
+            os.chdir(cwd)
+        except OSError as exc:
+            print(f"[ui_connector] Cannot restore shared cwd {cwd!r}: {exc}", flush=True)
+    return os.getcwd()
+
+
+def run_turn_job(job: dict) -> None:
+    """
+    Run a user turn: inline from handle_user_message, or a queued job in a
+    worker process (see turn_queue.TurnWorker).
+    """
+    session_id = job["session_id"]
+    r = _get_redis()
+    cwd = _restore_shared_cwd(r) if _multi_process else None
+    control = TurnControl(r, session_id, origin_sid=job.get("sid"), turn_id=job["turn_id"])
+    try:
+        _run_turn(
+            session_id, job["text"], job["turn_id"], control.cancel_event,
+            lambda tool_id, tool_name, args, tc_turn_id: _request_approval(
+                control, session_id, tool_id, tool_name, args, turn_id=tc_turn_id,
+            ),
+        )
+    finally:
+        control.close()
+        _get_event_log().end(session_id)
+        if _multi_process and os.getcwd() != cwd:
+            r.set(SHARED_CWD, os.getcwd())
+
+
+def abort_orphaned_turn(job: dict) -> None:
+    """Report a queued turn whose worker died mid-run (it is not re-run)."""
+    _emit_and_log(job["session_id"], "error", {
+        "message": "Turn aborted: the worker process running it exited unexpectedly.",
+        "turn_id": job["turn_id"],
+    })
+    _get_event_log().end(job["session_id"])
+
+
+def _run_turn(
+    session_id: str,
+    text: str,
+    turn_id: str,
+    cancel_event: threading.Event,
+    request_approval: Callable[[str, str, dict, str], bool],
+) -> None:
+    """The agentic loop for one user turn, in the connector or in a turn worker."""
     llm_config = _load_llm_config()
     if llm_config is None:
         _emit_and_log(session_id, "error", {
@@ -794,15 +1187,22 @@ def handle_user_message(data: dict):
         })
         return
 
-    streaming_llm = StreamingLLM(
-        llm_config["endpoint_url"],
-        llm_config["token_value"],
-        60,
-        llm_config["model"],
-        llm_config["model_params"],
-    )
+    def on_failover(endpoint: Endpoint, exc: Exception) -> None:
+        _emit_backend_log(
+            session_id,
+            colored(f"LLM endpoint {endpoint.label} failed ({exc}), failing over…", "yellow")
+        )
+
+    streaming_llm = llm_from_config(llm_config, 60, on_failover=on_failover)
     return_value_max_chars: int | None = llm_config["system_params"].get("return_value_max_chars")
     assistant_truncation_chars: int | None = llm_config["system_params"].get("assistant_strip_truncation_chars")
+    cache_hints: bool = bool(llm_config["system_params"].get("prompt_cache_hints"))
+    budget = TokenBudget(
+        llm_config["model"],
+        context_window_override=llm_config["system_params"].get("context_window"),
+        max_output_tokens=llm_config["model_params"].get("max_tokens"),
+        tools=_LLM_TOOL_DEFINITIONS,
+    )
 
     session = _load_session(session_id)
     session.session_data["todo_list"] = []
@@ -815,11 +1215,11 @@ def handle_user_message(data: dict):
         user_text_with_context=user_text_with_context,
     )
     session.current_turn = current_turn
+    # The history part of the payload is fixed for the whole turn
+    payload_builder = PayloadBuilder(SYSTEM_PROMPT, session.completed_turns, current_turn)
+    tool_cache = ToolResultCache()
 
-    _emit_and_log(session_id, "turn_start", {"turn_id": turn_id, "user_text": text})
-
-    cancel_event = threading.Event()
-    _cancel_flags[session_id] = cancel_event
+    turn_start_event_id = _emit_and_log(session_id, "turn_start", {"turn_id": turn_id, "user_text": text})
 
     had_tool_calls = False
     final_reprompt_done = False
@@ -838,7 +1238,8 @@ def handle_user_message(data: dict):
             _emit_and_log(session_id, "begin_interim_stream", {"turn_id": turn_id})
 
         exchange_idx = len(current_turn.exchanges)
-        payload = _build_llm_payload(session, current_turn)
+        payload = payload_builder.messages()
+        speculation = _make_speculation(session, session_id, tool_cache)
 
         try:
             result, content_for_history, reasoning = _run_llm_call_with_retry(
@@ -848,8 +1249,16 @@ def handle_user_message(data: dict):
                 exchange_idx=exchange_idx,
                 assistant_truncation_chars=assistant_truncation_chars,
                 is_cancelled=cancel_event.is_set,
+                speculation=speculation,
+                cache_hints=cache_hints,
+                budget=budget,
+                current_turn_start=1 + 2 * len(session.completed_turns),
+                builder=payload_builder,
+                result_cache=tool_cache,
             )
         except requests.exceptions.HTTPError as exc:
+            if speculation is not None:
+                speculation.close()
             if cancel_event.is_set():
                 was_cancelled = True
                 break
@@ -859,6 +1268,8 @@ def handle_user_message(data: dict):
             })
             break
         except Exception as exc:
+            if speculation is not None:
+                speculation.close()
             if cancel_event.is_set():
                 was_cancelled = True
                 break
@@ -875,20 +1286,86 @@ def handle_user_message(data: dict):
                 colored("Usage: ", "cyan") +
                 f"prompt={usage.get('prompt_tokens', '?')}, "
                 f"completion={usage.get('completion_tokens', '?')}, "
-                f"total={usage.get('total_tokens', '?')}"
+                f"total={usage.get('total_tokens', '?')}, "
+                f"estimated_prompt={budget.last_estimate if budget.last_estimate is not None else '?'}"
+            )
+            budget.record_usage(usage.get("prompt_tokens"))
+        cache_stats = record_prompt_cache_usage(session.session_data, usage)
+        if cache_stats:
+            _emit_backend_log(
+                session_id,
+                colored("Prompt cache: ", "cyan") +
+                f"cached={cache_stats['cached_tokens']}/{cache_stats['prompt_tokens']} "
+                f"({cache_stats['hit_rate']:.0%}), session hit rate={cache_stats['session_hit_rate']:.0%}"
+            )
+        served_by = getattr(streaming_llm, "last_endpoint", None)
+        if served_by is not None:
+            ep_stats = router_stats().get(served_by.label, {})
+            _emit_backend_log(
+                session_id,
+                colored("Router: ", "cyan") +
+                f"served by {served_by.label}, "
+                f"ttft_ewma={ep_stats.get('ttft_ms')}ms, "
+                f"error_rate={ep_stats.get('error_rate', 0):.0%}"
+            )
+        pool_stats = get_endpoint_stats(served_by.endpoint_url if served_by else llm_config["endpoint_url"])
+        if pool_stats:
+            _emit_backend_log(
+                session_id,
+                colored("HTTP pool: ", "cyan") +
+                f"reuse={pool_stats['reuse_rate']:.0%}, "
+                f"live={pool_stats['live_connections']}, "
+                f"handshake_avg={pool_stats['avg_handshake_ms']:.0f}ms"
+            )
+        storage = codec_stats()
+        if storage["encoded"]:
+            _emit_backend_log(
+                session_id,
+                colored("Storage: ", "cyan") +
+                f"{storage['compression']} ratio={storage['ratio']:.1f}x "
+                f"({storage['raw_bytes']} -> {storage['stored_bytes']} bytes), "
+                f"encode_avg={storage['avg_encode_ms']:.2f}ms, decode_avg={storage['avg_decode_ms']:.2f}ms"
+            )
+
+        memory_cache = get_near_cache(_get_redis())
+        mc = memory_cache.stats() if memory_cache is not None else None
+        if mc and mc["hits"] + mc["misses"]:
+            _emit_backend_log(
+                session_id,
+                colored("Memory cache: ", "cyan") +
+                f"{mc['mode']} hit_ratio={mc['hit_ratio']:.0%}, saved={mc['bytes_saved'] // 1024} KB, "
+                f"{mc['entries']} entries ({mc['bytes'] // 1024}/{mc['max_bytes'] // 1024} KB), "
+                f"evictions={mc['evictions']}, invalidations={mc['invalidations']}"
             )
 
         last_assistant_content = content_for_history
 
+        if cancel_event.is_set() or not result.has_tool_calls:
+            if speculation is not None:
+                speculation.close()
+
         if cancel_event.is_set():
             was_cancelled = True
             break
 
         if result.has_tool_calls:
+            cache_hits = tool_cache.hits
             impossible, reason, exchange = _execute_tools(
-                result, content_for_history, session, sid, session_id, current_turn,
-                return_value_max_chars,
+                result, content_for_history, session, request_approval, session_id, current_turn,
+                return_value_max_chars, speculation=speculation, result_cache=tool_cache,
             )
+            if speculation is not None and speculation.used:
+                _emit_backend_log(
+                    session_id,
+                    colored("Speculative tools: ", "cyan") +
+                    f"{speculation.used} of {len(result.tool_calls)} call(s) started while streaming"
+                )
+            if tool_cache.hits > cache_hits:
+                _emit_backend_log(
+                    session_id,
+                    colored("Tool result cache: ", "cyan") +
+                    f"{tool_cache.hits - cache_hits} repeated call(s) answered from earlier results"
+                )
             exchange.reasoning = reasoning
             had_tool_calls = True
             current_turn.exchanges.append(exchange)
@@ -994,5 +1471,7 @@ def handle_user_message(data: dict):
         session.completed_turns.append(current_turn)
         session.current_turn = None
 
-    _cancel_flags.pop(session_id, None)
     _save_session(session_id, session)
+    if current_turn.completed and turn_start_event_id:
+        # The saved session now covers everything before this turn
+        _get_event_log().compact(session_id, turn_start_event_id)
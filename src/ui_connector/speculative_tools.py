@@ -0,0 +1,119 @@
+"""
+Speculative dispatch of tool calls while the LLM response is still streaming.
+
+StreamAccumulator announces each tool call as soon as its arguments are
+complete (see on_tool_call_ready).  SpeculativeToolRunner.offer() queues it on
+a single worker thread, which starts it right away if it is eligible —
+side-effect free (writes nothing, not even session memory), no approval
+needed, not a streaming-result tool — instead of waiting for the rest of the
+response to arrive.  A runner that is discarded (LLM retry, cancelled turn)
+therefore leaves no trace of the calls it ran.
+
+Only a prefix of the response's tool calls is ever speculated: the first
+ineligible call stops speculation for the rest of the exchange, so no
+speculated call ever runs ahead of a call that writes something it reads.
+
+_execute_tools then walks result.tool_calls as usual and calls take() for each
+one.  take() waits for the speculative run if one was started, and returns
+None when the call has to run normally.  Socket events (tool_call,
+tool_call_start, tool_result) are only emitted from _execute_tools, so
+clients see the same event sequence either way.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from src.utils.llm.streaming import ToolCall
+
+
+@dataclass
+class SpeculativeResult:
+    call: ToolCall
+    result: str
+    started_at: int
+    finished_at: int
+
+
+class SpeculativeToolRunner:
+
+    def __init__(
+        self,
+        is_eligible: Callable[[ToolCall], bool],
+        run: Callable[[ToolCall], str],
+    ) -> None:
+        """
+        is_eligible(tc) and run(tc) are called on the worker thread, in stream
+        order.  is_eligible may be slow (approval checks can shell out to git).
+        """
+        self._is_eligible = is_eligible
+        self._run = run
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: list[Future] = []
+        self._stopped = False
+        self._closed = False
+        self.used = 0
+
+    def offer(self, position: int, tc: ToolCall) -> None:
+        """Queue a completed tool call.  Called from the streaming thread."""
+        with self._lock:
+            if self._closed or self._stopped or position != len(self._futures):
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculative-tool")
+            self._futures.append(self._executor.submit(self._attempt, tc))
+
+    def take(self, position: int, tc: ToolCall) -> SpeculativeResult | None:
+        """
+        Return the speculative result for the call at this position, or None if
+        it was not speculated (or the final call differs from the one that
+        ran).  Blocks until a started run finishes; re-raises ToolHangError /
+        ToolTimeoutError from the tool exactly as execute_tool would.
+        """
+        with self._lock:
+            future = self._futures[position] if position < len(self._futures) else None
+        if future is None:
+            return None
+        spec = future.result()
+        if spec is None:
+            return None
+        if (spec.call.id, spec.call.name, spec.call.arguments) != (tc.id, tc.name, tc.arguments):
+            return None
+        self.used += 1
+        return spec
+
+    def reset(self) -> None:
+        """Forget everything (e.g. before retrying the LLM call); waits for a running tool."""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._futures = []
+            self._stopped = False
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def close(self) -> None:
+        """
+        Stop accepting calls and drop queued ones.  Idempotent.  Waits for a
+        running tool, so it cannot overlap the next step's calls (or record
+        into the result cache after they invalidated its entry).
+        """
+        with self._lock:
+            self._closed = True
+            executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _attempt(self, tc: ToolCall) -> SpeculativeResult | None:
+        if self._stopped:
+            return None
+        if not self._is_eligible(tc):
+            self._stopped = True
+            return None
+        started_at = int(time.time() * 1000)
+        result = self._run(tc)
+        return SpeculativeResult(tc, result, started_at, int(time.time() * 1000))
@@ -0,0 +1,150 @@
+"""
+Per-call coalescing buffer for streamed "token" events.
+
+Fast providers deliver hundreds of tiny deltas per second; emitting one
+Socket.IO frame per delta makes websocket framing and emit overhead the
+dominant connector cost.  TokenFrameBuffer collects consecutive deltas of the
+same kind ("content" or "reasoning") and emits them as one frame when either
+
+  - frame_ms has elapsed since the first delta of the pending frame, or
+  - the pending frame has reached frame_bytes characters, or
+  - a delta of the other kind arrives (so the client still sees reasoning and
+    content in exactly the order the model produced them), or
+  - flush()/close() is called (end of the LLM call, before tool calls run).
+
+The client-visible event sequence is unchanged: the same "token" events with
+the same types in the same order, just with fewer, larger text payloads.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+
+class TokenFrameBuffer:
+
+    def __init__(
+        self,
+        emit_frame: Callable[[str, str], None],
+        frame_ms: float = 16,
+        frame_bytes: int = 2048,
+        on_flush: Callable[["TokenFrameBuffer"], None] | None = None,
+    ) -> None:
+        """
+        emit_frame(kind, text) sends one coalesced frame to the client.
+        on_flush(buffer) runs after every emitted frame, with the lock held, so
+        text() reflects exactly what the client has received so far.
+        frame_ms <= 0 disables coalescing (one frame per delta).
+        """
+        self._emit_frame = emit_frame
+        self._on_flush = on_flush
+        self._frame_s = frame_ms / 1000
+        self._frame_bytes = frame_bytes
+        self._cond = threading.Condition()
+        self._pending_kind: str | None = None
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self._pending_since: float | None = None
+        self._emitted: dict[str, list[str]] = {"content": [], "reasoning": []}
+        self._closed = False
+
+        self.frames = 0
+        self.deltas = 0
+        self.bytes_sent = 0
+        self._started = time.monotonic()
+        self._elapsed: float | None = None
+
+        self._timer: threading.Thread | None = None
+        if self._frame_s > 0:
+            self._timer = threading.Thread(target=self._run_timer, name="token-frames", daemon=True)
+            self._timer.start()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def push(self, kind: str, text: str) -> None:
+        if not text:
+            return
+        with self._cond:
+            self.deltas += 1
+            if self._pending_kind is not None and kind != self._pending_kind:
+                self._flush_locked()
+            self._pending_kind = kind
+            self._pending.append(text)
+            self._pending_size += len(text)
+            if self._timer is None or self._pending_size >= self._frame_bytes:
+                self._flush_locked()
+            elif self._pending_since is None:
+                self._pending_since = time.monotonic()
+                self._cond.notify()
+
+    def flush(self) -> None:
+        with self._cond:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush anything pending and stop the timer thread.  Idempotent."""
+        with self._cond:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            self._elapsed = time.monotonic() - self._started
+            self._cond.notify()
+        if self._timer is not None:
+            self._timer.join(timeout=1)
+
+    # ------------------------------------------------------------------
+    # Accessors
+    # ------------------------------------------------------------------
+
+    def text(self, kind: str) -> str:
+        """All text of this kind emitted to the client so far."""
+        with self._cond:
+            return "".join(self._emitted[kind])
+
+    def stats(self) -> dict:
+        elapsed = self._elapsed if self._elapsed is not None else time.monotonic() - self._started
+        elapsed = max(elapsed, 1e-6)
+        return {
+            "frames": self.frames,
+            "deltas": self.deltas,
+            "bytes": self.bytes_sent,
+            "seconds": elapsed,
+            "frames_per_s": self.frames / elapsed,
+            "bytes_per_s": self.bytes_sent / elapsed,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        kind = self._pending_kind or "content"
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self._pending_since = None
+        self._pending_kind = None
+        self._emitted.setdefault(kind, []).append(text)
+        self.frames += 1
+        self.bytes_sent += len(text.encode("utf-8"))
+        self._emit_frame(kind, text)
+        if self._on_flush is not None:
+            self._on_flush(self)
+
+    def _run_timer(self) -> None:
+        with self._cond:
+            while not self._closed:
+                if self._pending_since is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._pending_since + self._frame_s - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._flush_locked()
@@ -0,0 +1,162 @@
+"""
+Cross-process control channel for running turns.
+
+The socket that sends cancel_turn or approval_response may be held by a
+different connector process than the one running the turn (several
+connectors share a port, and with --workers turns run in worker processes),
+so those requests are published on the session's control channel and the
+process running the turn acts on them.  Every turn, wherever it runs,
+listens through a TurnControl; a single pattern subscription per process
+dispatches messages to the TurnControls registered for each session.
+
+Pub/sub does not store messages, so a cancel is also left in Redis
+(slbp:turn_cancel:{session_id}, holding the turn id or "*" for whichever
+turn runs next) for a turn that has no TurnControl yet: one still waiting in
+the job queue, or one whose process has not subscribed yet.  TurnControl
+checks it when it is created.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+import redis
+
+_CHANNEL_PREFIX = "slbp:turn_control:"
+_CANCEL_PREFIX = "slbp:turn_cancel:"
+# How long a stored cancel waits for its turn to start
+_CANCEL_TTL_S = 3600
+_ANY_TURN = "*"
+
+_registry_lock = threading.Lock()
+_registry: dict[str, set["TurnControl"]] = {}
+_listener: Optional[redis.client.PubSubWorkerThread] = None
+
+
+def publish_control(r: redis.Redis, session_id: str, message: dict) -> None:
+    """Send message ({"type": "cancel" | "approval" | "disconnect", ...}) to the session's running turn."""
+    r.publish(_CHANNEL_PREFIX + session_id, json.dumps(message))
+
+
+def request_cancel(r: redis.Redis, session_id: str, turn_id: Optional[str] = None) -> None:
+    """
+    Cancel turn_id (or, without one, the session's running or next turn)
+    wherever it runs or is queued.
+    """
+    pipe = r.pipeline(transaction=False)
+    pipe.set(_CANCEL_PREFIX + session_id, turn_id or _ANY_TURN, ex=_CANCEL_TTL_S)
+    pipe.publish(_CHANNEL_PREFIX + session_id, json.dumps({"type": "cancel", "turn_id": turn_id}))
+    pipe.execute()
+
+
+def _dispatch(message: dict) -> None:
+    session_id = message["channel"][len(_CHANNEL_PREFIX):]
+    try:
+        data = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    with _registry_lock:
+        controls = list(_registry.get(session_id, ()))
+    for control in controls:
+        control._on_message(data)
+
+
+def _on_listener_error(exc: Exception, pubsub: redis.client.PubSub, thread) -> None:
+    # Keep listening: the next get_message() reconnects and resubscribes.
+    print(f"[turn_control] Subscription error: {exc}", flush=True)
+    time.sleep(1.0)
+
+
+def _ensure_listener(r: redis.Redis) -> None:
+    global _listener
+    with _registry_lock:
+        if _listener is not None:
+            return
+        pubsub = r.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(**{_CHANNEL_PREFIX + "*": _dispatch})
+        # Read the psubscribe reply, so the subscription is live before the
+        # first TurnControl checks for a stored cancel
+        pubsub.get_message(timeout=1.0)
+        _listener = pubsub.run_in_thread(sleep_time=0.5, daemon=True, exception_handler=_on_listener_error)
+
+
+class TurnControl:
+    """
+    Cancel flag and approval answers for one running turn (turn_id) of
+    session_id.  A "disconnect" from origin_sid (the socket that started the
+    turn) denies any approval the turn is waiting on.
+    """
+
+    def __init__(self, r: redis.Redis, session_id: str, origin_sid: Optional[str] = None,
+                 turn_id: Optional[str] = None) -> None:
+        self.session_id = session_id
+        self.origin_sid = origin_sid
+        self.turn_id = turn_id
+        self.cancel_event = threading.Event()
+        self._r = r
+        self._lock = threading.Lock()
+        self._approvals: dict[str, dict] = {}
+        _ensure_listener(r)
+        with _registry_lock:
+            _registry.setdefault(session_id, set()).add(self)
+        self.check_cancel()
+
+    def _is_for_me(self, turn_id: Optional[str]) -> bool:
+        return not turn_id or turn_id == _ANY_TURN or turn_id == self.turn_id
+
+    def check_cancel(self) -> bool:
+        """Pick up (and consume) a cancel stored for this turn; True if cancelled."""
+        key = _CANCEL_PREFIX + self.session_id
+        stored = self._r.get(key)
+        if stored is not None and self._is_for_me(stored):
+            self._r.delete(key)
+            self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    def _on_message(self, data: dict) -> None:
+        kind = data.get("type")
+        if kind == "cancel":
+            if self._is_for_me(data.get("turn_id")):
+                # Delivered live: the stored copy must not cancel a later turn
+                self.check_cancel()
+                self.cancel_event.set()
+        elif kind == "approval":
+            with self._lock:
+                entry = self._approvals.get(data.get("id"))
+            if entry is not None:
+                entry["approved"] = bool(data.get("approved"))
+                entry["event"].set()
+        elif kind == "disconnect" and data.get("sid") == self.origin_sid:
+            with self._lock:
+                entries = list(self._approvals.values())
+            for entry in entries:
+                if not entry["event"].is_set():
+                    entry["approved"] = False
+                    entry["event"].set()
+
+    def request_approval(self, tool_id: str, send_request: Callable[[], None], timeout: float) -> Optional[bool]:
+        """
+        Call send_request() and block until the client answers.
+        Returns the answer, or None on timeout.
+        """
+        entry = {"event": threading.Event(), "approved": None}
+        with self._lock:
+            self._approvals[tool_id] = entry
+        try:
+            send_request()
+            if not entry["event"].wait(timeout=timeout):
+                return None
+            return bool(entry["approved"])
+        finally:
+            with self._lock:
+                self._approvals.pop(tool_id, None)
+
+    def close(self) -> None:
+        with _registry_lock:
+            controls = _registry.get(self.session_id)
+            if controls is not None:
+                controls.discard(self)
+                if not controls:
+                    del _registry[self.session_id]
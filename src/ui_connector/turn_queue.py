@@ -0,0 +1,245 @@
+"""
+Redis-backed queue of user turns for out-of-process turn workers.
+
+With `slbp server run --workers N` the UI connector no longer runs the
+agentic loop in its Socket.IO handler thread.  handle_user_message enqueues
+the turn on the TURN_JOBS stream and returns; N worker processes
+(src/ui_connector/worker.py) consume it through the TURN_GROUP consumer group
+and run each job with socket_handlers.run_turn_job.  Workers emit through the
+Socket.IO Redis message queue, so events reach the client via whichever
+connector holds its socket, and are logged to the session's event stream
+exactly as before.
+
+Each worker runs up to `slots` turns at once (turns are mostly waiting on the
+LLM), reads a new job only when a slot is free, and acks + deletes the entry
+when the turn ends.  XLEN - pending is therefore the number of turns waiting
+for a slot.
+
+Workers heartbeat into the WORKERS hash.  A worker that stops heartbeating is
+presumed dead: another worker claims the jobs it still had pending and
+reports them as failed turns instead of re-running them, since a half-run
+turn may already have executed tools with side effects.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+import redis
+
+TURN_JOBS = "slbp:turn_jobs"
+TURN_GROUP = "turn_workers"
+# worker_id -> JSON status, refreshed every _HEARTBEAT_S
+WORKERS = "slbp:turn_workers"
+# Working directory shared by all connector/worker processes (tools chdir their own process)
+SHARED_CWD = "slbp:cwd"
+
+_HEARTBEAT_S = 5.0
+# A worker whose last heartbeat is older than this is considered dead
+_WORKER_TTL_S = 20.0
+_READ_BLOCK_MS = 5000
+
+
+def ensure_group(r: redis.Redis) -> None:
+    try:
+        r.xgroup_create(TURN_JOBS, TURN_GROUP, id="0", mkstream=True)
+    except redis.exceptions.ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def enqueue_turn(r: redis.Redis, session_id: str, text: str, turn_id: str, sid: str = "") -> str:
+    """Queue a user turn for the worker pool; returns the job (stream entry) ID."""
+    ensure_group(r)
+    return r.xadd(TURN_JOBS, {
+        "session_id": session_id,
+        "text": text,
+        "turn_id": turn_id,
+        "sid": sid,
+        "enqueued_at": f"{time.time():.3f}",
+    })
+
+
+def _live_workers(r: redis.Redis) -> dict[str, dict]:
+    now = time.time()
+    live: dict[str, dict] = {}
+    for worker_id, raw in r.hgetall(WORKERS).items():
+        try:
+            status = json.loads(raw)
+        except ValueError:
+            continue
+        if now - status.get("heartbeat", 0) <= _WORKER_TTL_S:
+            live[worker_id] = status
+    return live
+
+
+def queue_stats(r: redis.Redis) -> dict:
+    """
+    Queue depth and worker utilization:
+
+      queued       turns waiting for a free worker slot
+      running      turns currently being run by a worker
+      workers      live worker processes
+      slots/busy   total and busy turn slots across live workers
+      utilization  busy slot-seconds / available slot-seconds since each worker started
+    """
+    ensure_group(r)
+    running = r.xpending(TURN_JOBS, TURN_GROUP)["pending"]
+    queued = max(0, r.xlen(TURN_JOBS) - running)
+    workers = _live_workers(r)
+    slots = sum(w["slots"] for w in workers.values())
+    busy = sum(w["busy"] for w in workers.values())
+    busy_s = sum(w["busy_s"] for w in workers.values())
+    available_s = sum(w["slots"] * (w["heartbeat"] - w["started"]) for w in workers.values())
+    return {
+        "queued": queued,
+        "running": running,
+        "workers": len(workers),
+        "slots": slots,
+        "busy": busy,
+        "utilization": busy_s / available_s if available_s > 0 else 0.0,
+        "per_worker": workers,
+    }
+
+
+class TurnWorker:
+    """
+    Consumes TURN_JOBS and runs each job with run_turn(job) on its own thread,
+    at most `slots` at a time.  on_orphan(job) is called for jobs taken over
+    from a dead worker.
+    """
+
+    def __init__(
+        self,
+        r: redis.Redis,
+        run_turn: Callable[[dict], None],
+        on_orphan: Callable[[dict], None],
+        slots: int = 8,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self._r = r
+        self._run_turn = run_turn
+        self._on_orphan = on_orphan
+        self.slots = max(1, slots)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._free = threading.Semaphore(self.slots)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started = time.time()
+        self._busy = 0
+        self._busy_s = 0.0
+        self._busy_since: dict[str, float] = {}
+        self._turns = 0
+
+    # -- status ---------------------------------------------------------------
+
+    def _status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            in_progress = sum(now - t for t in self._busy_since.values())
+            return {
+                "pid": os.getpid(),
+                "slots": self.slots,
+                "busy": self._busy,
+                "turns": self._turns,
+                "busy_s": round(self._busy_s + in_progress, 3),
+                "started": self._started,
+                "heartbeat": now,
+            }
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(_HEARTBEAT_S):
+            try:
+                self._r.hset(WORKERS, self.worker_id, json.dumps(self._status()))
+                self._reap_dead_workers()
+            except redis.exceptions.RedisError as exc:
+                print(f"[turn_worker] Heartbeat failed: {exc}", flush=True)
+
+    def _reap_dead_workers(self) -> None:
+        live = _live_workers(self._r)
+        for entry in self._r.xpending_range(TURN_JOBS, TURN_GROUP, min="-", max="+", count=100):
+            owner = entry["consumer"]
+            if owner == self.worker_id or owner in live:
+                continue
+            # min_idle_time makes the claim a no-op if another worker got there first
+            claimed = self._r.xclaim(TURN_JOBS, TURN_GROUP, self.worker_id,
+                                     min_idle_time=int(_WORKER_TTL_S * 1000),
+                                     message_ids=[entry["message_id"]])
+            for job_id, job in claimed:
+                print(f"[turn_worker] Job {job_id} orphaned by dead worker {owner}", flush=True)
+                try:
+                    self._on_orphan(job)
+                finally:
+                    self._finish(job_id)
+        # Forget dead workers once nothing is pending on them (deleting a
+        # consumer drops its pending entries, which would strand those jobs).
+        for consumer in self._r.xinfo_consumers(TURN_JOBS, TURN_GROUP):
+            name = consumer["name"]
+            if name not in live and name != self.worker_id and consumer["pending"] == 0:
+                self._r.xgroup_delconsumer(TURN_JOBS, TURN_GROUP, name)
+        for worker_id in self._r.hkeys(WORKERS):
+            if worker_id not in live and worker_id != self.worker_id:
+                self._r.hdel(WORKERS, worker_id)
+
+    # -- jobs -----------------------------------------------------------------
+
+    def _finish(self, job_id: str) -> None:
+        pipe = self._r.pipeline()
+        pipe.xack(TURN_JOBS, TURN_GROUP, job_id)
+        pipe.xdel(TURN_JOBS, job_id)
+        pipe.execute()
+
+    def _run_job(self, job_id: str, job: dict) -> None:
+        with self._lock:
+            self._busy += 1
+            self._busy_since[job_id] = time.time()
+        try:
+            self._run_turn(job)
+        except Exception:
+            print(f"[turn_worker] Job {job_id} failed:\n{traceback.format_exc()}", flush=True)
+        finally:
+            try:
+                self._finish(job_id)
+            except redis.exceptions.RedisError as exc:
+                print(f"[turn_worker] Failed to ack job {job_id}: {exc}", flush=True)
+            with self._lock:
+                self._busy -= 1
+                self._busy_s += time.time() - self._busy_since.pop(job_id)
+                self._turns += 1
+            self._free.release()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        """Consume jobs until stop() is called."""
+        ensure_group(self._r)
+        self._r.hset(WORKERS, self.worker_id, json.dumps(self._status()))
+        threading.Thread(target=self._heartbeat_loop, name="turn-worker-heartbeat", daemon=True).start()
+        print(f"[turn_worker] {self.worker_id} ready ({self.slots} slots)", flush=True)
+        try:
+            while not self._stop.is_set():
+                self._free.acquire()
+                try:
+                    resp = self._r.xreadgroup(TURN_GROUP, self.worker_id, {TURN_JOBS: ">"},
+                                              count=1, block=_READ_BLOCK_MS)
+                except redis.exceptions.RedisError as exc:
+                    self._free.release()
+                    print(f"[turn_worker] Queue read failed: {exc}", flush=True)
+                    time.sleep(1)
+                    continue
+                if not resp:
+                    self._free.release()
+                    continue
+                _, entries = resp[0]
+                job_id, job = entries[0]
+                threading.Thread(target=self._run_job, args=(job_id, job),
+                                 name=f"turn-{job_id}", daemon=True).start()
+        finally:
+            self._stop.set()
+            self._r.hdel(WORKERS, self.worker_id)
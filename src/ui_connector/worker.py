@@ -0,0 +1,33 @@
+"""
+Entry point for a turn worker process (`slbp server run --workers N`).
+
+Runs queued user turns (see turn_queue.py); the UI connector only enqueues
+them and relays the events workers emit.
+"""
+
+import os
+import signal
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Load .env from the project root (two levels up from src/ui_connector/)
+load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
+
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+# Must be set before app.py creates the socketio instance.
+os.environ["SLBP_PROCESS_ROLE"] = "turn_worker"
+
+from src.ui_connector.socket_handlers import abort_orphaned_turn, run_turn_job  # noqa: E402
+from src.ui_connector.turn_queue import TurnWorker  # noqa: E402
+from src.utils.redis_client import get_redis  # noqa: E402
+
+if __name__ == "__main__":
+    slots = int(os.environ.get("SLBP_WORKER_SLOTS", "8"))
+    worker = TurnWorker(get_redis(), run_turn_job, abort_orphaned_turn, slots=slots)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    print(f"[turn_worker] Starting {worker.worker_id}", flush=True)
+    worker.run()
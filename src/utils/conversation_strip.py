@@ -18,66 +18,107 @@ SHORT        — truncate the tool result to TOOL_SHORT_AMOUNT chars and append
 Already-stubbed results (produced by _stub_tool_result, start with the marker
 below) are always treated as PARAMS_ONLY regardless of the declared policy —
 showing the preview again wastes tokens.
+
+Stripping ladder
+----------------
+strip_to_budget() escalates through STRIP_LEVELS until a TokenBudget says the
+payload fits:
+
+  policies         the declared per-tool policies above (= strip_down_messages)
+  short            SHORT amounts cut to a quarter, interim assistant text to 200 chars
+  params_only      every tool result except the latest exchange's -> PARAMS_ONLY
+  fold             earlier exchanges of the current turn folded into one
+                   condensed assistant note
+  drop_turns       oldest completed turns dropped, one at a time
+  truncate_latest  the latest exchange's tool results cut to 1000 chars
+
+All stripping is copy-on-write: a level returns a new list that shares every
+message dict it did not change with its input, and changed messages are
+shallow copies.  Inputs are never mutated, so successive levels over a long
+payload cost little more than the messages they actually touch (and a
+TokenBudget only re-counts those).
 """
 from __future__ import annotations
 
-import copy
 import json
+from dataclasses import dataclass, field
+from typing import Optional
 
 from src.tools._leave_out import LeaveOut, get_leave_out_for_args
 
 _STUB_MARKER = "** STUBBED LONG RETURN VALUE **"
 
+STRIP_LEVELS = ("policies", "short", "params_only", "fold", "drop_turns", "truncate_latest")
+
+_SHORT_SCALE = 0.25
+_MIN_SHORT_AMOUNT = 100
+_LADDER_ASSISTANT_TRUNCATION = 200
+_LATEST_RESULT_CHARS = 1000
+_FOLD_ARGS_CHARS = 80
+
 
 def _is_stubbed(content: str) -> bool:
     return isinstance(content, str) and content.startswith(_STUB_MARKER)
 
 
-def strip_down_messages(
-    messages: list[dict],
-    tool_map: dict,
-    assistant_truncation_chars: int | None = None,
-) -> list[dict]:
-    """
-    Return a deep-copied, stripped list of messages.
+def _with(msg: dict, **changes) -> dict:
+    out = dict(msg)
+    out.update(changes)
+    return out
 
-    tool_map: dict[tool_name: str, module] — same _TOOL_MAP used by execute_tool.
 
-    assistant_truncation_chars controls what happens to the text content field on
-    assistant messages that also have tool_calls (the "interim" narration):
-      None    — leave as-is (default)
-      0       — set content to None (fully omit)
-      N > 0   — truncate to N chars and append '... (M more chars)'
-    """
-    messages = copy.deepcopy(messages)
+def _truncated(content: str, limit: int) -> str:
+    overflow = len(content) - limit
+    return content[:limit] + f"... ({overflow} more chars)"
+
 
-    # --- Pass 1: collect per-tool-call-id policy ---
-    tool_call_policies: dict[str, LeaveOut] = {}
-    tool_call_short_amounts: dict[str, int] = {}
+@dataclass
+class _Policies:
+    """Per-tool-call-id policy resolved once from the tool map."""
+    leave_out: dict[str, LeaveOut] = field(default_factory=dict)
+    short_amounts: dict[str, int] = field(default_factory=dict)
+    names: dict[str, str] = field(default_factory=dict)
+    args: dict[str, str] = field(default_factory=dict)
 
+    @property
+    def omit_ids(self) -> set[str]:
+        return {tid for tid, p in self.leave_out.items() if p == LeaveOut.OMIT}
+
+
+def _resolve_policies(messages: list[dict], tool_map: dict) -> _Policies:
+    policies = _Policies()
     for msg in messages:
-        if msg.get("role") == "assistant":
-            for tc in msg.get("tool_calls") or []:
-                tc_id: str = tc.get("id", "")
-                name: str = tc.get("function", {}).get("name", "")
-                module = tool_map.get(name)
-                raw_args = tc.get("function", {}).get("arguments", "") or ""
-                try:
-                    call_args = json.loads(raw_args)
-                except (json.JSONDecodeError, TypeError):
-                    call_args = {}
-                policy, short_amt = (
-                    get_leave_out_for_args(module, call_args)
-                    if module is not None
-                    else (LeaveOut.KEEP, 500)
-                )
-                tool_call_policies[tc_id] = policy
-                if policy == LeaveOut.SHORT:
-                    tool_call_short_amounts[tc_id] = short_amt
-
-    omit_ids = {tid for tid, p in tool_call_policies.items() if p == LeaveOut.OMIT}
-
-    # --- Pass 2: rebuild messages applying policies ---
+        if msg.get("role") != "assistant":
+            continue
+        for tc in msg.get("tool_calls") or []:
+            tc_id: str = tc.get("id", "")
+            name: str = tc.get("function", {}).get("name", "")
+            module = tool_map.get(name)
+            raw_args = tc.get("function", {}).get("arguments", "") or ""
+            try:
+                call_args = json.loads(raw_args)
+            except (json.JSONDecodeError, TypeError):
+                call_args = {}
+            policy, short_amt = (
+                get_leave_out_for_args(module, call_args)
+                if module is not None
+                else (LeaveOut.KEEP, 500)
+            )
+            policies.leave_out[tc_id] = policy
+            policies.names[tc_id] = name
+            policies.args[tc_id] = raw_args
+            if policy == LeaveOut.SHORT:
+                policies.short_amounts[tc_id] = short_amt
+    return policies
+
+
+def _apply_policies(
+    messages: list[dict],
+    policies: _Policies,
+    assistant_truncation_chars: int | None,
+    short_scale: float = 1.0,
+) -> list[dict]:
+    omit_ids = policies.omit_ids
     result: list[dict] = []
 
     for msg in messages:
@@ -91,20 +132,20 @@ def strip_down_messages(
                 if not kept_tcs and not msg.get("content"):
                     # Nothing left in this assistant turn — drop it entirely
                     continue
-                if kept_tcs:
-                    msg["tool_calls"] = kept_tcs
-                else:
-                    msg.pop("tool_calls", None)
+                if len(kept_tcs) != len(tool_calls):
+                    msg = _with(msg, tool_calls=kept_tcs)
+                    if not kept_tcs:
+                        msg.pop("tool_calls")
 
                 # Apply assistant interim content truncation (only on messages
                 # that originally had tool_calls — not pure text responses)
                 if assistant_truncation_chars is not None:
                     content = msg.get("content") or ""
                     if assistant_truncation_chars == 0:
-                        msg["content"] = None
+                        if msg.get("content") is not None:
+                            msg = _with(msg, content=None)
                     elif content and len(content) > assistant_truncation_chars:
-                        overflow = len(content) - assistant_truncation_chars
-                        msg["content"] = content[:assistant_truncation_chars] + f"... ({overflow} more chars)"
+                        msg = _with(msg, content=_truncated(content, assistant_truncation_chars))
 
             result.append(msg)
 
@@ -114,18 +155,18 @@ def strip_down_messages(
                 # Drop the result message entirely
                 continue
 
-            policy = tool_call_policies.get(tc_id, LeaveOut.KEEP)
+            policy = policies.leave_out.get(tc_id, LeaveOut.KEEP)
             content: str = msg.get("content") or ""
 
             if policy == LeaveOut.PARAMS_ONLY or _is_stubbed(content):
-                n = len(content)
-                msg["content"] = f"Tool Successful ({n} chars)"
+                msg = _with(msg, content=f"Tool Successful ({len(content)} chars)")
 
             elif policy == LeaveOut.SHORT:
-                limit = tool_call_short_amounts.get(tc_id, 500)
+                limit = policies.short_amounts.get(tc_id, 500)
+                if short_scale != 1.0:
+                    limit = max(_MIN_SHORT_AMOUNT, int(limit * short_scale))
                 if len(content) > limit:
-                    overflow = len(content) - limit
-                    msg["content"] = content[:limit] + f"... ({overflow} more chars)"
+                    msg = _with(msg, content=_truncated(content, limit))
 
             result.append(msg)
 
@@ -133,3 +174,185 @@ def strip_down_messages(
             result.append(msg)
 
     return result
+
+
+def strip_down_messages(
+    messages: list[dict],
+    tool_map: dict,
+    assistant_truncation_chars: int | None = None,
+) -> list[dict]:
+    """
+    Return a stripped list of messages (copy-on-write; the input is not modified).
+
+    tool_map: dict[tool_name: str, module] — same _TOOL_MAP used by execute_tool.
+
+    assistant_truncation_chars controls what happens to the text content field on
+    assistant messages that also have tool_calls (the "interim" narration):
+      None    — leave as-is (default)
+      0       — set content to None (fully omit)
+      N > 0   — truncate to N chars and append '... (M more chars)'
+    """
+    return _apply_policies(messages, _resolve_policies(messages, tool_map), assistant_truncation_chars)
+
+
+# ---------------------------------------------------------------------------
+# Ladder
+# ---------------------------------------------------------------------------
+
+def infer_current_turn_start(messages: list[dict]) -> int:
+    """
+    Index of the current turn's user message in a payload laid out as
+    [system, (user, assistant)* completed turns, user, exchanges...].
+    """
+    i = 1 if messages and messages[0].get("role") == "system" else 0
+    while (
+        i + 2 < len(messages)
+        and messages[i].get("role") == "user"
+        and messages[i + 1].get("role") == "assistant"
+        and not messages[i + 1].get("tool_calls")
+        and messages[i + 2].get("role") == "user"
+    ):
+        i += 2
+    return i
+
+
+def _exchange_bounds(messages: list[dict], turn_start: int) -> list[tuple[int, int]]:
+    """[start, end) of each exchange (assistant msg, its tool results, optional continuation) after turn_start."""
+    bounds: list[tuple[int, int]] = []
+    start = None
+    for i in range(turn_start + 1, len(messages)):
+        if messages[i].get("role") == "assistant":
+            if start is not None:
+                bounds.append((start, i))
+            start = i
+    if start is not None:
+        bounds.append((start, len(messages)))
+    return bounds
+
+
+def _params_only_older(messages: list[dict], turn_start: int) -> list[dict]:
+    bounds = _exchange_bounds(messages, turn_start)
+    keep_from = bounds[-1][0] if bounds else len(messages)
+    result = list(messages)
+    for i in range(keep_from):
+        msg = result[i]
+        if msg.get("role") == "tool":
+            content = msg.get("content") or ""
+            if not content.startswith("Tool Successful ("):
+                result[i] = _with(msg, content=f"Tool Successful ({len(content)} chars)")
+    return result
+
+
+def _fold_exchanges(messages: list[dict], turn_start: int, policies: _Policies) -> list[dict]:
+    bounds = _exchange_bounds(messages, turn_start)
+    if len(bounds) < 2:
+        return messages
+    fold_start, fold_end = bounds[0][0], bounds[-1][0]
+
+    steps: list[str] = []
+    for msg in messages[fold_start:fold_end]:
+        for tc in msg.get("tool_calls") or []:
+            tc_id = tc.get("id", "")
+            args = policies.args.get(tc_id) or tc.get("function", {}).get("arguments", "") or ""
+            if len(args) > _FOLD_ARGS_CHARS:
+                args = args[:_FOLD_ARGS_CHARS] + "…"
+            steps.append(f"{len(steps) + 1}. {policies.names.get(tc_id) or tc.get('function', {}).get('name', '?')} {args}")
+    summary = (
+        f"(Earlier steps of this request, condensed to fit the context window — "
+        f"{len(steps)} tool call(s) already made:\n" + "\n".join(steps) + ")"
+    )
+    return messages[:fold_start] + [{"role": "assistant", "content": summary}] + messages[fold_end:]
+
+
+def _truncate_latest(messages: list[dict], turn_start: int) -> list[dict]:
+    bounds = _exchange_bounds(messages, turn_start)
+    if not bounds:
+        return messages
+    start, end = bounds[-1]
+    result = list(messages)
+    for i in range(start, end):
+        msg = result[i]
+        content = msg.get("content") or ""
+        if msg.get("role") == "tool" and len(content) > _LATEST_RESULT_CHARS:
+            result[i] = _with(msg, content=_truncated(content, _LATEST_RESULT_CHARS))
+    return result
+
+
+def stripped_tool_call_ids(original: list[dict], stripped: list[dict]) -> set[str]:
+    """
+    tool_call_ids of the tool results in original that stripped does not
+    carry unchanged (cut, stubbed to "Tool Successful", folded or dropped).
+    Relies on stripping being copy-on-write: untouched messages are shared.
+    """
+    if stripped is original:
+        return set()
+    kept = {id(msg) for msg in stripped}
+    return {
+        msg.get("tool_call_id", "") for msg in original
+        if msg.get("role") == "tool" and id(msg) not in kept
+    }
+
+
+def strip_to_budget(
+    messages: list[dict],
+    tool_map: dict,
+    budget=None,
+    assistant_truncation_chars: int | None = None,
+    current_turn_start: int | None = None,
+    min_level: int = 0,
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Escalate through STRIP_LEVELS until budget.fits(payload) (a TokenBudget),
+    applying at least the first min_level levels.
+
+    Returns (payload, name of the last level applied or None).  Without a
+    budget (or when the model's window is unknown) only the first min_level
+    levels are applied.  If even the last level does not fit, its output is
+    returned and the provider gets to decide.
+
+    current_turn_start is the index of the current turn's user message;
+    inferred from the payload layout when not given.
+    """
+    can_measure = budget is not None and budget.limit is not None
+    if min_level <= 0 and (budget is None or budget.fits(messages)):
+        return messages, None
+
+    policies = _resolve_policies(messages, tool_map)
+    turn_start = current_turn_start if current_turn_start is not None else infer_current_turn_start(messages)
+    history_start = 1 if messages and messages[0].get("role") == "system" else 0
+    droppable_turns = max(0, (turn_start - history_start) // 2)
+
+    ladder_truncation = (
+        _LADDER_ASSISTANT_TRUNCATION if assistant_truncation_chars is None
+        else min(assistant_truncation_chars, _LADDER_ASSISTANT_TRUNCATION)
+    )
+
+    current = messages
+    for level_idx, level in enumerate(STRIP_LEVELS):
+        if level == "policies":
+            current = _apply_policies(messages, policies, assistant_truncation_chars)
+        elif level == "short":
+            current = _apply_policies(messages, policies, ladder_truncation, short_scale=_SHORT_SCALE)
+        elif level == "params_only":
+            current = _params_only_older(current, turn_start)
+        elif level == "fold":
+            current = _fold_exchanges(current, turn_start, policies)
+        elif level == "drop_turns":
+            # Drop completed turns one (user, assistant) pair at a time.
+            # Below min_level a fitting candidate is not enough: the caller
+            # already sent this level and was rejected.
+            for dropped in range(1, droppable_turns + 1):
+                candidate = current[:history_start] + current[history_start + 2 * dropped:]
+                if level_idx + 1 >= min_level and can_measure and budget.fits(candidate):
+                    return candidate, level
+            current = current[:history_start] + current[history_start + 2 * droppable_turns:]
+            turn_start -= 2 * droppable_turns
+        elif level == "truncate_latest":
+            current = _truncate_latest(current, turn_start)
+
+        if level_idx + 1 < min_level:
+            continue
+        if not can_measure or budget.fits(current):
+            return current, level
+
+    return current, STRIP_LEVELS[-1]
@@ -1,9 +1,48 @@
+"""
+Per-session replay log of socket events (Redis Stream session:{id}:events).
+
+log_event() appends one event in a single round trip.  EventLogWriter is the
+hot-path writer used by the UI connector: it assigns stream IDs itself, so
+the ID can be sent to the client with the event right away, and writes the
+buffered events of a session in one pipelined batch (XADDs, one EXPIRE, and
+any pending compaction) every SLBP_EVENT_LOG_FLUSH_MS, when
+SLBP_EVENT_LOG_BATCH events are waiting, or at a turn boundary (end()).
+
+Explicit IDs must be greater than the stream's last ID, which another
+process may have written, so the first event a writer logs for a session
+(and the first after each end()) goes through log_event() and seeds the
+sequence from the ID Redis assigned.  After that IDs are
+max(now_ms, last_ms)-seq, strictly increasing within the session.  Should
+Redis still reject one, it is re-added with an auto ID and a warning is
+printed: that event keeps its place in the stream but not its client-side ID.
+
+The stream is capped at about SLBP_EVENT_LOG_MAXLEN entries (MAXLEN ~).
+compact() additionally trims (MINID ~) the events of turns that precede a
+given ID: once a turn is completed and saved, the session snapshot that
+resume_session sends covers everything before it, so replay only needs the
+most recent turn's events onward.
+
+replay_content_snapshot events carry the text streamed so far by one LLM
+call.  ContentSnapshotEncoder stores them as appended deltas, with a full
+keyframe first and every keyframe_every snapshots, instead of the whole text
+each time; replay rebuilds full snapshots for the client, reading back to
+the nearest keyframe when the requested range starts inside a delta chain.
+
+Replay (iter_event_pages) reads the stream in bounded XRANGE ... COUNT pages
+and, within each page, drops events that a later one supersedes (only the
+latest snapshot of an exchange, todo list of a turn and pwd are kept).
+"""
 from __future__ import annotations
 
-import json
+import os
+import threading
+import time
+from typing import Iterator
 
 import redis
 
+from src.utils.storage_codec import decode, encode
+
 # Events excluded from the replay log (too high-volume or not meaningful on replay)
 REPLAY_EXCLUDED_EVENTS = {
     "token",
@@ -14,53 +53,345 @@ REPLAY_EXCLUDED_EVENTS = {
     "backend_log",
 }
 
+CONTENT_SNAPSHOT_EVENT = "replay_content_snapshot"
+
 _SESSION_EVENTS_TTL = 3600
+_MAXLEN = int(os.environ.get("SLBP_EVENT_LOG_MAXLEN", "10000"))
+_FLUSH_S = int(os.environ.get("SLBP_EVENT_LOG_FLUSH_MS", "50")) / 1000
+_BATCH = max(1, int(os.environ.get("SLBP_EVENT_LOG_BATCH", "64")))
+# Entries read per XREVRANGE while looking for a snapshot keyframe
+_KEYFRAME_SCAN_PAGE = 200
 
 
 def _stream_key(session_id: str) -> str:
     return f"session:{session_id}:events"
 
 
+def _str(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
 def log_event(r: redis.Redis, session_id: str, event_type: str, data: dict) -> str:
     """
     Append an event to the Redis Stream for this session.
+    data is stored with storage_codec.
     Returns the Redis Streams auto-generated ID (e.g. "1234567890123-0").
     """
     key = _stream_key(session_id)
-    stream_id = r.xadd(key, {"type": event_type, "data": json.dumps(data)})
-    r.expire(key, _SESSION_EVENTS_TTL)
-    return stream_id  # type: ignore[return-value]
+    pipe = r.pipeline(transaction=False)
+    pipe.xadd(key, {"type": event_type, "data": encode(data)}, maxlen=_MAXLEN, approximate=True)
+    pipe.expire(key, _SESSION_EVENTS_TTL)
+    stream_id, _ = pipe.execute()
+    return _str(stream_id)
 
 
-def get_events_since(r: redis.Redis, session_id: str, last_id: str) -> list[dict]:
+class _SessionLog:
+    __slots__ = ("last_ms", "last_seq", "pending", "compact_to")
+
+    def __init__(self, last_id: str) -> None:
+        ms, seq = last_id.split("-")
+        self.last_ms, self.last_seq = int(ms), int(seq)
+        self.pending: list[tuple[str, dict]] = []
+        self.compact_to: str | None = None
+
+    def next_id(self) -> str:
+        now_ms = int(time.time() * 1000)
+        if now_ms > self.last_ms:
+            self.last_ms, self.last_seq = now_ms, 0
+        else:
+            self.last_seq += 1
+        return f"{self.last_ms}-{self.last_seq}"
+
+
+class EventLogWriter:
+    """
+    Buffered, pipelined event logging for many sessions (see module docstring).
+
+    With write_through, log() writes each event before returning.  Needed
+    when the process emitting the events is not the one a reconnecting
+    client resumes from: that one can only replay what is already in the
+    stream, so events must not be emitted live while still buffered.
+    """
+
+    def __init__(self, r: redis.Redis, write_through: bool = False) -> None:
+        self._r = r
+        self._write_through = write_through
+        self._lock = threading.Lock()
+        self._sessions: dict[str, _SessionLog] = {}
+        # Serializes flushes so batches of one session reach Redis in ID order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def log(self, session_id: str, event_type: str, data: dict) -> str:
+        """Queue an event; returns its stream ID."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                event_id = state.next_id()
+                state.pending.append((event_id, {"type": event_type, "data": encode(data)}))
+                full = self._write_through or len(state.pending) >= _BATCH
+                self._ensure_flusher()
+                self._wake.set()
+        if state is None:
+            return self._seed(session_id, event_type, data)
+        if full:
+            self.flush(session_id)
+        return event_id
+
+    def _seed(self, session_id: str, event_type: str, data: dict) -> str:
+        event_id = log_event(self._r, session_id, event_type, data)
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                self._sessions[session_id] = _SessionLog(event_id)
+            elif (state.last_ms, state.last_seq) < tuple(map(int, event_id.split("-"))):
+                # Another thread seeded meanwhile; never hand out IDs below this one
+                state.last_ms, state.last_seq = map(int, event_id.split("-"))
+        return event_id
+
+    def compact(self, session_id: str, min_id: str) -> None:
+        """Trim the session's events older than min_id with its next flush."""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                state.compact_to = min_id
+                self._ensure_flusher()
+                self._wake.set()
+                return
+        self._r.xtrim(_stream_key(session_id), minid=min_id, approximate=True)
+
+    def flush(self, session_id: str | None = None) -> None:
+        """Write what is buffered for session_id (or for every session)."""
+        with self._flush_lock:
+            with self._lock:
+                ids = [session_id] if session_id is not None else list(self._sessions)
+                batches = []
+                for sid in ids:
+                    state = self._sessions.get(sid)
+                    if state is not None and (state.pending or state.compact_to):
+                        batches.append((sid, state.pending, state.compact_to))
+                        state.pending, state.compact_to = [], None
+            for sid, pending, compact_to in batches:
+                self._write(sid, pending, compact_to)
+
+    def end(self, session_id: str) -> None:
+        """Turn boundary: flush the session and re-seed its IDs on the next event."""
+        self.flush(session_id)
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None and not state.pending and not state.compact_to:
+                del self._sessions[session_id]
+
+    def _write(self, session_id: str, pending: list[tuple[str, dict]], compact_to: str | None) -> None:
+        key = _stream_key(session_id)
+        pipe = self._r.pipeline(transaction=False)
+        for event_id, fields in pending:
+            pipe.xadd(key, fields, id=event_id, maxlen=_MAXLEN, approximate=True)
+        if compact_to:
+            pipe.xtrim(key, minid=compact_to, approximate=True)
+        pipe.expire(key, _SESSION_EVENTS_TTL)
+        try:
+            results = pipe.execute(raise_on_error=False)
+            for (event_id, fields), result in zip(pending, results):
+                if isinstance(result, Exception):
+                    new_id = _str(self._r.xadd(key, fields, maxlen=_MAXLEN, approximate=True))
+                    print(f"[event_log] Event {event_id} of session {session_id} rejected ({result}); "
+                          f"logged as {new_id}", flush=True)
+        except redis.exceptions.RedisError as exc:
+            print(f"[event_log] Failed to write {len(pending)} event(s) of session {session_id}: {exc}",
+                  flush=True)
+
+    def _ensure_flusher(self) -> None:
+        # Called with self._lock held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="event-log-flush", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(_FLUSH_S)
+            try:
+                self.flush()
+            except Exception as exc:
+                print(f"[event_log] Flush failed: {exc}", flush=True)
+
+
+def iter_event_pages(
+    r: redis.Redis, session_id: str, last_id: str, page_size: int = 200, collapse: bool = True,
+) -> Iterator[tuple[list[dict], str]]:
     """
-    Return all events after last_id (exclusive).
+    Yield the events after last_id (exclusive) as (events, cursor) pages, one
+    XRANGE ... COUNT page_size at a time.  cursor is the stream ID of the
+    page's last entry: resuming from it continues after this page.
     last_id should be a Redis Stream ID like "1234567890123-0" or "0-0" for all events.
-    Returns list of dicts: [{id, type, data: dict}, ...].
+    Events are dicts {id, type, data: dict}; content snapshots come back
+    whole (see ContentSnapshotEncoder).  With collapse, an event superseded by
+    a later one in the same page (_SUPERSEDED) is left out.
+    r must return bytes (redis_client.get_redis_binary()): data is binary.
     """
     key = _stream_key(session_id)
-    # XRANGE with exclusive start requires "(" prefix — use the helper below.
+    # XRANGE with exclusive start requires "(" prefix.
     # If last_id is "0-0" we want everything, so use "0" as the start.
-    if last_id in ("0-0", "0"):
-        start = "0"
-    else:
-        # Redis Streams exclusive range: "(id" syntax (redis-py supports this)
-        start = f"({last_id}"
+    start = "0" if last_id in ("0-0", "0") else f"({last_id}"
+    snapshot_text: dict[tuple, tuple[str, str] | None] = {}
+    while True:
+        try:
+            entries = r.xrange(key, min=start, max="+", count=page_size)
+        except redis.ResponseError:
+            return
+        if not entries:
+            return
+        events = [
+            {
+                "id": entry_id.decode(),
+                "type": fields.get(b"type", b"").decode(),
+                "data": _decode_data(fields),
+            }
+            for entry_id, fields in entries
+        ]
+        cursor = events[-1]["id"]
+        events = _resolve_content_snapshots(r, key, events, snapshot_text)
+        yield (_collapse(events) if collapse else events), cursor
+        if len(entries) < page_size:
+            return
+        start = f"({cursor}"
+
+
+def get_events_since(r: redis.Redis, session_id: str, last_id: str) -> list[dict]:
+    """All events after last_id (exclusive), read page by page (see iter_event_pages)."""
+    return [ev for events, _ in iter_event_pages(r, session_id, last_id) for ev in events]
+
+
+# Replay events whose effect on the client is entirely replaced by a later
+# event of the same type and key
+_SUPERSEDED = {
+    CONTENT_SNAPSHOT_EVENT: lambda data: (data.get("turn_id"), data.get("exchange_idx")),
+    "todo_list_update": lambda data: data.get("turn_id"),
+    "pwd_update": lambda data: None,
+}
+
+
+def _collapse(events: list[dict]) -> list[dict]:
+    latest: dict[tuple, int] = {}
+    for i, ev in enumerate(events):
+        key_of = _SUPERSEDED.get(ev["type"])
+        if key_of is not None:
+            latest[(ev["type"], key_of(ev["data"]))] = i
+    keep = set(latest.values())
+    return [ev for i, ev in enumerate(events) if ev["type"] not in _SUPERSEDED or i in keep]
+
 
+def _decode_data(fields: dict) -> dict:
     try:
-        entries = r.xrange(key, min=start, max="+")
-    except redis.ResponseError:
-        return []
+        return decode(fields.get(b"data"), {})
+    except (ValueError, TypeError):
+        return {}
 
-    result = []
-    for entry_id, fields in entries:
-        try:
-            data = json.loads(fields.get("data", "{}"))
-        except (json.JSONDecodeError, TypeError):
-            data = {}
-        result.append({
-            "id": entry_id,
-            "type": fields.get("type", ""),
-            "data": data,
-        })
-    return result
+
+# ---------------------------------------------------------------------------
+# Content snapshots
+# ---------------------------------------------------------------------------
+
+class ContentSnapshotEncoder:
+    """
+    Turns the full text streamed so far by one LLM call into
+    replay_content_snapshot payloads: a keyframe (the full text) first, every
+    keyframe_every snapshots and whenever the text is not an extension of
+    the previous one; otherwise only what was appended since.
+    """
+
+    def __init__(self, keyframe_every: int = 20) -> None:
+        self._keyframe_every = max(1, keyframe_every)
+        self._since_keyframe: int | None = None
+        self._content = ""
+        self._reasoning = ""
+
+    def encode(self, assistant_content: str, reasoning: str) -> dict:
+        if (
+            self._since_keyframe is None
+            or self._since_keyframe + 1 >= self._keyframe_every
+            or not assistant_content.startswith(self._content)
+            or not reasoning.startswith(self._reasoning)
+        ):
+            data = {"keyframe": True, "assistant_content": assistant_content, "reasoning": reasoning}
+            self._since_keyframe = 0
+        else:
+            data = {
+                "keyframe": False,
+                "content_offset": len(self._content),
+                "assistant_content": assistant_content[len(self._content):],
+                "reasoning_offset": len(self._reasoning),
+                "reasoning": reasoning[len(self._reasoning):],
+            }
+            self._since_keyframe += 1
+        self._content, self._reasoning = assistant_content, reasoning
+        return data
+
+
+def _apply_snapshot(text: tuple[str, str] | None, data: dict) -> tuple[str, str] | None:
+    """(content, reasoning) after snapshot data, or None if its base is missing."""
+    # Snapshots logged before deltas existed have no "keyframe" field and are full
+    if data.get("keyframe", True):
+        return data.get("assistant_content") or "", data.get("reasoning") or ""
+    if text is None or (len(text[0]), len(text[1])) != (data.get("content_offset"), data.get("reasoning_offset")):
+        return None
+    return text[0] + (data.get("assistant_content") or ""), text[1] + (data.get("reasoning") or "")
+
+
+def _snapshot_exchange(data: dict) -> tuple:
+    return data.get("turn_id"), data.get("exchange_idx")
+
+
+def _snapshot_base(r: redis.Redis, key: str, before_id: str, exchange: tuple) -> tuple[str, str] | None:
+    """Text of the exchange's snapshots up to (excluding) before_id, from its nearest keyframe."""
+    chain: list[dict] = []
+    max_id = f"({before_id}"
+    while True:
+        page = r.xrevrange(key, max=max_id, min="-", count=_KEYFRAME_SCAN_PAGE)
+        if not page:
+            return None  # keyframe trimmed away
+        for _, fields in page:
+            if fields.get(b"type") != CONTENT_SNAPSHOT_EVENT.encode():
+                continue
+            data = _decode_data(fields)
+            if _snapshot_exchange(data) != exchange:
+                continue
+            chain.append(data)
+            if data.get("keyframe", True):
+                text = None
+                for d in reversed(chain):
+                    text = _apply_snapshot(text, d)
+                return text
+        max_id = f"({page[-1][0].decode()}"
+
+
+def _resolve_content_snapshots(
+    r: redis.Redis, key: str, events: list[dict], text_by_exchange: dict[tuple, tuple[str, str] | None],
+) -> list[dict]:
+    """
+    Replace snapshot deltas with full snapshots.  text_by_exchange carries
+    each exchange's text from one page to the next.
+    """
+    resolved: list[dict] = []
+    for ev in events:
+        if ev["type"] != CONTENT_SNAPSHOT_EVENT:
+            resolved.append(ev)
+            continue
+        data = ev["data"]
+        exchange = _snapshot_exchange(data)
+        base = text_by_exchange.get(exchange)
+        if exchange not in text_by_exchange and not data.get("keyframe", True):
+            base = _snapshot_base(r, key, ev["id"], exchange)
+        text = text_by_exchange[exchange] = _apply_snapshot(base, data)
+        if text is None:
+            continue
+        resolved.append({**ev, "data": {
+            "turn_id": data.get("turn_id"),
+            "exchange_idx": data.get("exchange_idx"),
+            "assistant_content": text[0],
+            "reasoning": text[1],
+        }})
+    return resolved
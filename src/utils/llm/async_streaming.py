@@ -0,0 +1,336 @@
+"""
+asyncio counterpart to StreamingLLM, built on httpx.AsyncClient.
+
+StreamingLLM parks one OS thread inside its blocking socket read for the whole
+life of every streamed response.  AsyncStreamingLLM instead runs each stream as a
+lightweight task on an event loop, so a single loop can drive hundreds of
+concurrent LLM streams.
+
+Usage mirrors StreamingLLM:
+
+    llm = AsyncStreamingLLM(endpoint, token, model=model)
+    result = await llm.stream(messages, on_data, tools=tools)   # StreamResult
+    result = await llm.fetch(messages)                          # FetchResult
+
+or, to consume deltas as an async iterator:
+
+    delta_stream = llm.open_stream(messages, tools=tools)
+    async for event in delta_stream:        # {"reasoning": ..., "content": ...}
+        ...
+    delta_stream.result                     # StreamResult
+
+DeltaStream.cancel() may be called from any thread (e.g. a cancel_turn socket
+handler).  It cancels the reader task immediately, which closes the socket
+mid-read rather than waiting for the next SSE line to arrive.
+
+Request bodies, timeouts and the record/replay transport (SLBP_LLM_TRANSPORT,
+see cassette.py) behave as in StreamingLLM: bodies are encoded with
+encode_request_body(), a stream waits at most timeout_s (default 60 s) for each
+read, and cassettes are shared between the two clients.
+
+HTTP/2 is negotiated when the optional `h2` package is installed
+(pip install httpx[http2]); otherwise the client falls back to pooled
+HTTP/1.1 keep-alive connections.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import weakref
+from numbers import Number
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+from termcolor import colored
+
+from src.utils.llm import cassette
+from src.utils.llm.payload import encode_request_body
+from src.utils.llm.streaming import (
+    FetchResult,
+    StreamAccumulator,
+    StreamResult,
+    ToolCall,
+    _dispatch_sse,
+    build_request_payload,
+    completions_url,
+    parse_fetch_response,
+)
+from src.utils.llm.sse import SSEParser
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+_MAX_CONNECTIONS = int(os.environ.get("SLBP_ASYNC_LLM_MAX_CONNECTIONS", "512"))
+_MAX_KEEPALIVE = int(os.environ.get("SLBP_ASYNC_LLM_MAX_KEEPALIVE", "64"))
+
+# Connect/read timeout of a streamed request when the client has no timeout_s
+_STREAM_TIMEOUT_S = 60
+
+# Sentinel placed on a DeltaStream queue when the reader task finishes.
+_END = object()
+
+
+# ---------------------------------------------------------------------------
+# Shared clients — one per (event loop, endpoint)
+# ---------------------------------------------------------------------------
+
+# httpx.AsyncClient connections are bound to the loop that opened them, so the
+# pool is keyed by loop as well as endpoint.  Loops are held weakly: a closed
+# loop's clients go away with it, and a new loop (even one that reuses the
+# old one's id()) never gets them.
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client(endpoint: str) -> httpx.AsyncClient:
+    """Return the shared AsyncClient for this endpoint on the running loop."""
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    key = endpoint.rstrip("/")
+    client = loop_clients.get(key)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=_MAX_CONNECTIONS,
+                max_keepalive_connections=_MAX_KEEPALIVE,
+            ),
+        )
+        loop_clients[key] = client
+    return client
+
+
+async def close_async_clients() -> None:
+    """Close every shared client that belongs to the running loop."""
+    loop_clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in loop_clients.values():
+        await client.aclose()
+
+
+# ---------------------------------------------------------------------------
+# Delta stream
+# ---------------------------------------------------------------------------
+
+class DeltaStream:
+    """
+    Async iterator over {"reasoning", "content"} events of one streamed
+    response.  The HTTP read runs in its own task and hands events over an
+    asyncio.Queue, so cancel() can abort the read without cancelling whoever
+    is iterating.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        payload: dict,
+        headers: dict,
+        timeout_s: Number = _STREAM_TIMEOUT_S,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_tool_call_start: Optional[Callable[[], None]] = None,
+        on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None,
+    ) -> None:
+        self._client = client
+        self._url = url
+        self._payload = payload
+        self._headers = headers
+        self._timeout_s = timeout_s
+        self._is_cancelled = is_cancelled
+        self._accumulator = StreamAccumulator(
+            on_tool_call_start=on_tool_call_start,
+            on_tool_call_ready=on_tool_call_ready,
+        )
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._error: BaseException | None = None
+        self.cancelled = False
+        self.result: StreamResult | None = None
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._read())
+
+    async def _read(self) -> None:
+        try:
+            mode = cassette.transport_mode()
+            if mode == cassette.TRANSPORT_REPLAY:
+                await self._consume(cassette.areplay_stream(self._payload, self._url))
+                return
+
+            started = time.monotonic()
+            async with self._client.stream(
+                "POST", self._url, content=encode_request_body(self._payload),
+                headers=self._headers, timeout=httpx.Timeout(self._timeout_s),
+            ) as r:
+                if r.status_code != 200:
+                    await r.aread()
+                    print(colored(r.text, "red"))
+                    if mode == cassette.TRANSPORT_RECORD:
+                        cassette.record_response(self._payload, r, stream=True)
+                r.raise_for_status()
+
+                chunks = r.aiter_bytes()
+                if mode == cassette.TRANSPORT_RECORD:
+                    chunks = cassette.arecord_stream(self._payload, chunks, started)
+                await self._consume(chunks)
+        except asyncio.CancelledError:
+            self.cancelled = True
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self.result = self._accumulator.result()
+            self._queue.put_nowait(_END)
+
+    async def _consume(self, chunks: AsyncIterator[bytes]) -> None:
+        """
+        Parse SSE body chunks onto the queue until [DONE], end of body or
+        cancellation, then close the chunk iterator.
+        """
+        parser = SSEParser()
+        try:
+            async for chunk in chunks:
+                if self._is_cancelled and self._is_cancelled():
+                    self.cancelled = True
+                    return
+                _dispatch_sse(parser.feed(chunk), self._accumulator, self._queue.put_nowait)
+                if parser.done:
+                    return
+            # Body ended without [DONE]: a last data: line may lack its newline
+            _dispatch_sse(parser.close(), self._accumulator, self._queue.put_nowait)
+        finally:
+            await chunks.aclose()
+
+    def cancel(self) -> None:
+        """Abort the stream now.  Safe to call from any thread, any number of times."""
+        task, loop = self._task, self._loop
+        if task is not None and task.done():
+            return
+        self.cancelled = True
+        if task is None or loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            task.cancel()
+        else:
+            loop.call_soon_threadsafe(task.cancel)
+
+    def __aiter__(self) -> AsyncIterator[dict]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[dict]:
+        self._start()
+        while True:
+            item = await self._queue.get()
+            if item is _END:
+                break
+            yield item
+        if self._error is not None:
+            raise self._error
+
+    async def aclose(self) -> None:
+        """Cancel (if still running) and wait for the reader task to finish."""
+        self.cancel()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class AsyncStreamingLLM:
+
+    _endpoint: str
+    _token: str
+    _model: Optional[str]
+    _default_parameters: dict
+    _timeout_s: Optional[Number]
+
+    def __init__(
+        self, endpoint, token, timeout_s=None, model=None, default_parameters={}
+    ):
+        self._endpoint = endpoint
+        self._token = token
+        self._model = model
+        self._default_parameters = default_parameters
+        self._timeout_s = timeout_s
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self._token}", "Content-Type": "application/json"}
+
+    def open_stream(self, messages, max_tokens=None, parameters={},
+                    tools: Optional[list[dict]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None,
+                    on_tool_call_start: Optional[Callable[[], None]] = None,
+                    on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None) -> DeltaStream:
+        """Start a streamed request; iterate the returned DeltaStream for deltas."""
+        payload = build_request_payload(
+            messages, stream=True, model=self._model,
+            default_parameters=self._default_parameters,
+            max_tokens=max_tokens, parameters=parameters, tools=tools,
+        )
+        delta_stream = DeltaStream(
+            get_async_client(self._endpoint), completions_url(self._endpoint),
+            payload, self._headers(),
+            timeout_s=self._timeout_s if self._timeout_s is not None else _STREAM_TIMEOUT_S,
+            is_cancelled=is_cancelled,
+            on_tool_call_start=on_tool_call_start,
+            on_tool_call_ready=on_tool_call_ready,
+        )
+        delta_stream._start()
+        return delta_stream
+
+    async def stream(self, messages, on_data: Callable[[dict], None],
+                     max_tokens=None, parameters={},
+                     tools: Optional[list[dict]] = None,
+                     is_cancelled: Optional[Callable[[], bool]] = None,
+                     on_tool_call_start: Optional[Callable[[], None]] = None,
+                     on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None) -> StreamResult:
+        delta_stream = self.open_stream(
+            messages, max_tokens=max_tokens, parameters=parameters,
+            tools=tools, is_cancelled=is_cancelled,
+            on_tool_call_start=on_tool_call_start,
+            on_tool_call_ready=on_tool_call_ready,
+        )
+        try:
+            async for event_data in delta_stream:
+                on_data(event_data)
+        finally:
+            await delta_stream.aclose()
+        return delta_stream.result or StreamResult()
+
+    async def fetch(self, messages, max_tokens=None, parameters={},
+                    tools: Optional[list[dict]] = None) -> FetchResult:
+        """Non-streaming request — returns the full response in one shot."""
+        payload = build_request_payload(
+            messages, stream=False, model=self._model,
+            default_parameters=self._default_parameters,
+            max_tokens=max_tokens, parameters=parameters, tools=tools,
+        )
+        url = completions_url(self._endpoint)
+        mode = cassette.transport_mode()
+        if mode == cassette.TRANSPORT_REPLAY:
+            return parse_fetch_response(cassette.replay_response(payload, url))
+
+        r = await get_async_client(self._endpoint).post(
+            url,
+            content=encode_request_body(payload),
+            headers=self._headers(),
+            timeout=self._timeout_s,
+        )
+        if r.status_code != 200:
+            print(colored(r.text, "red"))
+        if mode == cassette.TRANSPORT_RECORD:
+            cassette.record_response(payload, r, stream=False)
+        r.raise_for_status()
+
+        return parse_fetch_response(r.json())
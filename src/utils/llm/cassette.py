@@ -0,0 +1,247 @@
+"""
+Record/replay transport for StreamingLLM and AsyncStreamingLLM.
+
+Selected by SLBP_LLM_TRANSPORT (or `slbp server run --llm-transport`):
+
+  live     (default) talk to the provider
+  record   talk to the provider and save every request/response pair
+  replay   never touch the network; serve saved responses instead
+
+Cassettes are content-addressed: the file name is the SHA-256 of the canonical
+JSON of the request payload (model, params, messages, tools, stream flag), so
+the same agentic loop issuing the same requests finds the same responses.
+Credentials and endpoint URL are not part of the key, so replay works with
+whichever token is active as long as the model and params match the recording.
+
+Layout:  <SLBP_LLM_CASSETTE_DIR>/<key[:2]>/<key>.jsonl
+  line 1   {"version": 1, "key", "status", "stream", "recorded_at", "request"}
+  line 2+  streamed:  {"t": seconds since request start, "b64": raw body chunk}
+           otherwise: {"body": response body}
+
+Replay reproduces the recorded inter-chunk timing (including time to first
+byte), divided by SLBP_LLM_REPLAY_SPEED: 1 = original pacing, 10 = ten times
+faster, 0 = no delays at all.  Recorded non-200 responses are replayed as
+requests.HTTPError (by both clients), so retry/strip paths behave as they did
+live.  arecord_stream() / areplay_stream() are the async iterator versions
+used by AsyncStreamingLLM; they share the cassette format.  A request
+with no cassette raises CassetteMissError.
+
+Only complete responses are saved: a stream that is cancelled before its
+[DONE] sentinel leaves no cassette behind.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+import requests
+
+from src.utils.llm.payload import canonical_json
+
+TRANSPORT_LIVE = "live"
+TRANSPORT_RECORD = "record"
+TRANSPORT_REPLAY = "replay"
+TRANSPORTS = (TRANSPORT_LIVE, TRANSPORT_RECORD, TRANSPORT_REPLAY)
+
+_FORMAT_VERSION = 1
+_DEFAULT_DIR = Path(__file__).resolve().parent.parent.parent.parent / "cassettes"
+_DONE_MARKER = b"[DONE]"
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode when no cassette exists for a request payload."""
+
+    def __init__(self, key: str, path: Path) -> None:
+        super().__init__(f"No LLM cassette for request {key[:12]}… (expected {path})")
+        self.key = key
+        self.path = path
+
+
+def transport_mode() -> str:
+    mode = os.environ.get("SLBP_LLM_TRANSPORT", TRANSPORT_LIVE).strip().lower() or TRANSPORT_LIVE
+    if mode not in TRANSPORTS:
+        raise ValueError(f"SLBP_LLM_TRANSPORT must be one of {', '.join(TRANSPORTS)} (got {mode!r})")
+    return mode
+
+
+def cassette_dir() -> Path:
+    return Path(os.environ.get("SLBP_LLM_CASSETTE_DIR") or _DEFAULT_DIR)
+
+
+def replay_speed() -> float:
+    return float(os.environ.get("SLBP_LLM_REPLAY_SPEED", "1"))
+
+
+def cassette_key(payload: dict) -> str:
+    return hashlib.sha256(canonical_json(payload).encode("utf-8")).hexdigest()
+
+
+def cassette_path(key: str) -> Path:
+    return cassette_dir() / key[:2] / f"{key}.jsonl"
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _write_cassette(payload: dict, status: int, stream: bool, lines: list[dict]) -> None:
+    key = cassette_key(payload)
+    path = cassette_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {
+        "version": _FORMAT_VERSION, "key": key, "status": status, "stream": stream,
+        "recorded_at": time.time(), "request": payload,
+    }
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class _StreamCapture:
+    """Body chunks of one streamed response with their arrival times."""
+
+    def __init__(self, payload: dict, started: float) -> None:
+        self._payload = payload
+        self._started = started
+        self._captured: list[dict] = []
+        self._tail = b""
+        self._saw_done = False
+
+    def add(self, chunk: bytes) -> None:
+        data = bytes(chunk)
+        self._captured.append({
+            "t": round(time.monotonic() - self._started, 6),
+            "b64": base64.b64encode(data).decode("ascii"),
+        })
+        if not self._saw_done:
+            self._saw_done = _DONE_MARKER in self._tail + data
+            self._tail = data[-len(_DONE_MARKER):]
+
+    def save(self, finished: bool) -> None:
+        if finished or self._saw_done:
+            _write_cassette(self._payload, 200, True, self._captured)
+
+
+def record_stream(payload: dict, chunks: Iterable[bytes], started: float) -> Iterator[bytes]:
+    """
+    Pass chunks through unchanged while capturing them with their arrival
+    time; write the cassette once the stream has delivered [DONE] (or ended).
+    """
+    capture = _StreamCapture(payload, started)
+    finished = False
+    try:
+        for chunk in chunks:
+            capture.add(chunk)
+            yield chunk
+        finished = True
+    finally:
+        capture.save(finished)
+
+
+async def arecord_stream(payload: dict, chunks: AsyncIterable[bytes], started: float) -> AsyncIterator[bytes]:
+    """record_stream() for an async chunk iterator."""
+    capture = _StreamCapture(payload, started)
+    finished = False
+    try:
+        async for chunk in chunks:
+            capture.add(chunk)
+            yield chunk
+        finished = True
+    finally:
+        capture.save(finished)
+
+
+def record_response(payload: dict, r: requests.Response, stream: bool) -> None:
+    """Save a complete (non-streamed or error) response; r may also be an httpx.Response."""
+    _write_cassette(payload, r.status_code, stream, [{"body": r.text}])
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+def _load(payload: dict) -> tuple[dict, list[dict]]:
+    key = cassette_key(payload)
+    path = cassette_path(key)
+    try:
+        with open(path, encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            lines = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        raise CassetteMissError(key, path) from None
+    return header, lines
+
+
+def _raise_for_status(header: dict, lines: list[dict], url: str) -> None:
+    status = header.get("status", 200)
+    if status == 200:
+        return
+    body = lines[0].get("body", "") if lines else ""
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body.encode("utf-8")
+    resp.encoding = "utf-8"
+    resp.url = url
+    resp.raise_for_status()
+
+
+def replay_stream(payload: dict, url: str) -> Iterator[bytes]:
+    """
+    Yield the recorded body chunks of a streamed response with the recorded
+    timing (scaled by SLBP_LLM_REPLAY_SPEED).  Raises CassetteMissError, or
+    requests.HTTPError for a recorded error response, before yielding.
+    """
+    header, lines = _load(payload)
+    _raise_for_status(header, lines, url)
+    return _paced_chunks(lines, replay_speed())
+
+
+def _paced_chunks(lines: list[dict], speed: float) -> Iterator[bytes]:
+    started = time.monotonic()
+    for line in lines:
+        if speed > 0:
+            delay = line["t"] / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        yield base64.b64decode(line["b64"])
+
+
+def areplay_stream(payload: dict, url: str) -> AsyncIterator[bytes]:
+    """replay_stream() as an async iterator, pacing with asyncio.sleep."""
+    header, lines = _load(payload)
+    _raise_for_status(header, lines, url)
+    return _apaced_chunks(lines, replay_speed())
+
+
+async def _apaced_chunks(lines: list[dict], speed: float) -> AsyncIterator[bytes]:
+    started = time.monotonic()
+    for line in lines:
+        if speed > 0:
+            delay = line["t"] / speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        yield base64.b64decode(line["b64"])
+
+
+def replay_response(payload: dict, url: str) -> dict:
+    """Return the recorded JSON body of a non-streamed response."""
+    header, lines = _load(payload)
+    _raise_for_status(header, lines, url)
+    return json.loads(lines[0]["body"])
@@ -1,65 +1,129 @@
 from __future__ import annotations
 
+import copy
+import json
+import os
+import threading
+import time
+
 from src.data import get_pool
-from src.utils.sql.kv_manager import KVManager
+from src.utils.llm.router import Endpoint, RoutedStreamingLLM
 from src.utils.llm.streaming import StreamingLLM
 
+# Redis key holding the LLM config version.  `slbp token/param/model` bump it
+# after every change; each process re-reads MySQL only when it moves.
+CONFIG_VERSION_KEY = "slbp:llm_config:version"
 
-def load_llm_config() -> dict | None:
+# When Redis cannot be reached, cached config is trusted for this long instead.
+_FALLBACK_TTL_S = float(os.environ.get("SLBP_LLM_CONFIG_TTL", "5"))
+
+_CONFIG_SQL = """
+SELECT kv.`key`, kv.`value`, t.token_value, t.endpoint_url
+FROM kv_store kv
+LEFT JOIN tokens t
+  ON kv.`key` = 'active_token'
+ AND BINARY t.provider = BINARY JSON_UNQUOTE(JSON_EXTRACT(kv.`value`, '$.provider'))
+ AND BINARY t.token_name = BINARY COALESCE(JSON_UNQUOTE(JSON_EXTRACT(kv.`value`, '$.name')), '')
+WHERE kv.`key` IN ('active_token', 'model', 'token_pool') OR kv.`key` LIKE 'params.%'
+"""
+
+_POOL_TOKENS_SQL = "SELECT provider, token_name, token_value, endpoint_url FROM tokens"
+
+_cache_lock = threading.Lock()
+_cached_config: dict | None = None
+_cached_version: str | None = None
+_cached_at: float = 0.0
+_cache_valid = False
+
+
+def _config_version() -> str | None:
+    """Current config version from Redis ("0" if never bumped), or None if Redis is unavailable."""
+    try:
+        from src.utils.redis_client import get_redis
+        return get_redis().get(CONFIG_VERSION_KEY) or "0"
+    except Exception:
+        return None
+
+
+def bump_llm_config_version() -> None:
     """
-    Read the active token, endpoint, model, and params from the DB.
-    Returns a dict with keys: endpoint_url, token_value, model, model_params,
-    system_params — or None if no active token/endpoint is configured.
+    Invalidate every process's cached LLM config.  Called by the CLI after it
+    commits a token/param/model change.  Best-effort: if Redis is down no
+    server can be running against it, and caches expire after _FALLBACK_TTL_S.
     """
     try:
-        pool = get_pool()
+        from src.utils.redis_client import get_redis
+        get_redis().incr(CONFIG_VERSION_KEY)
     except Exception as exc:
-        print(f"[factory] DB pool error: {exc}")
-        return None
+        print(f"[factory] Could not bump LLM config version: {exc}")
 
-    with pool.get_connection() as conn:
-        kv = KVManager(conn)
-        active_token = kv.get_value("active_token")
-        if not active_token:
-            return None
 
-        provider = active_token["provider"]
-        token_name = active_token.get("name", "")
+def _decode(value):
+    # mysql-connector may return JSON as str or already-decoded python objects
+    return json.loads(value) if isinstance(value, (str, bytes, bytearray)) else value
 
+
+def _read_llm_config() -> dict | None:
+    """Read the active token, endpoint, model and params in a single query."""
+    pool = get_pool()
+    with pool.get_connection() as conn:
         with conn.cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT token_value, endpoint_url
-                FROM tokens
-                WHERE BINARY provider = BINARY %s
-                  AND BINARY token_name = BINARY %s
-                LIMIT 1
-                """,
-                (provider, token_name),
-            )
-            row = cursor.fetchone()
-
-        if not row:
-            return None
+            cursor.execute(_CONFIG_SQL)
+            rows = cursor.fetchall()
 
-        token_value, endpoint_url = row
-
-        model = kv.get_value("model") or None
-        param_keys = kv.list_keys(prefix="params.")
-        model_params = {
-            k[len("params.model."):]: kv.get_value(k)
-            for k in param_keys if k.startswith("params.model.")
-        }
-        extra = model_params.pop("request_extra_params", None)
-        if extra:
-            model_params.update(extra)
-        system_params = {
-            k[len("params.system."):]: kv.get_value(k)
-            for k in param_keys if k.startswith("params.system.")
-        }
-
-    if not token_value or not endpoint_url:
-        return None
+            active_token = None
+            token_value = endpoint_url = None
+            model = None
+            token_pool: list[dict] = []
+            params: dict[str, object] = {}
+            for key, raw_value, row_token_value, row_endpoint_url in rows:
+                value = _decode(raw_value)
+                if key == "active_token":
+                    active_token = value
+                    if row_token_value is not None and token_value is None:
+                        token_value, endpoint_url = row_token_value, row_endpoint_url
+                elif key == "model":
+                    model = value or None
+                elif key == "token_pool":
+                    token_pool = value or []
+                else:
+                    params[key] = value
+
+            if not active_token or not token_value or not endpoint_url:
+                return None
+
+            members: list[dict] = []
+            if token_pool:
+                cursor.execute(_POOL_TOKENS_SQL)
+                by_key = {(p, n): (v, u) for p, n, v, u in cursor.fetchall()}
+                members.append({
+                    "provider": active_token["provider"], "name": active_token.get("name", ""),
+                    "endpoint_url": endpoint_url, "token_value": token_value, "model": None,
+                })
+                for entry in token_pool:
+                    pair = (entry["provider"], entry.get("name", ""))
+                    if pair == (members[0]["provider"], members[0]["name"]) and not entry.get("model"):
+                        continue
+                    row = by_key.get(pair)
+                    if row is None or not row[1]:
+                        print(f"[factory] Skipping pool member {pair[0]}/{pair[1]}: no such token or no endpoint")
+                        continue
+                    members.append({
+                        "provider": pair[0], "name": pair[1],
+                        "endpoint_url": row[1], "token_value": row[0], "model": entry.get("model"),
+                    })
+
+    model_params = {
+        k[len("params.model."):]: v
+        for k, v in sorted(params.items()) if k.startswith("params.model.")
+    }
+    extra = model_params.pop("request_extra_params", None)
+    if extra:
+        model_params.update(extra)
+    system_params = {
+        k[len("params.system."):]: v
+        for k, v in sorted(params.items()) if k.startswith("params.system.")
+    }
 
     return {
         "endpoint_url": endpoint_url,
@@ -67,20 +131,66 @@ def load_llm_config() -> dict | None:
         "model": model,
         "model_params": model_params,
         "system_params": system_params,
+        "pool": members,
     }
 
 
-def make_llm(timeout_s: float | None = None) -> StreamingLLM | None:
+def load_llm_config() -> dict | None:
     """
-    Create a StreamingLLM instance from the currently active DB config.
-    Returns None if no active token/endpoint is configured.
+    Read the active token, endpoint, model, and params from the DB.
+    Returns a dict with keys: endpoint_url, token_value, model, model_params,
+    system_params, pool — or None if no active token/endpoint is configured.
+    pool lists the router members (active token first) and is empty unless
+    tokens were added with `slbp token pool add`.
 
-    timeout_s overrides the default request timeout; pass a small value
-    (e.g. HANG_DECISION_TIMEOUT) for out-of-band decision calls.
+    The result is cached per process and re-read only after a CLI change has
+    bumped CONFIG_VERSION_KEY (one Redis GET per call), or after
+    SLBP_LLM_CONFIG_TTL seconds when Redis is unreachable.  Callers get their
+    own copy.
     """
-    config = load_llm_config()
-    if config is None:
-        return None
+    global _cached_config, _cached_version, _cached_at, _cache_valid
+    version = _config_version()
+    with _cache_lock:
+        if _cache_valid:
+            if version is not None and version == _cached_version:
+                return copy.deepcopy(_cached_config)
+            if version is None and time.monotonic() - _cached_at < _FALLBACK_TTL_S:
+                return copy.deepcopy(_cached_config)
+
+        try:
+            config = _read_llm_config()
+        except Exception as exc:
+            print(f"[factory] DB pool error: {exc}")
+            return None
+
+        _cached_config = config
+        _cached_version = version
+        _cached_at = time.monotonic()
+        _cache_valid = True
+        return copy.deepcopy(config)
+
+
+def invalidate_llm_config_cache() -> None:
+    """Drop this process's cached config (e.g. in tests or after a direct DB write)."""
+    global _cache_valid
+    with _cache_lock:
+        _cache_valid = False
+
+
+def llm_from_config(config: dict, timeout_s: float | None = None,
+                    on_failover=None) -> StreamingLLM | RoutedStreamingLLM:
+    """
+    Build the LLM client for a loaded config: a RoutedStreamingLLM when a
+    token pool is configured, a plain StreamingLLM otherwise.
+    """
+    if len(config.get("pool") or []) > 1:
+        return RoutedStreamingLLM(
+            [Endpoint(**member) for member in config["pool"]],
+            timeout_s,
+            config["model"],
+            config["model_params"],
+            on_failover=on_failover,
+        )
     return StreamingLLM(
         config["endpoint_url"],
         config["token_value"],
@@ -88,3 +198,17 @@ def make_llm(timeout_s: float | None = None) -> StreamingLLM | None:
         config["model"],
         config["model_params"],
     )
+
+
+def make_llm(timeout_s: float | None = None) -> StreamingLLM | RoutedStreamingLLM | None:
+    """
+    Create an LLM client from the currently active DB config.
+    Returns None if no active token/endpoint is configured.
+
+    timeout_s overrides the default request timeout; pass a small value
+    (e.g. HANG_DECISION_TIMEOUT) for out-of-band decision calls.
+    """
+    config = load_llm_config()
+    if config is None:
+        return None
+    return llm_from_config(config, timeout_s)
@@ -0,0 +1,189 @@
+"""
+Process-wide pool of keep-alive HTTP sessions for LLM endpoints.
+
+Every StreamingLLM instance (including the short-lived ones built by make_llm
+for hang triage) shares one requests.Session per endpoint, so consecutive
+exchanges in the agentic loop reuse an already-open TCP/TLS connection instead
+of paying a fresh handshake on every call.
+
+Each endpoint's connections are instrumented so the pool can report how often
+a request reused a warm connection, how many sockets are currently open, and
+how long the handshakes that did happen took.
+
+HTTP/2 note: requests/urllib3 only speak HTTP/1.1, so concurrency here means
+"several pooled keep-alive connections per endpoint" rather than multiplexed
+streams over one connection.  AsyncStreamingLLM (async_streaming.py)
+negotiates HTTP/2 when the provider offers it.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Max pooled connections kept per endpoint.  One connection is held for the
+# full duration of a streamed response, so this bounds how many concurrent
+# streams to the same provider can run without opening throwaway sockets.
+_POOL_MAXSIZE = int(os.environ.get("SLBP_LLM_POOL_MAXSIZE", "32"))
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    handshakes: int = 0
+    handshake_time_s: float = 0.0
+    live_connections: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        """Fraction of requests that were served on an already-open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1.0 - self.handshakes / self.requests)
+
+    @property
+    def avg_handshake_ms(self) -> float:
+        if not self.handshakes:
+            return 0.0
+        return self.handshake_time_s * 1000 / self.handshakes
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "handshakes": self.handshakes,
+            "reuse_rate": round(self.reuse_rate, 4),
+            "live_connections": self.live_connections,
+            "avg_handshake_ms": round(self.avg_handshake_ms, 2),
+        }
+
+
+class _StatsRecorder:
+    """Thread-safe counters for one endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = PoolStats()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._stats.requests += 1
+
+    def on_connect(self, elapsed_s: float) -> None:
+        with self._lock:
+            self._stats.handshakes += 1
+            self._stats.handshake_time_s += elapsed_s
+            self._stats.live_connections += 1
+
+    def on_close(self) -> None:
+        with self._lock:
+            self._stats.live_connections = max(0, self._stats.live_connections - 1)
+
+    def snapshot(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(**vars(self._stats))
+
+
+class _InstrumentedConnectionMixin:
+    """Times connect() (TCP + TLS) and tracks open sockets for a _StatsRecorder."""
+
+    _slbp_stats: _StatsRecorder
+    _slbp_live: bool = False
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()  # type: ignore[misc]
+        self._slbp_stats.on_connect(time.perf_counter() - started)
+        self._slbp_live = True
+
+    def close(self) -> None:
+        try:
+            super().close()  # type: ignore[misc]
+        finally:
+            if self._slbp_live:
+                self._slbp_live = False
+                self._slbp_stats.on_close()
+
+
+class _InstrumentedAdapter(HTTPAdapter):
+    def __init__(self, stats: _StatsRecorder) -> None:
+        self._slbp_stats = stats
+        super().__init__(pool_connections=1, pool_maxsize=_POOL_MAXSIZE)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        stats = self._slbp_stats
+        http_conn = type("_PooledHTTPConnection", (_InstrumentedConnectionMixin, HTTPConnection), {"_slbp_stats": stats})
+        https_conn = type("_PooledHTTPSConnection", (_InstrumentedConnectionMixin, HTTPSConnection), {"_slbp_stats": stats})
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type("_PooledHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http_conn}),
+            "https": type("_PooledHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https_conn}),
+        }
+
+    def send(self, request, *args, **kwargs):
+        self._slbp_stats.on_request()
+        return super().send(request, *args, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+
+_sessions: dict[str, requests.Session] = {}
+_stats: dict[str, _StatsRecorder] = {}
+_registry_lock = threading.Lock()
+
+
+def _pool_key(endpoint: str) -> str:
+    return endpoint.rstrip("/")
+
+
+def get_session(endpoint: str) -> requests.Session:
+    """Return the shared keep-alive session for this endpoint, creating it on first use."""
+    key = _pool_key(endpoint)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _registry_lock:
+        session = _sessions.get(key)
+        if session is None:
+            stats = _StatsRecorder()
+            adapter = _InstrumentedAdapter(stats)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _stats[key] = stats
+            _sessions[key] = session
+    return session
+
+
+def get_pool_stats() -> dict[str, dict]:
+    """
+    Return {endpoint: stats_dict} for every pooled endpoint.
+    stats_dict keys: requests, handshakes, reuse_rate, live_connections,
+    avg_handshake_ms.
+    """
+    with _registry_lock:
+        items = list(_stats.items())
+    return {k: v.snapshot().to_dict() for k, v in items}
+
+
+def get_endpoint_stats(endpoint: str) -> dict | None:
+    """Return the stats_dict for one endpoint, or None if it has not been used yet."""
+    stats = _stats.get(_pool_key(endpoint))
+    return stats.snapshot().to_dict() if stats is not None else None
+
+
+def close_all() -> None:
+    """Close every pooled session (e.g. on shutdown)."""
+    with _registry_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+        _stats.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,222 @@
+"""
+Helpers that keep /chat/completions request bodies prefix-stable, so
+provider-side prompt caching (OpenAI, Anthropic, DeepSeek, ... via OpenRouter)
+can reuse the already-processed prefix of a conversation.
+
+Prefix caching matches on exact bytes.  Everything that precedes the newest
+message must therefore serialize identically on every exchange and every turn:
+
+  - canonical_json() is used for tool-call arguments, so the arguments the
+    model streamed ({"path": ..., "depth": ...} in whatever key order it chose)
+    are re-sent with sorted keys and fixed separators on every request
+  - canonical_tool_definitions() fixes the order of the tools list (by name)
+    and of the keys inside each definition
+  - with_cache_hints() optionally marks the system prompt and the newest
+    message with {"cache_control": {"type": "ephemeral"}} breakpoints, for
+    providers that only cache explicitly marked prefixes (Anthropic, Gemini)
+
+cached_tokens_from_usage() / record_prompt_cache_usage() read the provider's
+cached-token count from the usage object and keep a per-session hit rate.
+
+PayloadBuilder assembles a turn's message list incrementally (the prefix is
+the same on every exchange of a turn, so it is built once and new exchanges
+are appended), and encode() pre-serializes it: each message is JSON-encoded
+once and reused for as long as the same dict is sent, which copy-on-write
+stripping and with_cache_hints() preserve for every message they don't
+change.  PayloadBuilder.with_cache_hints() also reuses the marked copy of the
+system prompt from one exchange to the next, so that it is encoded once too.
+encode_request_body() splices those bytes into the request body.
+"""
+from __future__ import annotations
+
+import copy
+import json
+from typing import Iterable
+
+_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def canonical_json(obj) -> str:
+    """Byte-stable JSON: sorted keys, compact separators, UTF-8 kept as-is."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_tool_definitions(definitions: list[dict]) -> list[dict]:
+    """Return the tool definitions sorted by function name, with sorted keys."""
+    ordered = sorted(definitions, key=lambda d: d.get("function", {}).get("name", ""))
+    return [json.loads(canonical_json(d)) for d in ordered]
+
+
+def with_cache_hints(messages: list[dict], reuse: dict[int, tuple[dict, dict]] | None = None) -> list[dict]:
+    """
+    Return a copy of messages with cache_control breakpoints on the system
+    message and on the last message.  String content is converted to a single
+    text part, which is what cache_control attaches to; messages without
+    string content are left unmarked.  The input list is not modified.
+
+    reuse (id(original) -> (original, marked copy)) returns the same marked
+    copy for a message marked by the previous call, and is updated in place.
+    """
+    if not messages:
+        return messages
+    out = list(messages)
+    marks = {len(out) - 1}
+    if out[0].get("role") == "system":
+        marks.add(0)
+    fresh: dict[int, tuple[dict, dict]] = {}
+    for i in marks:
+        original = out[i]
+        hit = reuse.get(id(original)) if reuse is not None else None
+        if hit is not None and hit[0] is original:
+            msg = hit[1]
+        else:
+            content = original.get("content")
+            if not (isinstance(content, str) and content):
+                continue
+            msg = copy.copy(original)
+            msg["content"] = [{"type": "text", "text": content, "cache_control": dict(_CACHE_CONTROL)}]
+        fresh[id(original)] = (original, msg)
+        out[i] = msg
+    if reuse is not None:
+        reuse.clear()
+        reuse.update(fresh)
+    return out
+
+
+def _encode_value(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class EncodedMessages(list):
+    """A messages list carrying its JSON array encoding (see PayloadBuilder.encode)."""
+
+    def __init__(self, messages: Iterable[dict], encoded: bytes) -> None:
+        super().__init__(messages)
+        self.encoded = encoded
+
+
+# (tools list, its encoding): the tool definitions are one long-lived list
+_encoded_tools: tuple[object, bytes] | None = None
+
+
+def encode_request_body(payload: dict) -> bytes:
+    """
+    JSON body for payload, reusing the encoding of EncodedMessages and of the
+    last tools list seen instead of serializing them again.
+    """
+    global _encoded_tools
+    parts: list[bytes] = []
+    for key, value in payload.items():
+        if key == "messages" and isinstance(value, EncodedMessages):
+            encoded = value.encoded
+        elif key == "tools" and value:
+            cached = _encoded_tools
+            if cached is not None and cached[0] is value:
+                encoded = cached[1]
+            else:
+                encoded = _encode_value(value)
+                _encoded_tools = (value, encoded)
+        else:
+            encoded = _encode_value(value)
+        parts.append(_encode_value(key) + b":" + encoded)
+    return b"{" + b",".join(parts) + b"}"
+
+
+class PayloadBuilder:
+    """
+    Message list for one turn: [system, (condensed user, condensed assistant)
+    per completed turn, current user message, current turn's exchanges...].
+
+    messages() only converts exchanges appended since the previous call.
+    Message dicts are never modified after they are built, so callers may
+    strip or annotate copies of the list but must not mutate its messages.
+    """
+
+    def __init__(self, system_prompt: str, completed_turns: list, current_turn) -> None:
+        self._turn = current_turn
+        self._messages: list[dict] = [{"role": "system", "content": system_prompt}]
+        for turn in completed_turns:
+            self._messages.append({"role": "user", "content": turn.condensed_user})
+            self._messages.append({"role": "assistant", "content": turn.condensed_assistant})
+        self._messages.append({"role": "user", "content": current_turn.user_text_with_context})
+        self._synced_exchanges = 0
+        self._encoded: dict[int, tuple[dict, bytes]] = {}
+        self._hinted: dict[int, tuple[dict, dict]] = {}
+
+    def messages(self) -> list[dict]:
+        exchanges = self._turn.exchanges
+        for exchange in exchanges[self._synced_exchanges:]:
+            self._messages.extend(exchange.to_messages())
+        self._synced_exchanges = len(exchanges)
+        return list(self._messages)
+
+    def with_cache_hints(self, messages: list[dict]) -> list[dict]:
+        """
+        with_cache_hints(messages), returning the same marked system message
+        on every exchange so encode() keeps reusing its encoding.
+        """
+        return with_cache_hints(messages, self._hinted)
+
+    def encode(self, messages: list[dict]) -> EncodedMessages:
+        """
+        messages (this builder's list, or a stripped/annotated variant of it)
+        with its JSON encoding attached; only messages not encoded by the
+        previous call are serialized.
+        """
+        memo = self._encoded
+        fresh: dict[int, tuple[dict, bytes]] = {}
+        parts: list[bytes] = []
+        for msg in messages:
+            hit = memo.get(id(msg))
+            encoded = hit[1] if hit is not None and hit[0] is msg else _encode_value(msg)
+            fresh[id(msg)] = (msg, encoded)
+            parts.append(encoded)
+        # Keep the builder's own messages even if this variant dropped them,
+        # so encoding the unstripped list again after a strip is still cheap.
+        for msg in self._messages:
+            hit = memo.get(id(msg))
+            if id(msg) not in fresh and hit is not None and hit[0] is msg:
+                fresh[id(msg)] = hit
+        self._encoded = fresh
+        return EncodedMessages(messages, b"[" + b",".join(parts) + b"]")
+
+
+def cached_tokens_from_usage(usage: dict | None) -> int | None:
+    """
+    Number of prompt tokens served from the provider's prompt cache, or None
+    when the usage object does not report it.
+    """
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    if details.get("cached_tokens") is not None:
+        return int(details["cached_tokens"])
+    # DeepSeek
+    if usage.get("prompt_cache_hit_tokens") is not None:
+        return int(usage["prompt_cache_hit_tokens"])
+    # Anthropic-style usage passed through unchanged
+    if usage.get("cache_read_input_tokens") is not None:
+        return int(usage["cache_read_input_tokens"])
+    return None
+
+
+def record_prompt_cache_usage(session_data: dict, usage: dict | None) -> dict | None:
+    """
+    Add one call's prompt/cached token counts to session_data["prompt_cache"]
+    and return {"cached_tokens", "prompt_tokens", "hit_rate", "session_hit_rate"}
+    for that call, or None when the provider reports no cache information.
+    """
+    cached = cached_tokens_from_usage(usage)
+    if cached is None:
+        return None
+    prompt = int(usage.get("prompt_tokens") or 0)
+    stats = session_data.setdefault("prompt_cache", {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0})
+    stats["calls"] += 1
+    stats["prompt_tokens"] += prompt
+    stats["cached_tokens"] += cached
+    return {
+        "cached_tokens": cached,
+        "prompt_tokens": prompt,
+        "hit_rate": cached / prompt if prompt else 0.0,
+        "session_hit_rate": stats["cached_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0,
+    }
@@ -0,0 +1,260 @@
+"""
+Latency-aware routing of LLM calls across a pool of tokens/endpoints.
+
+Enabled by adding tokens to the pool (`slbp token pool add PROVIDER [NAME]`).
+The active token is always a member; load_llm_config resolves the rest into
+config["pool"] and make_llm / the UI connector build a RoutedStreamingLLM
+instead of a plain StreamingLLM.
+
+Each call is sent to the endpoint with the lowest score
+
+    ewma_ttft * (1 + in_flight) * (1 + ERROR_WEIGHT * ewma_error_rate)
+
+Endpoints without a TTFT sample score 0 (or their weighted error rate, if
+they have only ever failed), so new members are tried first.  A 429 (or
+repeated 5xx) puts an endpoint on cooldown for its Retry-After (or an
+exponential backoff) and it is skipped until that passes, unless every member
+is cooling down.
+
+Failover: a 429, 5xx, timeout or connection error that happens before the
+first delta reached the caller is retried on the next-best endpoint, so the
+exchange is never lost for a transient provider problem.  Once output has
+been delivered the error propagates as before (the connector's own retry then
+goes through the router again, away from the endpoint that just failed).
+Context-limit 400s are never failed over — they would fail everywhere.
+
+Stats are kept per process and shared by every RoutedStreamingLLM, so the
+EWMAs carry across turns and sessions.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import requests
+
+from src.utils.llm.streaming import FetchResult, StreamingLLM, StreamResult, ToolCall
+
+# Smoothing factor for the TTFT and error-rate EWMAs (higher = reacts faster).
+_ALPHA = float(os.environ.get("SLBP_ROUTER_EWMA_ALPHA", "0.3"))
+_ERROR_WEIGHT = 4.0
+_BASE_COOLDOWN_S = 2.0
+_MAX_COOLDOWN_S = 60.0
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    provider: str
+    name: str
+    endpoint_url: str
+    token_value: str
+    model: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        label = f"{self.provider}/{self.name}" if self.name else self.provider
+        return f"{label} ({self.model})" if self.model else label
+
+
+@dataclass
+class EndpointStats:
+    ttft_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    in_flight: int = 0
+    calls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+
+    def score(self) -> float:
+        if self.ttft_ewma is None:
+            # Untried members go first; ones that only ever failed rank by error rate (in seconds).
+            return _ERROR_WEIGHT * self.error_ewma
+        return self.ttft_ewma * (1 + self.in_flight) * (1 + _ERROR_WEIGHT * self.error_ewma)
+
+
+_stats_lock = threading.Lock()
+_stats: dict[Endpoint, EndpointStats] = {}
+
+
+def _stats_for(ep: Endpoint) -> EndpointStats:
+    # caller holds _stats_lock
+    st = _stats.get(ep)
+    if st is None:
+        st = _stats[ep] = EndpointStats()
+    return st
+
+
+def router_stats() -> dict[str, dict]:
+    """Snapshot of per-endpoint stats, keyed by label, for logging."""
+    with _stats_lock:
+        return {
+            ep.label: {
+                "ttft_ms": round(st.ttft_ewma * 1000) if st.ttft_ewma is not None else None,
+                "error_rate": round(st.error_ewma, 3),
+                "in_flight": st.in_flight,
+                "calls": st.calls,
+                "failures": st.failures,
+            }
+            for ep, st in _stats.items()
+        }
+
+
+def _retry_after_s(exc: Exception) -> Optional[float]:
+    resp = getattr(exc, "response", None)
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def is_failover_error(exc: Exception) -> bool:
+    """Errors worth retrying on another endpoint: 429, 5xx, timeouts, connection failures."""
+    if isinstance(exc, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class _Attempt:
+    """Bookkeeping for one call on one endpoint."""
+
+    def __init__(self, ep: Endpoint) -> None:
+        self.ep = ep
+        self.started = time.monotonic()
+        self.first_output = False
+        with _stats_lock:
+            st = _stats_for(ep)
+            st.in_flight += 1
+            st.calls += 1
+
+    def mark_output(self) -> None:
+        if self.first_output:
+            return
+        self.first_output = True
+        ttft = time.monotonic() - self.started
+        with _stats_lock:
+            st = _stats_for(self.ep)
+            st.ttft_ewma = ttft if st.ttft_ewma is None else _ALPHA * ttft + (1 - _ALPHA) * st.ttft_ewma
+
+    def succeeded(self) -> None:
+        self.mark_output()
+        with _stats_lock:
+            st = _stats_for(self.ep)
+            st.in_flight -= 1
+            st.error_ewma *= 1 - _ALPHA
+            st.consecutive_failures = 0
+
+    def failed(self, exc: Exception) -> None:
+        with _stats_lock:
+            st = _stats_for(self.ep)
+            st.in_flight -= 1
+            st.failures += 1
+            st.error_ewma = _ALPHA + (1 - _ALPHA) * st.error_ewma
+            st.consecutive_failures += 1
+            # A timeout is also a latency sample: the endpoint was at least this slow.
+            if isinstance(exc, requests.exceptions.Timeout) and not self.first_output:
+                waited = time.monotonic() - self.started
+                st.ttft_ewma = waited if st.ttft_ewma is None else _ALPHA * waited + (1 - _ALPHA) * st.ttft_ewma
+            retry_after = _retry_after_s(exc)
+            if retry_after is not None or st.consecutive_failures >= 2:
+                backoff = _BASE_COOLDOWN_S * 2 ** max(0, st.consecutive_failures - 2)
+                st.cooldown_until = time.monotonic() + min(_MAX_COOLDOWN_S, retry_after or backoff)
+
+    def abandoned(self) -> None:
+        """Non-failover error or cancellation: release the slot without scoring."""
+        with _stats_lock:
+            _stats_for(self.ep).in_flight -= 1
+
+
+class RoutedStreamingLLM:
+    """
+    Drop-in replacement for StreamingLLM that routes each call across a pool
+    of endpoints.  model_params are shared by all members; each member may
+    override the model name.
+    """
+
+    def __init__(
+        self, endpoints: list[Endpoint], timeout_s=None, model=None, default_parameters={},
+        on_failover: Optional[Callable[[Endpoint, Exception], None]] = None,
+    ):
+        if not endpoints:
+            raise ValueError("RoutedStreamingLLM needs at least one endpoint")
+        self._endpoints = list(endpoints)
+        self._timeout_s = timeout_s
+        self._model = model
+        self._default_parameters = default_parameters
+        self.on_failover = on_failover
+        self.last_endpoint: Optional[Endpoint] = None
+
+    def _ranked(self) -> list[Endpoint]:
+        now = time.monotonic()
+        with _stats_lock:
+            scored = [(ep, _stats_for(ep)) for ep in self._endpoints]
+            ready = [(st.score(), i, ep) for i, (ep, st) in enumerate(scored) if st.cooldown_until <= now]
+            cooling = [(st.cooldown_until, i, ep) for i, (ep, st) in enumerate(scored) if st.cooldown_until > now]
+        return [ep for _, _, ep in sorted(ready)] + [ep for _, _, ep in sorted(cooling)]
+
+    def _llm(self, ep: Endpoint) -> StreamingLLM:
+        return StreamingLLM(ep.endpoint_url, ep.token_value, self._timeout_s,
+                            ep.model or self._model, self._default_parameters)
+
+    def _route(self, call: Callable[[StreamingLLM, _Attempt], object],
+               is_cancelled: Optional[Callable[[], bool]] = None):
+        last_exc: Optional[Exception] = None
+        for ep in self._ranked():
+            attempt = _Attempt(ep)
+            self.last_endpoint = ep
+            try:
+                result = call(self._llm(ep), attempt)
+            except Exception as exc:
+                if not is_failover_error(exc):
+                    attempt.abandoned()
+                    raise
+                attempt.failed(exc)
+                if attempt.first_output or (is_cancelled is not None and is_cancelled()):
+                    raise
+                last_exc = exc
+                if self.on_failover is not None:
+                    self.on_failover(ep, exc)
+                continue
+            attempt.succeeded()
+            return result
+        assert last_exc is not None
+        raise last_exc
+
+    def stream(self, messages, on_data: Callable[[dict], None],
+               max_tokens=None, parameters={},
+               tools: Optional[list[dict]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               on_tool_call_start: Optional[Callable[[], None]] = None,
+               on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None) -> StreamResult:
+        def call(llm: StreamingLLM, attempt: _Attempt) -> StreamResult:
+            def data(d: dict) -> None:
+                attempt.mark_output()
+                on_data(d)
+
+            def tool_call_start() -> None:
+                attempt.mark_output()
+                if on_tool_call_start is not None:
+                    on_tool_call_start()
+
+            return llm.stream(
+                messages, data, max_tokens=max_tokens, parameters=parameters, tools=tools,
+                is_cancelled=is_cancelled, on_tool_call_start=tool_call_start,
+                on_tool_call_ready=on_tool_call_ready,
+            )
+
+        return self._route(call, is_cancelled)
+
+    def fetch(self, messages, max_tokens=None, parameters={},
+              tools: Optional[list[dict]] = None) -> FetchResult:
+        return self._route(lambda llm, attempt: llm.fetch(
+            messages, max_tokens=max_tokens, parameters=parameters, tools=tools,
+        ))
@@ -0,0 +1,117 @@
+"""
+Incremental, byte-level parser for chat-completions SSE streams.
+
+Feed raw network chunks (bytes / bytearray / memoryview) as they arrive; each
+feed() returns the decoded JSON objects of every complete `data:` line, plus
+SSE_DONE once the "[DONE]" sentinel is seen.
+
+Compared to r.iter_lines(decode_unicode=True) + json.loads(str):
+  - lines are located with bytearray.find on the raw buffer; nothing is
+    decoded to str first
+  - blank lines, heartbeat/comment frames (": keep-alive",
+    ": OPENROUTER PROCESSING") and non-data fields are skipped with a prefix
+    check on the raw bytes, without being decoded
+  - data payloads are handed to the JSON decoder as memoryview slices of the
+    receive buffer, avoiding a copy when orjson is installed (the stdlib
+    fallback needs one bytes() copy per payload)
+
+Each `data:` line is treated as one complete JSON document, matching how
+OpenAI-compatible providers frame chunks (and tolerating providers that omit
+the blank line between events).
+"""
+from __future__ import annotations
+
+try:
+    import orjson as _orjson
+
+    _loads = _orjson.loads
+    _JSONDecodeError: tuple[type[Exception], ...] = (_orjson.JSONDecodeError,)
+    JSON_DECODER = "orjson"
+except ImportError:
+    import json as _json
+
+    def _loads(payload):  # type: ignore[misc]
+        return _json.loads(bytes(payload))
+
+    _JSONDecodeError = (ValueError,)
+    JSON_DECODER = "json"
+
+# Sentinel returned in place of a JSON object for "data: [DONE]".
+SSE_DONE = object()
+
+_CR = 0x0D          # \r
+_LBRACKET = 0x5B    # '['
+_DATA = b"data:"
+_DATA_SP = b"data: "
+_DONE_PAYLOAD = b"[DONE]"
+
+
+class SSEParser:
+    """
+    Stateful parser for one response body.  Not thread-safe; use one
+    instance per stream.
+    """
+
+    __slots__ = ("_buf", "done", "frames_skipped")
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self.done = False
+        self.frames_skipped = 0
+
+    def feed(self, chunk) -> list:
+        """
+        Append a network chunk and return the decoded payloads of all lines
+        it completed, in order.  Lines whose JSON fails to decode are dropped.
+        Everything after "[DONE]" is ignored.
+        """
+        if self.done:
+            return []
+        buf = self._buf
+        buf += chunk
+        find = buf.find
+        startswith = buf.startswith
+        out: list = []
+        append = out.append
+        start = 0
+        with memoryview(buf) as view:
+            nl = find(b"\n")
+            while nl >= 0:
+                line_start = start
+                start = nl + 1
+                end = nl - 1 if nl > line_start and buf[nl - 1] == _CR else nl
+
+                if end == line_start:
+                    # Blank event separator
+                    nl = find(b"\n", start)
+                    continue
+                if startswith(_DATA_SP, line_start):
+                    p = line_start + 6
+                elif startswith(_DATA, line_start):
+                    p = line_start + 5
+                else:
+                    # Comment/heartbeat (":...") or event:/id:/retry: — never decoded
+                    self.frames_skipped += 1
+                    nl = find(b"\n", start)
+                    continue
+
+                if buf[p] == _LBRACKET and startswith(_DONE_PAYLOAD, p):
+                    append(SSE_DONE)
+                    self.done = True
+                    break
+                try:
+                    append(_loads(view[p:end]))
+                except _JSONDecodeError:
+                    pass
+                nl = find(b"\n", start)
+        if self.done:
+            buf.clear()
+        elif start:
+            del buf[:start]
+        return out
+
+    def close(self) -> list:
+        """Flush a final line that arrived without a trailing newline."""
+        if self.done or not self._buf:
+            return []
+        return self.feed(b"\n")
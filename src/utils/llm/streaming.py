@@ -3,11 +3,20 @@ from typing import Callable, Optional
 from numbers import Number
 from dataclasses import dataclass, field
 import json
+import time
 import warnings
 
-import requests
 from termcolor import colored
 
+from src.utils.llm import cassette
+from src.utils.llm.http_pool import get_session
+from src.utils.llm.payload import encode_request_body
+from src.utils.llm.sse import SSEParser, SSE_DONE
+from src.utils.llm.tool_call_assembly import ArgumentScanner
+
+# Most body bytes read after [DONE] to let the connection be reused
+_DRAIN_MAX_BYTES = 64 * 1024
+
 
 @dataclass
 class ToolCall:
@@ -36,6 +45,224 @@ class FetchResult:
         return bool(self.tool_calls)
 
 
+# ---------------------------------------------------------------------------
+# Request/response helpers shared by StreamingLLM and AsyncStreamingLLM
+# ---------------------------------------------------------------------------
+
+def build_request_payload(
+    messages, *, stream: bool, model: Optional[str], default_parameters: dict,
+    max_tokens=None, parameters=None, tools: Optional[list[dict]] = None,
+) -> dict:
+    """Assemble the JSON body for a /chat/completions request."""
+    payload: dict = {"stream": stream}
+    if stream:
+        payload["stream_options"] = {"include_usage": True}
+    payload.update(default_parameters)
+    if model:
+        payload["model"] = model
+    if parameters:
+        payload.update(parameters)
+    payload["messages"] = messages
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+    if tools:
+        payload["tools"] = tools
+    return payload
+
+
+def completions_url(endpoint: str) -> str:
+    return endpoint.rstrip("/") + "/chat/completions"
+
+
+class StreamAccumulator:
+    """
+    Consumes decoded chat-completions stream chunks one at a time.
+
+    Tool-call argument fragments and the trailing usage object are collected
+    internally; handle() returns the {"reasoning", "content"} event to hand to
+    on_data, or None when the chunk carries nothing to forward.
+
+    on_tool_call_start(), if given, is called once per tool call when its
+    first fragment arrives, so callers can flush buffered text at the
+    boundary between the assistant's prose and its tool calls.
+
+    on_tool_call_ready(position, tool_call), if given, is called as soon as a
+    tool call's arguments are complete (its JSON value has closed and parses,
+    or the next tool call has started), while the rest of the response is
+    still streaming.  Calls are announced strictly in stream order, each at
+    most once; calls still open at end of stream are only returned by
+    result().
+    """
+
+    def __init__(
+        self,
+        on_tool_call_start: Optional[Callable[[], None]] = None,
+        on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None,
+    ) -> None:
+        self._pending_tool_calls: dict[int, dict] = {}
+        self._on_tool_call_start = on_tool_call_start
+        self._on_tool_call_ready = on_tool_call_ready
+        self._ready_pos = 0
+        self.usage: dict | None = None
+
+    def handle(self, obj: dict) -> dict | None:
+        # Capture top-level usage (present in the final usage-only chunk
+        # when stream_options.include_usage is True).
+        top_usage = obj.get("usage")
+        if top_usage:
+            self.usage = top_usage
+
+        choices = obj.get("choices")
+        if not choices:
+            return None
+
+        delta = choices[0].get("delta") or {}
+
+        # Handle tool call deltas
+        tc_deltas = delta.get("tool_calls")
+        if tc_deltas:
+            track = self._on_tool_call_ready is not None
+            for tc_delta in tc_deltas:
+                idx = tc_delta.get("index", 0)
+                entry = self._pending_tool_calls.get(idx)
+                if entry is None:
+                    if track:
+                        # A new call starts: every earlier call is final
+                        for prev in self._pending_tool_calls.values():
+                            prev["final"] = True
+                    entry = self._pending_tool_calls[idx] = {
+                        "id": "", "name": "", "arguments": [],
+                        "scanner": ArgumentScanner() if track else None, "final": False,
+                    }
+                    if self._on_tool_call_start is not None:
+                        self._on_tool_call_start()
+                if tc_delta.get("id"):
+                    entry["id"] = tc_delta["id"]
+                func = tc_delta.get("function") or {}
+                if func.get("name"):
+                    entry["name"] = func["name"]
+                fragment = func.get("arguments")
+                if fragment:
+                    entry["arguments"].append(fragment)
+                    if track and entry["scanner"].feed(fragment):
+                        entry["final"] = True
+            if track:
+                self._announce_ready()
+            return None
+
+        reasoning = delta.get("reasoning")
+        content = delta.get("content")
+
+        if reasoning is None and content is None:
+            warnings.warn(
+                colored(
+                    "Warning: got event from server with no useful data.",
+                    "yellow",
+                )
+            )
+            return None
+        return {"reasoning": reasoning, "content": content}
+
+    def _announce_ready(self) -> None:
+        entries = list(self._pending_tool_calls.values())
+        while self._ready_pos < len(entries):
+            entry = entries[self._ready_pos]
+            if not entry["final"] or not entry["name"]:
+                return
+            self._on_tool_call_ready(self._ready_pos, _to_tool_call(entry))
+            self._ready_pos += 1
+
+    def result(self) -> StreamResult:
+        tool_calls = [_to_tool_call(entry) for entry in self._pending_tool_calls.values()]
+        return StreamResult(tool_calls=tool_calls, usage=self.usage)
+
+
+def _to_tool_call(entry: dict) -> ToolCall:
+    raw_args = "".join(entry["arguments"])
+    try:
+        arguments = json.loads(raw_args) if raw_args else {}
+    except json.JSONDecodeError:
+        arguments = {}
+    return ToolCall(id=entry["id"], name=entry["name"], arguments=arguments)
+
+
+def iter_response_chunks(r):
+    """
+    Yield raw body bytes of a streamed requests.Response as soon as they
+    arrive (one yield per transfer chunk), without line splitting or decoding.
+    """
+    raw = r.raw
+    if getattr(raw, "chunked", False) and raw.supports_chunked_reads():
+        yield from raw.read_chunked(decode_content=True)
+    elif hasattr(raw, "read1"):
+        while True:
+            data = raw.read1(65536, decode_content=True)
+            if not data:
+                break
+            yield data
+    else:
+        yield from r.iter_content(chunk_size=512)
+
+
+def _dispatch_sse(objs: list, accumulator: StreamAccumulator, on_data: Callable[[dict], None]) -> None:
+    for obj in objs:
+        if obj is SSE_DONE:
+            break
+        event_data = accumulator.handle(obj)
+        if event_data is not None:
+            on_data(event_data)
+
+
+def _consume_sse(chunks, accumulator: StreamAccumulator, on_data: Callable[[dict], None],
+                 is_cancelled: Optional[Callable[[], bool]]) -> None:
+    """Parse SSE body chunks into the accumulator until [DONE], end of body or cancellation."""
+    parser = SSEParser()
+    for chunk in chunks:
+        if is_cancelled and is_cancelled():
+            return
+        _dispatch_sse(parser.feed(chunk), accumulator, on_data)
+        if parser.done:
+            return
+    # Body ended without [DONE]: a last data: line may lack its newline
+    _dispatch_sse(parser.close(), accumulator, on_data)
+
+
+def _drain(chunks) -> None:
+    """
+    Read what is left of the body after [DONE] (normally just the chunked
+    terminator) so urllib3 returns the connection to the pool instead of
+    closing it.  Gives up after _DRAIN_MAX_BYTES.
+    """
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        if read > _DRAIN_MAX_BYTES:
+            return
+
+
+def parse_fetch_response(obj: dict) -> FetchResult:
+    """Convert a non-streaming /chat/completions response body to a FetchResult."""
+    message = obj.get("choices", [{}])[0].get("message", {}) or {}
+    content = message.get("content") or ""
+    reasoning = message.get("reasoning") or ""
+
+    tool_calls = []
+    for tc in message.get("tool_calls") or []:
+        func = tc.get("function", {})
+        raw_args = func.get("arguments", "{}")
+        try:
+            arguments = json.loads(raw_args) if raw_args else {}
+        except json.JSONDecodeError:
+            arguments = {}
+        tool_calls.append(ToolCall(
+            id=tc.get("id", ""),
+            name=func.get("name", ""),
+            arguments=arguments,
+        ))
+
+    return FetchResult(content=content, reasoning=reasoning, tool_calls=tool_calls)
+
+
 class StreamingLLM:
 
     _endpoint: str
@@ -56,156 +283,81 @@ class StreamingLLM:
     def stream(self, messages, on_data: Callable[[dict], None],
                max_tokens=None, parameters={},
                tools: Optional[list[dict]] = None,
-               is_cancelled: Optional[Callable[[], bool]] = None) -> StreamResult:
-        payload = {
-            "stream": True,
-            "stream_options": {"include_usage": True},
-        }
-        payload.update(self._default_parameters)
-        if self._model:
-            payload["model"] = self._model
-        if parameters:
-            payload.update(parameters)
-        payload["messages"] = messages
-        if max_tokens:
-            payload["max_tokens"] = max_tokens
-        if tools:
-            payload["tools"] = tools
-
-        headers = {"Authorization": f"Bearer {self._token}"}
-
-        with requests.post(
-            self._endpoint.rstrip("/") + "/chat/completions", json=payload, stream=True,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               on_tool_call_start: Optional[Callable[[], None]] = None,
+               on_tool_call_ready: Optional[Callable[[int, ToolCall], None]] = None) -> StreamResult:
+        payload = build_request_payload(
+            messages, stream=True, model=self._model,
+            default_parameters=self._default_parameters,
+            max_tokens=max_tokens, parameters=parameters, tools=tools,
+        )
+
+        headers = {"Authorization": f"Bearer {self._token}", "Content-Type": "application/json"}
+
+        accumulator = StreamAccumulator(
+            on_tool_call_start=on_tool_call_start,
+            on_tool_call_ready=on_tool_call_ready,
+        )
+        url = completions_url(self._endpoint)
+        mode = cassette.transport_mode()
+
+        if mode == cassette.TRANSPORT_REPLAY:
+            _consume_sse(cassette.replay_stream(payload, url), accumulator, on_data, is_cancelled)
+            return accumulator.result()
+
+        started = time.monotonic()
+        with get_session(self._endpoint).post(
+            url, data=encode_request_body(payload), stream=True,
             timeout=(60, 60), headers=headers
         ) as r:
-            
+
             if r.status_code!=200:
                 print(colored(r.text,"red"))
-                
+                if mode == cassette.TRANSPORT_RECORD:
+                    cassette.record_response(payload, r, stream=True)
+
 
             r.raise_for_status()
-            r.encoding = 'utf-8'
-
-            _pending_tool_calls: dict[int, dict] = {}
-            _last_usage: dict | None = None
-
-            for line in r.iter_lines(decode_unicode=True):
-                if is_cancelled and is_cancelled():
-                    break
-
-                if not line:
-                    continue
-
-                # SSE lines usually look like: "data: {...}" or "data: [DONE]"
-                if not line.startswith("data: "):
-                    continue
-
-                raw = line[len("data: "):].strip()
-                if raw == "[DONE]":
-                    break
-
-                try:
-                    obj = json.loads(raw)
-                except json.JSONDecodeError:
-                    continue
-
-                # Capture top-level usage (present in the final usage-only chunk
-                # when stream_options.include_usage is True).
-                top_usage = obj.get("usage")
-                if top_usage:
-                    _last_usage = top_usage
-
-                choices = obj.get("choices") or []
-                if not choices:
-                    continue
-
-                choice = choices[0]
-                delta = choice.get("delta", {}) or {}
-
-                # Handle tool call deltas
-                tc_deltas = delta.get("tool_calls")
-                if tc_deltas:
-                    for tc_delta in tc_deltas:
-                        idx = tc_delta.get("index", 0)
-                        if idx not in _pending_tool_calls:
-                            _pending_tool_calls[idx] = {"id": "", "name": "", "arguments": ""}
-                        if tc_delta.get("id"):
-                            _pending_tool_calls[idx]["id"] = tc_delta["id"]
-                        func = tc_delta.get("function", {})
-                        if func.get("name"):
-                            _pending_tool_calls[idx]["name"] = func["name"]
-                        if func.get("arguments"):
-                            _pending_tool_calls[idx]["arguments"] += func["arguments"]
-                    continue
-
-                event_data = {
-                    "reasoning": delta.get("reasoning"),
-                    "content": delta.get("content"),
-                }
-
-                if all(v is None for v in event_data.values()):
-                    warnings.warn(
-                        colored(
-                            "Warning: got event from server with no useful data.",
-                            "yellow",
-                        )
-                    )
-                    continue
-                on_data(event_data)
-
-        tool_calls = []
-        for entry in _pending_tool_calls.values():
+
+            chunks = iter_response_chunks(r)
+            if mode == cassette.TRANSPORT_RECORD:
+                chunks = cassette.record_stream(payload, chunks, started)
             try:
-                arguments = json.loads(entry["arguments"]) if entry["arguments"] else {}
-            except json.JSONDecodeError:
-                arguments = {}
-            tool_calls.append(ToolCall(id=entry["id"], name=entry["name"], arguments=arguments))
+                _consume_sse(chunks, accumulator, on_data, is_cancelled)
+                if not (is_cancelled and is_cancelled()):
+                    _drain(chunks)
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
 
-        return StreamResult(tool_calls=tool_calls, usage=_last_usage)
+        return accumulator.result()
 
     def fetch(self, messages, max_tokens=None, parameters={},
               tools: Optional[list[dict]] = None) -> FetchResult:
         """Non-streaming request — returns the full response in one shot."""
-        payload = {"stream": False}
-        payload.update(self._default_parameters)
-        if self._model:
-            payload["model"] = self._model
-        if parameters:
-            payload.update(parameters)
-        payload["messages"] = messages
-        if max_tokens:
-            payload["max_tokens"] = max_tokens
-        if tools:
-            payload["tools"] = tools
-
-        headers = {"Authorization": f"Bearer {self._token}"}
-        r = requests.post(
-            self._endpoint.rstrip("/") + "/chat/completions",
-            json=payload,
+        payload = build_request_payload(
+            messages, stream=False, model=self._model,
+            default_parameters=self._default_parameters,
+            max_tokens=max_tokens, parameters=parameters, tools=tools,
+        )
+
+        headers = {"Authorization": f"Bearer {self._token}", "Content-Type": "application/json"}
+        url = completions_url(self._endpoint)
+        mode = cassette.transport_mode()
+        if mode == cassette.TRANSPORT_REPLAY:
+            return parse_fetch_response(cassette.replay_response(payload, url))
+
+        r = get_session(self._endpoint).post(
+            url,
+            data=encode_request_body(payload),
             timeout=self._timeout_s,
             headers=headers,
         )
         if r.status_code != 200:
             print(colored(r.text, "red"))
+        if mode == cassette.TRANSPORT_RECORD:
+            cassette.record_response(payload, r, stream=False)
         r.raise_for_status()
 
-        obj = r.json()
-        message = obj.get("choices", [{}])[0].get("message", {}) or {}
-        content = message.get("content") or ""
-        reasoning = message.get("reasoning") or ""
-
-        tool_calls = []
-        for tc in message.get("tool_calls") or []:
-            func = tc.get("function", {})
-            raw_args = func.get("arguments", "{}")
-            try:
-                arguments = json.loads(raw_args) if raw_args else {}
-            except json.JSONDecodeError:
-                arguments = {}
-            tool_calls.append(ToolCall(
-                id=tc.get("id", ""),
-                name=func.get("name", ""),
-                arguments=arguments,
-            ))
-
-        return FetchResult(content=content, reasoning=reasoning, tool_calls=tool_calls)
+        return parse_fetch_response(r.json())
@@ -0,0 +1,241 @@
+"""
+Prompt-size estimation for pre-flight context budgeting.
+
+The connector used to find out that a payload was too large only when the
+provider rejected it.  TokenBudget sizes the message list before it is sent so
+_run_llm_call_with_retry can strip it up front instead of paying a failed
+round trip first.
+
+Tokenizers are pluggable: register_tokenizer(matcher, count) adds a counter
+for models whose (lower-cased, provider-prefix-stripped) name satisfies
+matcher.  When tiktoken is installed, OpenAI-family models use it; everything
+else falls back to a character heuristic.  Either way the estimate is scaled
+by a per-model calibration factor learned from the usage.prompt_tokens the
+provider reports, so the heuristic converges on the real tokenizer after a
+few exchanges.
+
+Context windows come from, in order: the system.context_window param, a limit
+parsed from an earlier context-limit error for the same model, or the
+built-in table below.  Unknown models have no window and are not budgeted.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+import threading
+from typing import Callable, Optional
+
+# Built-in context windows, matched by prefix against the bare model name.
+# Longest prefix wins.
+_CONTEXT_WINDOWS: dict[str, int] = {
+    "gpt-oss": 131_072,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4-turbo": 128_000,
+    "gpt-5": 400_000,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4-mini": 200_000,
+    "claude": 200_000,
+    "gemini-1.5": 1_048_576,
+    "gemini-2": 1_048_576,
+    "deepseek": 128_000,
+    "llama-3.1": 131_072,
+    "llama-3.3": 131_072,
+    "llama-4": 1_048_576,
+    "mistral-large": 128_000,
+    "qwen3-coder": 262_144,
+}
+
+# Chars per token for the heuristic counter.  Deliberately a little low
+# (overestimates), since calibration only ever sees what was sent.
+_HEURISTIC_CHARS_PER_TOKEN = 3.6
+# Per-message framing overhead (role markers, separators).
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Output room reserved when model.max_tokens is not set.
+_DEFAULT_OUTPUT_RESERVE = 4096
+# Fraction of the window kept free to absorb estimation error.
+_SAFETY_MARGIN = 0.05
+
+_CONTEXT_LIMIT_PATTERNS = (
+    re.compile(r"maximum context length is (\d+)"),
+    re.compile(r"context (?:length|window) (?:of|is) (\d+)"),
+    re.compile(r"(\d+) token (?:context|limit)"),
+)
+
+_lock = threading.Lock()
+_tokenizers: list[tuple[Callable[[str], bool], Callable[[str], int]]] = []
+_learned_windows: dict[str, int] = {}
+_calibration: dict[str, float] = {}
+_CALIBRATION_ALPHA = 0.3
+
+
+def bare_model_name(model: Optional[str]) -> str:
+    """'openai/gpt-4o-mini' -> 'gpt-4o-mini' (lower-cased)."""
+    return (model or "").rsplit("/", 1)[-1].lower()
+
+
+def register_tokenizer(matcher: Callable[[str], bool] | str, count: Callable[[str], int]) -> None:
+    """
+    Use count(text) -> int for models matching matcher (a predicate on the
+    bare model name, or a prefix string).  Later registrations take priority.
+    """
+    if isinstance(matcher, str):
+        prefix = matcher.lower()
+        matcher = lambda name: name.startswith(prefix)  # noqa: E731
+    with _lock:
+        _tokenizers.insert(0, (matcher, count))
+
+
+def heuristic_count(text: str) -> int:
+    return math.ceil(len(text) / _HEURISTIC_CHARS_PER_TOKEN)
+
+
+def _register_tiktoken() -> None:
+    try:
+        import tiktoken
+    except ImportError:
+        return
+    try:
+        o200k = tiktoken.get_encoding("o200k_base")
+        cl100k = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Encodings are downloaded on first use; stay on the heuristic offline.
+        return
+
+    def count_with(enc):
+        return lambda text: len(enc.encode(text, disallowed_special=()))
+
+    register_tokenizer(lambda n: n.startswith(("gpt-3.5", "gpt-4")) and not n.startswith(("gpt-4o", "gpt-4.1")),
+                       count_with(cl100k))
+    register_tokenizer(lambda n: n.startswith(("gpt-4o", "gpt-4.1", "gpt-5", "gpt-oss", "o1", "o3", "o4")),
+                       count_with(o200k))
+
+
+_register_tiktoken()
+
+
+def _counter_for(model: Optional[str]) -> Callable[[str], int]:
+    name = bare_model_name(model)
+    with _lock:
+        for matcher, count in _tokenizers:
+            if matcher(name):
+                return count
+    return heuristic_count
+
+
+def _message_text(msg: dict) -> str:
+    parts: list[str] = []
+    content = msg.get("content")
+    if isinstance(content, str):
+        parts.append(content)
+    elif isinstance(content, list):
+        parts.extend(p.get("text", "") for p in content if isinstance(p, dict))
+    for tc in msg.get("tool_calls") or []:
+        fn = tc.get("function") or {}
+        parts.append(fn.get("name", ""))
+        parts.append(fn.get("arguments", "") or "")
+    return "\n".join(parts)
+
+
+def context_window(model: Optional[str], override: Optional[int] = None) -> Optional[int]:
+    if override:
+        return int(override)
+    name = bare_model_name(model)
+    with _lock:
+        learned = _learned_windows.get(name)
+    if learned:
+        return learned
+    best = None
+    for prefix, window in _CONTEXT_WINDOWS.items():
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, window)
+    return best[1] if best else None
+
+
+def learn_context_window(model: Optional[str], error_text: str) -> Optional[int]:
+    """Remember the limit stated in a provider's context-limit error, if any."""
+    lowered = error_text.lower()
+    for pattern in _CONTEXT_LIMIT_PATTERNS:
+        m = pattern.search(lowered)
+        if m:
+            window = int(m.group(1))
+            with _lock:
+                _learned_windows[bare_model_name(model)] = window
+            return window
+    return None
+
+
+class TokenBudget:
+    """
+    Prompt budget for one model: estimate(messages) sizes a payload, limit is
+    how many prompt tokens fit, record_usage() feeds back the provider's count.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str],
+        context_window_override: Optional[int] = None,
+        max_output_tokens: Optional[int] = None,
+        tools: Optional[list[dict]] = None,
+    ) -> None:
+        self.model = model
+        self._name = bare_model_name(model)
+        self._window_override = context_window_override
+        self._max_output_tokens = max_output_tokens
+        self._count = _counter_for(model)
+        self._tools_tokens = self._count(json.dumps(tools)) if tools else 0
+        self.last_estimate: Optional[int] = None
+        self._memo: dict[int, tuple[dict, int]] = {}
+
+    @property
+    def window(self) -> Optional[int]:
+        return context_window(self.model, self._window_override)
+
+    @property
+    def limit(self) -> Optional[int]:
+        window = self.window
+        if window is None:
+            return None
+        reserve = self._max_output_tokens or min(_DEFAULT_OUTPUT_RESERVE, window // 4)
+        return int(window * (1 - _SAFETY_MARGIN)) - reserve
+
+    def estimate(self, messages: list[dict]) -> int:
+        # Per-message counts are memoized by identity against the previous call,
+        # so re-estimating a copy-on-write stripped variant of the last payload
+        # only counts the messages that changed.  Payload dicts are never
+        # mutated after construction, which is what makes identity safe here.
+        memo = self._memo
+        fresh: dict[int, tuple[dict, int]] = {}
+        raw = self._tools_tokens
+        for msg in messages:
+            hit = memo.get(id(msg))
+            if hit is not None and hit[0] is msg:
+                n = hit[1]
+            else:
+                n = _MESSAGE_OVERHEAD_TOKENS + self._count(_message_text(msg))
+            fresh[id(msg)] = (msg, n)
+            raw += n
+        self._memo = fresh
+        with _lock:
+            factor = _calibration.get(self._name, 1.0)
+        self.last_estimate = math.ceil(raw * factor)
+        return self.last_estimate
+
+    def fits(self, messages: list[dict]) -> bool:
+        # Always estimate: last_estimate feeds the Usage log and record_usage(),
+        # which matter most when the window is not known yet
+        estimate = self.estimate(messages)
+        limit = self.limit
+        return limit is None or estimate <= limit
+
+    def record_usage(self, prompt_tokens: Optional[int]) -> None:
+        """Update the model's calibration factor from the provider-reported prompt size."""
+        if not prompt_tokens or not self.last_estimate:
+            return
+        with _lock:
+            factor = _calibration.get(self._name, 1.0)
+            raw = self.last_estimate / factor
+            observed = prompt_tokens / raw
+            _calibration[self._name] = _CALIBRATION_ALPHA * observed + (1 - _CALIBRATION_ALPHA) * factor
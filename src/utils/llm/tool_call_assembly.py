@@ -0,0 +1,69 @@
+"""
+Incremental completeness detection for streamed tool-call arguments.
+
+Providers stream a tool call's JSON arguments as arbitrary string fragments
+('{"pa', 'th": "src/', ...).  ArgumentScanner tracks object/array nesting and
+string/escape state across fragments so the accumulator can tell the moment
+the top-level value closes — typically long before the response's [DONE] —
+without re-parsing the whole buffer on every fragment.
+
+The scanner only finds the closing brace; the caller still json.loads() the
+joined fragments to confirm the arguments are valid.
+"""
+from __future__ import annotations
+
+import re
+
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class ArgumentScanner:
+
+    __slots__ = ("depth", "in_string", "escape", "started", "complete")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, fragment: str) -> bool:
+        """Consume the next fragment; return True once the top-level value has closed."""
+        if self.complete:
+            return True
+        i = 0
+        n = len(fragment)
+        while i < n:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    i += 1
+                    continue
+                m = _STRING_SPECIAL.search(fragment, i)
+                if m is None:
+                    break
+                i = m.end()
+                if m.group() == '"':
+                    self.in_string = False
+                else:
+                    self.escape = True
+                continue
+
+            m = _STRUCTURAL.search(fragment, i)
+            if m is None:
+                break
+            c = m.group()
+            i = m.end()
+            if c == '"':
+                self.in_string = True
+            elif c == "{" or c == "[":
+                self.depth += 1
+                self.started = True
+            else:
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    self.complete = True
+                    return True
+        return False
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+
+import redis
+
+from src.utils.docker_compose import get_service_port
+
+_client: redis.Redis | None = None
+_binary_client: redis.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide client for the docker-compose redis instance (str responses)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis(
+            host=os.environ.get("REDIS_HOST", "127.0.0.1"),
+            port=get_service_port("redis", 6379),
+            decode_responses=True,
+        )
+    return _client
+
+
+def get_redis_binary() -> redis.Redis:
+    """
+    Process-wide client for the same instance that returns raw bytes, for
+    values written by storage_codec (which are not valid UTF-8).
+    """
+    global _binary_client
+    if _binary_client is None:
+        _binary_client = redis.Redis(
+            host=os.environ.get("REDIS_HOST", "127.0.0.1"),
+            port=get_service_port("redis", 6379),
+            decode_responses=False,
+        )
+    return _binary_client
+
+
+def redis_url() -> str:
+    """URL for the same redis instance, for libraries that take a connection URL."""
+    host = os.environ.get("REDIS_HOST", "127.0.0.1")
+    return f"redis://{host}:{get_service_port('redis', 6379)}/0"
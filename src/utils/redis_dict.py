@@ -1,9 +1,440 @@
 from __future__ import annotations
 
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any, Callable, Iterator
 
 import redis as _redis_module
 
+# Size of the process-wide near cache for RedisDict values; 0 disables it
+_NEAR_CACHE_MB = float(os.environ.get("SLBP_MEMORY_NEAR_CACHE_MB", "64"))
+# auto (client tracking, falling back to versions), tracking or version
+_NEAR_CACHE_COHERENCE = os.environ.get("SLBP_MEMORY_NEAR_CACHE_COHERENCE", "auto").lower()
+
+_INVALIDATE_CHANNEL = "__redis__:invalidate"
+# Seconds between checks of the invalidation listener's connection
+_LISTEN_POLL_S = 5.0
+
+
+def _str(value: bytes | str) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _versions_key(hash_key: str) -> str:
+    return f"{hash_key}:versions"
+
+
+class _Tracker:
+    """
+    Redis client-side caching over two dedicated connections (RESP2 redirect
+    mode).  `conn` runs the near cache's commands with CLIENT TRACKING ON
+    ... NOLOOP, so Redis remembers the keys it reads and, when any other
+    connection modifies one, publishes the key on __redis__:invalidate to
+    `sub`, which a daemon thread reads.  NOLOOP keeps the cache's own writes
+    (which it applies locally) from invalidating it; since a write still
+    ends the key's tracking, each write transaction reads the hash again
+    (HLEN) to re-track it atomically.
+
+    Commands on `conn` are serialized by a lock, and execute() runs its
+    `apply` callback before releasing it, so the near cache applies what it
+    read or wrote in the order the commands ran on the server (a read that
+    raced a write of the same field cannot overwrite the newer value).
+
+    Any error on either connection ends tracking for good: on_lost is called
+    once and execute() raises ConnectionError from then on.
+    """
+
+    def __init__(self, pool, on_invalidate: Callable[[list[str] | None], None], on_lost: Callable[[], None]) -> None:
+        self._on_invalidate = on_invalidate
+        self._on_lost = on_lost
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self.alive = True
+        self._sub = pool.connection_class(**pool.connection_kwargs)
+        self._conn = pool.connection_class(**pool.connection_kwargs)
+        try:
+            self._sub.send_command("CLIENT", "ID")
+            sub_id = self._sub.read_response()
+            self._conn.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", sub_id, "NOLOOP")
+            self._conn.read_response()
+            self._sub.send_command("SUBSCRIBE", _INVALIDATE_CHANNEL)
+            self._sub.read_response()
+        except Exception:
+            self._close()
+            raise
+        threading.Thread(target=self._listen, name="redis-dict-invalidations", daemon=True).start()
+
+    def execute(self, *commands: tuple, apply: Callable[[list], None] | None = None) -> list:
+        """
+        Send commands in one round trip on the tracked connection; raise the
+        first error reply, otherwise call apply(replies) while still holding
+        the connection.
+        """
+        with self._lock:
+            if not self.alive:
+                raise _redis_module.ConnectionError("Redis client tracking connection lost")
+            replies = []
+            try:
+                self._conn.send_packed_command(self._conn.pack_commands(commands))
+                for _ in commands:
+                    try:
+                        replies.append(self._conn.read_response())
+                    except _redis_module.ResponseError as exc:
+                        replies.append(exc)
+            except (_redis_module.ConnectionError, _redis_module.TimeoutError, OSError) as exc:
+                self._lost(exc)
+                raise _redis_module.ConnectionError(f"Redis client tracking connection lost: {exc}") from exc
+            for reply in replies:
+                if isinstance(reply, _redis_module.ResponseError):
+                    raise reply
+            if apply is not None:
+                apply(replies)
+        return replies
+
+    def _listen(self) -> None:
+        try:
+            while self.alive:
+                if not self._sub.can_read(timeout=_LISTEN_POLL_S):
+                    continue
+                message = self._sub.read_response()
+                if isinstance(message, list) and len(message) == 3 and _str(message[0]) == "message":
+                    keys = message[2]
+                    self._on_invalidate(None if keys is None else [_str(k) for k in keys])
+        except Exception as exc:
+            self._lost(exc)
+
+    def _lost(self, exc: Exception) -> None:
+        with self._state_lock:
+            if not self.alive:
+                return
+            self.alive = False
+        print(f"[redis_dict] Client tracking stopped ({exc}); near cache falls back to per-key versions", flush=True)
+        self._close()
+        self._on_lost()
+
+    def _close(self) -> None:
+        for conn in (self._conn, self._sub):
+            try:
+                conn.disconnect()
+            except Exception:
+                pass
+
+
+@dataclass
+class _Cached:
+    value: Any          # the field's value, or a hash's field names (field None)
+    token: str | None   # version token the value was read or written with
+    size: int
+
+
+class NearCache:
+    """
+    Process-local LRU of values read from or written to RedisDicts, bounded
+    by total size (string lengths, max_bytes) rather than entry count.
+
+    Two ways of staying coherent with other processes:
+
+    tracking  (preferred) Redis client-side caching through _Tracker: a hit
+              costs no round trip, and invalidation messages drop a hash's
+              entries when another connection modifies it.  Its field names
+              are cached too (keys() and len()).
+    version   every write through a cached RedisDict also stores a random
+              token for the field in {hash_key}:versions (in the same
+              MULTI), and a hit first reads the token back; only the value
+              transfer is saved.  Used when the server has no CLIENT
+              TRACKING (Redis < 6, some proxies, fakeredis) or once the
+              tracking connection is lost.
+
+    Every writer of a cached hash must go through a RedisDict with a near
+    cache (tokens), or be another Redis connection (tracking); the connector
+    is the only writer of session memory.
+    """
+
+    def __init__(self, redis_client: _redis_module.Redis, max_bytes: int, coherence: str = "auto") -> None:
+        self._redis = redis_client
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str | None], _Cached] = OrderedDict()
+        self._fields: dict[str, set[str | None]] = {}
+        self._bytes = 0
+        # Bumped by every invalidation; a fill that raced one is not stored
+        self._generation = 0
+        self._hits = self._misses = self._bytes_saved = self._evictions = self._invalidations = 0
+        self._tracker: _Tracker | None = None
+        self.mode = "version"
+        if coherence != "version":
+            try:
+                self._tracker = _Tracker(redis_client.connection_pool, self._on_invalidate, self._on_tracking_lost)
+                self.mode = "tracking"
+            except (_redis_module.ResponseError, _redis_module.ConnectionError) as exc:
+                print(f"[redis_dict] Client tracking unavailable ({exc}); near cache uses per-key versions", flush=True)
+
+    # ------------------------------------------------------------------
+    # LRU bookkeeping (callers hold self._lock)
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: tuple[str, str | None]) -> _Cached | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: tuple[str, str | None], entry: _Cached) -> None:
+        self._remove(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._fields.setdefault(key[0], set()).add(key[1])
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: tuple[str, str | None]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        fields = self._fields.get(key[0])
+        if fields is not None:
+            fields.discard(key[1])
+            if not fields:
+                del self._fields[key[0]]
+
+    def _forget_hash(self, hash_key: str) -> None:
+        for field in list(self._fields.get(hash_key, ())):
+            self._remove((hash_key, field))
+
+    def _hit(self, size: int) -> None:
+        self._hits += 1
+        self._bytes_saved += size
+
+    # ------------------------------------------------------------------
+    # Coherence
+    # ------------------------------------------------------------------
+
+    def _tracked(self) -> _Tracker | None:
+        tracker = self._tracker
+        return tracker if tracker is not None and tracker.alive else None
+
+    def _on_invalidate(self, keys: list[str] | None) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            if keys is None:
+                self._clear()
+            else:
+                for key in keys:
+                    self._forget_hash(key)
+
+    def _on_tracking_lost(self) -> None:
+        # Entries were only kept coherent by tracking; start over with tokens
+        with self._lock:
+            self._generation += 1
+            self._clear()
+            self.mode = "version"
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._fields.clear()
+        self._bytes = 0
+
+    # ------------------------------------------------------------------
+    # Operations used by RedisDict
+    # ------------------------------------------------------------------
+
+    def get(self, hash_key: str, field: str) -> str | None:
+        key = (hash_key, field)
+        tracker = self._tracked()
+        if tracker is not None:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self._hit(entry.size)
+                    return entry.value
+                generation = self._generation
+
+            def fill(replies: list) -> None:
+                value = replies[0]
+                with self._lock:
+                    self._misses += 1
+                    if value is not None and generation == self._generation:
+                        self._store(key, _Cached(value, None, len(value)))
+
+            try:
+                (value,) = tracker.execute(("HGET", hash_key, field), apply=fill)
+            except _redis_module.ConnectionError:
+                return self.get(hash_key, field)
+            return value
+
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is not None:
+            # The hash can expire without its versions key
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.hget(_versions_key(hash_key), field)
+            pipe.hexists(hash_key, field)
+            token, exists = pipe.execute()
+            if exists and token is not None and _str(token) == entry.token:
+                with self._lock:
+                    self._hit(entry.size)
+                return entry.value
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hget(hash_key, field)
+        pipe.hget(_versions_key(hash_key), field)
+        value, token = pipe.execute()
+        with self._lock:
+            self._misses += 1
+            if value is not None and token is not None:
+                self._store(key, _Cached(value, _str(token), len(value)))
+            else:
+                self._remove(key)
+        return value
+
+    def contains(self, hash_key: str, field: str) -> bool:
+        if self._tracked() is not None:
+            with self._lock:
+                if self._lookup((hash_key, field)) is not None:
+                    return True
+        return bool(self._redis.hexists(hash_key, field))
+
+    def keys(self, hash_key: str) -> list[str]:
+        tracker = self._tracked()
+        if tracker is None:
+            return self._redis.hkeys(hash_key)
+        with self._lock:
+            entry = self._lookup((hash_key, None))
+            if entry is not None:
+                self._hit(entry.size)
+                return list(entry.value)
+            generation = self._generation
+
+        def fill(replies: list) -> None:
+            fields = [_str(f) for f in replies[0]]
+            with self._lock:
+                self._misses += 1
+                if generation == self._generation:
+                    self._store((hash_key, None), _Cached(fields, None, sum(map(len, fields)) + 1))
+
+        try:
+            (fields,) = tracker.execute(("HKEYS", hash_key), apply=fill)
+        except _redis_module.ConnectionError:
+            return self._redis.hkeys(hash_key)
+        return [_str(f) for f in fields]
+
+    def set(self, hash_key: str, field: str, value: str) -> None:
+        token = uuid.uuid4().hex
+        tracker = self._tracked()
+        if tracker is not None:
+            with self._lock:
+                generation = self._generation
+
+            def apply(replies: list) -> None:
+                with self._lock:
+                    if generation == self._generation:
+                        self._store((hash_key, field), _Cached(value, token, len(value)))
+                        fields = self._entries.get((hash_key, None))
+                        if fields is not None and field not in fields.value:
+                            self._store((hash_key, None), _Cached(fields.value + [field], None, fields.size + len(field)))
+                    else:
+                        self._forget_hash(hash_key)
+
+            try:
+                tracker.execute(
+                    ("MULTI",),
+                    ("HSET", hash_key, field, value),
+                    ("HSET", _versions_key(hash_key), field, token),
+                    ("HLEN", hash_key),
+                    ("EXEC",),
+                    apply=apply,
+                )
+            except _redis_module.ConnectionError:
+                return self.set(hash_key, field, value)
+            return
+
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hset(hash_key, field, value)
+        pipe.hset(_versions_key(hash_key), field, token)
+        pipe.execute()
+        with self._lock:
+            self._store((hash_key, field), _Cached(value, token, len(value)))
+
+    def delete(self, hash_key: str, field: str) -> bool:
+        """HDEL the field (and its token); True if it existed."""
+        tracker = self._tracked()
+        if tracker is not None:
+            try:
+                replies = tracker.execute(
+                    ("MULTI",),
+                    ("HDEL", hash_key, field),
+                    ("HDEL", _versions_key(hash_key), field),
+                    ("HLEN", hash_key),
+                    ("EXEC",),
+                    apply=lambda _: self._drop_field(hash_key, field),
+                )
+            except _redis_module.ConnectionError:
+                return self.delete(hash_key, field)
+            return bool(replies[-1][0])
+
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hdel(hash_key, field)
+        pipe.hdel(_versions_key(hash_key), field)
+        removed = pipe.execute()[0]
+        self._drop_field(hash_key, field)
+        return bool(removed)
+
+    def _drop_field(self, hash_key: str, field: str) -> None:
+        with self._lock:
+            self._remove((hash_key, field))
+            fields = self._entries.get((hash_key, None))
+            if fields is not None and field in fields.value:
+                remaining = [f for f in fields.value if f != field]
+                self._store((hash_key, None), _Cached(remaining, None, fields.size - len(field)))
+
+    def forget(self, hash_key: str) -> None:
+        """Drop everything cached for hash_key (after a write that bypassed the cache)."""
+        with self._lock:
+            self._generation += 1
+            self._forget_hash(hash_key)
+
+    def stats(self) -> dict:
+        """Totals since process start: hit ratio, bytes not transferred, occupancy."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "mode": self.mode,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "bytes_saved": self._bytes_saved,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+_near_cache: NearCache | None = None
+_near_cache_lock = threading.Lock()
+
+
+def get_near_cache(redis_client: _redis_module.Redis) -> NearCache | None:
+    """
+    The process-wide NearCache over redis_client's server (built on first
+    call), or None when SLBP_MEMORY_NEAR_CACHE_MB is 0.
+    """
+    global _near_cache
+    if _NEAR_CACHE_MB <= 0:
+        return None
+    with _near_cache_lock:
+        if _near_cache is None:
+            _near_cache = NearCache(redis_client, int(_NEAR_CACHE_MB * 1024 * 1024), _NEAR_CACHE_COHERENCE)
+        return _near_cache
+
 
 class RedisDict(dict):
     """
@@ -25,7 +456,12 @@ class RedisDict(dict):
       dict storage at the C level, bypassing __iter__ / __getitem__, so they
       will produce an empty plain dict.  Use .to_dict() for a full snapshot.
     - No TTL management; the caller is responsible for expiry / deletion of
-      the underlying hash key.
+      the underlying hash key (and of {hash_key}:versions when a near cache
+      is used).
+
+    With a near_cache (get_near_cache()), single-key reads, membership tests
+    and the key list are served from process memory while they are known to
+    be current; see NearCache.
     """
 
     def __init__(
@@ -33,6 +469,7 @@ class RedisDict(dict):
         redis_client: _redis_module.Redis,
         hash_key: str,
         on_change: Callable[[str, str], None] | None = None,
+        near_cache: NearCache | None = None,
     ) -> None:
         # Call super().__init__() with NO data so the internal CPython dict
         # stays empty.  All real storage goes to Redis.
@@ -40,36 +477,44 @@ class RedisDict(dict):
         self._redis = redis_client
         self._hash_key = hash_key
         self._on_change = on_change
+        self._cache = near_cache
 
     # ------------------------------------------------------------------
     # Core mapping protocol
     # ------------------------------------------------------------------
 
     def __setitem__(self, key: str, value: str) -> None:
-        self._redis.hset(self._hash_key, key, value)
+        if self._cache is not None:
+            self._cache.set(self._hash_key, key, value)
+        else:
+            self._redis.hset(self._hash_key, key, value)
         if self._on_change:
             self._on_change(key, "modified")
 
     def __getitem__(self, key: str) -> str:
-        val = self._redis.hget(self._hash_key, key)
+        val = self._hget(key)
         if val is None:
             raise KeyError(key)
         return val
 
     def __delitem__(self, key: str) -> None:
-        removed = self._redis.hdel(self._hash_key, key)
+        removed = self._hdel(key)
         if not removed:
             raise KeyError(key)
         if self._on_change:
             self._on_change(key, "deleted")
 
     def __contains__(self, key: object) -> bool:
+        if self._cache is not None and isinstance(key, str):
+            return self._cache.contains(self._hash_key, key)
         return bool(self._redis.hexists(self._hash_key, key))
 
     def __iter__(self) -> Iterator[str]:
-        return iter(self._redis.hkeys(self._hash_key))
+        return iter(self.keys())
 
     def __len__(self) -> int:
+        if self._cache is not None and self._cache.mode == "tracking":
+            return len(self._cache.keys(self._hash_key))
         return self._redis.hlen(self._hash_key)
 
     def __repr__(self) -> str:
@@ -81,10 +526,12 @@ class RedisDict(dict):
     # ------------------------------------------------------------------
 
     def get(self, key: str, default: Any = None) -> Any:
-        val = self._redis.hget(self._hash_key, key)
+        val = self._hget(key)
         return val if val is not None else default
 
     def keys(self) -> list[str]:  # type: ignore[override]
+        if self._cache is not None:
+            return self._cache.keys(self._hash_key)
         return self._redis.hkeys(self._hash_key)
 
     def values(self) -> list[str]:  # type: ignore[override]
@@ -94,17 +541,20 @@ class RedisDict(dict):
         return list(self._redis.hgetall(self._hash_key).items())
 
     def pop(self, key: str, *args: Any) -> Any:
-        val = self._redis.hget(self._hash_key, key)
+        val = self._hget(key)
         if val is None:
             if args:
                 return args[0]
             raise KeyError(key)
-        self._redis.hdel(self._hash_key, key)
+        self._hdel(key)
         return val
 
     def setdefault(self, key: str, default: str = "") -> str:  # type: ignore[override]
         # HSETNX is atomic: sets only if the key does not already exist.
+        # It bypasses the near cache, which drops what it holds for the hash.
         self._redis.hsetnx(self._hash_key, key, default)
+        if self._cache is not None:
+            self._cache.forget(self._hash_key)
         return self._redis.hget(self._hash_key, key)  # type: ignore[return-value]
 
     def update(self, other: Any = None, **kwargs: str) -> None:  # type: ignore[override]
@@ -116,7 +566,11 @@ class RedisDict(dict):
             self[k] = v
 
     def clear(self) -> None:
-        self._redis.delete(self._hash_key)
+        if self._cache is not None:
+            self._redis.delete(self._hash_key, _versions_key(self._hash_key))
+            self._cache.forget(self._hash_key)
+        else:
+            self._redis.delete(self._hash_key)
 
     def copy(self) -> dict[str, str]:  # type: ignore[override]
         """Return a plain dict snapshot.  The result is NOT a RedisDict."""
@@ -130,6 +584,16 @@ class RedisDict(dict):
         """Return a plain dict snapshot of all current key-value pairs."""
         return self._redis.hgetall(self._hash_key)
 
+    def _hget(self, key: str) -> str | None:
+        if self._cache is not None:
+            return self._cache.get(self._hash_key, key)
+        return self._redis.hget(self._hash_key, key)
+
+    def _hdel(self, key: str) -> bool:
+        if self._cache is not None:
+            return self._cache.delete(self._hash_key, key)
+        return bool(self._redis.hdel(self._hash_key, key))
+
     @property
     def hash_key(self) -> str:
         """The Redis hash key that backs this dict."""
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-import json
 from dataclasses import dataclass, field
 from typing import Any
 
-CURRENT_SCHEMA_VERSION = 2
+from src.utils.llm.payload import canonical_json
+
+CURRENT_SCHEMA_VERSION = 3
 
 
 @dataclass
@@ -38,7 +39,7 @@ class LLMExchange:
                     {
                         "id": tc.id,
                         "type": "function",
-                        "function": {"name": tc.name, "arguments": json.dumps(tc.args)},
+                        "function": {"name": tc.name, "arguments": canonical_json(tc.args)},
                     }
                     for tc in self.tool_calls
                 ],
@@ -72,6 +73,9 @@ class Turn:
     completed: bool = False
     condensed_user: str = ""
     condensed_assistant: str = ""
+    # False for a completed turn loaded as a summary only: exchanges were not
+    # fetched (see session_store.load_session(hydrate=False)).
+    hydrated: bool = field(default=True, repr=False, compare=False)
 
     def to_messages(self) -> list[dict]:
         """
@@ -128,6 +132,12 @@ class Session:
     completed_turns: list[Turn] = field(default_factory=list)
     current_turn: Turn | None = None
     session_data: dict = field(default_factory=dict)
+    # Bookkeeping for session_store's incremental saves: exchanges already
+    # written per turn id, how many completed turns are already listed, and
+    # when the completed turns' TTLs were last refreshed (epoch seconds).
+    persisted_exchanges: dict[str, int] = field(default_factory=dict, repr=False, compare=False)
+    persisted_completed: int = field(default=0, repr=False, compare=False)
+    turns_ttl_refreshed_at: float = field(default=0.0, repr=False, compare=False)
 
 
 # ---------------------------------------------------------------------------
@@ -179,11 +189,18 @@ def llm_exchange_from_dict(d: dict) -> LLMExchange:
 
 
 def turn_to_dict(turn: Turn) -> dict:
+    return {
+        **turn_meta_to_dict(turn),
+        "exchanges": [llm_exchange_to_dict(ex) for ex in turn.exchanges],
+    }
+
+
+def turn_meta_to_dict(turn: Turn) -> dict:
+    """Everything in turn_to_dict except the exchanges."""
     return {
         "id": turn.id,
         "user_text": turn.user_text,
         "user_text_with_context": turn.user_text_with_context,
-        "exchanges": [llm_exchange_to_dict(ex) for ex in turn.exchanges],
         "todo_snapshot": turn.todo_snapshot,
         "was_impossible": turn.was_impossible,
         "impossible_reason": turn.impossible_reason,
@@ -210,20 +227,23 @@ def turn_from_dict(d: dict) -> Turn:
     )
 
 
+# Exclude "memory" (RedisDict), "todo_list" (ephemeral), "_report_impossible"
+# (always cleaned before save), "__pinned_project__" (re-injected each call)
+_SESSION_DATA_EXCLUDED = {"memory", "todo_list", "_report_impossible", "__pinned_project__"}
+
+
+def session_data_to_dict(session_data: dict) -> dict:
+    return {k: v for k, v in session_data.items() if k not in _SESSION_DATA_EXCLUDED}
+
+
 def session_to_dict(session: Session) -> dict:
-    # Exclude "memory" (RedisDict), "todo_list" (ephemeral), "_report_impossible"
-    # (always cleaned before save), "__pinned_project__" (re-injected each call)
-    _EXCLUDED = {"memory", "todo_list", "_report_impossible", "__pinned_project__"}
-    session_data_clean = {
-        k: v for k, v in session.session_data.items() if k not in _EXCLUDED
-    }
     return {
         "schema_version": session.schema_version,
         "session_id": session.session_id,
         "startup_done": session.startup_done,
         "completed_turns": [turn_to_dict(t) for t in session.completed_turns],
         "current_turn": turn_to_dict(session.current_turn) if session.current_turn else None,
-        "session_data": session_data_clean,
+        "session_data": session_data_to_dict(session.session_data),
     }
 
 
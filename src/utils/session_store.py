@@ -0,0 +1,340 @@
+"""
+Incremental Redis persistence for Session (schema version 3).
+
+Schema 2 stored the whole session as one JSON string and rewrote it after
+every tool batch, so the cost of a save grew with the whole history.  Schema 3
+splits it up so a save writes only what changed:
+
+  session:{id}                  hash: schema_version, startup_done,
+                                session_data (JSON), current_turn_id
+  session:{id}:turns            list of completed turn ids, oldest first
+  session:{id}:turn:{turn_id}   hash: meta (turn fields, JSON) and
+                                ex:{i} (exchange i, JSON)
+
+Exchanges are never modified once appended to a turn, so a save writes the
+session header, the meta of the current (or just completed) turn, and only
+the exchanges added since the last save; Session.persisted_exchanges and
+Session.persisted_completed track what is already in Redis.  All writes and
+the TTL refresh go out in one pipelined round trip.
+
+Completed turns' keys get a longer TTL (ttl * _TURN_TTL_FACTOR) and are only
+re-expired once ttl * (_TURN_TTL_FACTOR - 1) has passed since the last time,
+which keeps them alive at least as long as the header without an EXPIRE per
+turn on every save.
+
+Loading is lazy: by default completed turns come back as summaries (their
+meta only, Turn.hydrated False), which is all the LLM payload needs.
+load_session(hydrate=True), load_turn and load_turns fetch full exchanges,
+for the UI and replays.  Completed turns never change, so they are cached
+per process and shared by both paths; a load only reads the header, the
+current turn and completed turns this process has not seen.  Summaries are
+small and kept per session (_turn_cache, LRU by session); hydrated turns
+carry every tool result, so they are kept in a separate LRU bounded by their
+total text size (_hydrated_cache, SLBP_TURN_CACHE_MB).
+
+Turn meta, exchanges and session_data are stored with storage_codec, so pass
+a client that returns bytes (redis_client.get_redis_binary()).
+
+A schema-2 blob found under session:{id} is converted on load.  Older schemas
+start a fresh session, as before.
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+
+from src.utils.session_model import (
+    CURRENT_SCHEMA_VERSION,
+    Session,
+    Turn,
+    llm_exchange_from_dict,
+    llm_exchange_to_dict,
+    session_data_to_dict,
+    session_from_dict,
+    turn_from_dict,
+    turn_meta_to_dict,
+)
+from src.utils.storage_codec import decode, encode
+
+_MIGRATABLE_SCHEMA_VERSIONS = {2}
+_TURN_TTL_FACTOR = 1.25
+# Sessions whose completed turns' summaries are kept in _turn_cache
+_TURN_CACHE_SESSIONS = 128
+# Total text size of the hydrated turns kept in _hydrated_cache
+_HYDRATED_CACHE_BYTES = int(float(os.environ.get("SLBP_TURN_CACHE_MB", "64")) * 1024 * 1024)
+
+_turn_cache_lock = threading.Lock()
+# session_id -> {turn_id: completed Turn summary}, LRU by session
+_turn_cache: OrderedDict[str, dict[str, Turn]] = OrderedDict()
+# (session_id, turn_id) -> (hydrated completed Turn, size), LRU by turn
+_hydrated_cache: OrderedDict[tuple[str, str], tuple[Turn, int]] = OrderedDict()
+_hydrated_bytes = 0
+
+
+def _session_key(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def _turns_key(session_id: str) -> str:
+    return f"session:{session_id}:turns"
+
+
+def _turn_key(session_id: str, turn_id: str) -> str:
+    return f"session:{session_id}:turn:{turn_id}"
+
+
+def _str(value: bytes | str | None) -> str:
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value or ""
+
+
+def _turn_from_hash(raw: dict) -> Turn | None:
+    fields = {_str(k): v for k, v in raw.items()}
+    meta = fields.get("meta")
+    if not meta:
+        return None
+    turn = turn_from_dict(decode(meta))
+    n = 0
+    while f"ex:{n}" in fields:
+        n += 1
+    turn.exchanges = [llm_exchange_from_dict(decode(fields[f"ex:{i}"])) for i in range(n)]
+    return turn
+
+
+def _turn_summary(meta: bytes | str | None) -> Turn | None:
+    if not meta:
+        return None
+    turn = turn_from_dict(decode(meta))
+    turn.hydrated = False
+    return turn
+
+
+def _turn_size(turn: Turn) -> int:
+    """Approximate memory held by a hydrated turn: the length of its text."""
+    size = len(turn.user_text) + len(turn.user_text_with_context)
+    for ex in turn.exchanges:
+        size += len(ex.assistant_content) + len(ex.reasoning) + len(ex.user_continuation or "")
+        for tc in ex.tool_calls:
+            size += len(tc.result or "") + len(str(tc.args))
+    return size
+
+
+def _drop_hydrated(key: tuple[str, str]) -> None:
+    global _hydrated_bytes
+    entry = _hydrated_cache.pop(key, None)
+    if entry is not None:
+        _hydrated_bytes -= entry[1]
+
+
+def _drop_session(session_id: str) -> None:
+    _turn_cache.pop(session_id, None)
+    for key in [k for k in _hydrated_cache if k[0] == session_id]:
+        _drop_hydrated(key)
+
+
+def _cached_turns(session_id: str) -> dict[str, Turn]:
+    """Cached completed turns of session_id: hydrated where available, else summaries."""
+    with _turn_cache_lock:
+        turns = _turn_cache.get(session_id)
+        if turns is None:
+            return {}
+        _turn_cache.move_to_end(session_id)
+        out = dict(turns)
+        for turn_id in turns:
+            entry = _hydrated_cache.get((session_id, turn_id))
+            if entry is not None:
+                _hydrated_cache.move_to_end((session_id, turn_id))
+                out[turn_id] = entry[0]
+        return out
+
+
+def _cache_turns(session_id: str, turns: list[Turn]) -> None:
+    global _hydrated_bytes
+    if not turns:
+        return
+    with _turn_cache_lock:
+        cached = _turn_cache.setdefault(session_id, {})
+        _turn_cache.move_to_end(session_id)
+        for turn in turns:
+            if not turn.hydrated:
+                cached[turn.id] = turn
+                continue
+            cached[turn.id] = dataclasses.replace(turn, exchanges=[], hydrated=False)
+            key = (session_id, turn.id)
+            size = _turn_size(turn)
+            _drop_hydrated(key)
+            if size <= _HYDRATED_CACHE_BYTES:
+                _hydrated_cache[key] = (turn, size)
+                _hydrated_bytes += size
+        while _hydrated_bytes > _HYDRATED_CACHE_BYTES:
+            _drop_hydrated(next(iter(_hydrated_cache)))
+        while len(_turn_cache) > _TURN_CACHE_SESSIONS:
+            _drop_session(next(iter(_turn_cache)))
+
+
+def _mark_persisted(session: Session) -> None:
+    # Only turns that can still be written (new completed ones, the current
+    # one) are looked up; summaries are never rewritten.
+    turns = session.completed_turns + ([session.current_turn] if session.current_turn else [])
+    session.persisted_exchanges = {t.id: len(t.exchanges) for t in turns if t.hydrated}
+    session.persisted_completed = len(session.completed_turns)
+
+
+def load_session(r: redis.Redis, session_id: str, ttl: int, hydrate: bool = False) -> Session:
+    """
+    Load a session (without its memory RedisDict), migrating a schema-2 blob
+    if found.  Completed turns are summaries unless hydrate is set; the
+    current turn is always complete.
+    """
+    key = _session_key(session_id)
+    pipe = r.pipeline(transaction=False)
+    pipe.type(key)
+    pipe.lrange(_turns_key(session_id), 0, -1)
+    pipe.hgetall(key)
+    kind, turn_ids, header = pipe.execute(raise_on_error=False)
+
+    kind = _str(kind)
+    if kind == "string":
+        return _migrate_blob(r, session_id, ttl)
+    if kind != "hash":
+        return Session(session_id=session_id)
+
+    turn_ids = [_str(t) for t in turn_ids]
+    header = {_str(k): v for k, v in header.items()}
+    if int(_str(header.get("schema_version")) or 0) != CURRENT_SCHEMA_VERSION:
+        return Session(session_id=session_id)
+    current_turn_id = _str(header.get("current_turn_id"))
+
+    cached = _cached_turns(session_id)
+    missing = [t for t in turn_ids if t not in cached or (hydrate and not cached[t].hydrated)]
+    pipe = r.pipeline(transaction=False)
+    for turn_id in missing:
+        if hydrate:
+            pipe.hgetall(_turn_key(session_id, turn_id))
+        else:
+            pipe.hget(_turn_key(session_id, turn_id), "meta")
+    if current_turn_id:
+        pipe.hgetall(_turn_key(session_id, current_turn_id))
+    fetched = pipe.execute() if missing or current_turn_id else []
+
+    parse = _turn_from_hash if hydrate else _turn_summary
+    loaded = {turn_id: parse(raw) for turn_id, raw in zip(missing, fetched)}
+    _cache_turns(session_id, [t for t in loaded.values() if t is not None])
+    completed = [t for t in (loaded.get(turn_id) or cached.get(turn_id) for turn_id in turn_ids) if t is not None]
+    current = _turn_from_hash(fetched[-1]) if current_turn_id else None
+    session = Session(
+        session_id=session_id,
+        schema_version=CURRENT_SCHEMA_VERSION,
+        startup_done=_str(header.get("startup_done")) == "1",
+        completed_turns=completed,
+        current_turn=current,
+        session_data=decode(header.get("session_data"), {}),
+        turns_ttl_refreshed_at=float(_str(header.get("turns_ttl_refreshed_at")) or 0),
+    )
+    _mark_persisted(session)
+    return session
+
+
+def load_turn(r: redis.Redis, session_id: str, turn_id: str) -> Turn | None:
+    """One turn with its exchanges (through the completed-turn cache)."""
+    return load_turns(r, session_id, [turn_id])[0]
+
+
+def load_turns(r: redis.Redis, session_id: str, turn_ids: list[str]) -> list[Turn | None]:
+    """Several turns with their exchanges, fetching uncached ones in one round trip."""
+    cached = _cached_turns(session_id)
+    missing = [t for t in turn_ids if t not in cached or not cached[t].hydrated]
+    if missing:
+        pipe = r.pipeline(transaction=False)
+        for turn_id in missing:
+            pipe.hgetall(_turn_key(session_id, turn_id))
+        loaded = {turn_id: _turn_from_hash(raw) for turn_id, raw in zip(missing, pipe.execute())}
+        _cache_turns(session_id, [t for t in loaded.values() if t is not None and t.completed])
+        cached.update({turn_id: turn for turn_id, turn in loaded.items() if turn is not None})
+    return [cached[t] if t in cached and cached[t].hydrated else None for t in turn_ids]
+
+
+def _migrate_blob(r: redis.Redis, session_id: str, ttl: int) -> Session:
+    key = _session_key(session_id)
+    try:
+        d = json.loads(r.get(key) or "")
+    except ValueError:
+        d = {}
+    if d.get("schema_version", 0) not in _MIGRATABLE_SCHEMA_VERSIONS:
+        # Schema mismatch — start fresh
+        return Session(session_id=session_id)
+    try:
+        session = session_from_dict(d)
+    except Exception:
+        return Session(session_id=session_id)
+    session.schema_version = CURRENT_SCHEMA_VERSION
+    r.delete(key)
+    save_session(r, session_id, session, ttl)
+    print(f"[session_store] Migrated session {session_id} from schema {d['schema_version']} "
+          f"to {CURRENT_SCHEMA_VERSION} ({len(session.completed_turns)} turns)", flush=True)
+    return session
+
+
+def _write_turn(pipe, session_id: str, session: Session, turn: Turn) -> None:
+    fields = {"meta": encode(turn_meta_to_dict(turn))}
+    for i in range(session.persisted_exchanges.get(turn.id, 0), len(turn.exchanges)):
+        fields[f"ex:{i}"] = encode(llm_exchange_to_dict(turn.exchanges[i]))
+    pipe.hset(_turn_key(session_id, turn.id), mapping=fields)
+
+
+def save_session(r: redis.Redis, session_id: str, session: Session, ttl: int) -> None:
+    """Write what changed since the last load/save and refresh every key's TTL."""
+    key = _session_key(session_id)
+    turns_key = _turns_key(session_id)
+    current = session.current_turn
+
+    now = time.time()
+    turn_ttl = int(ttl * _TURN_TTL_FACTOR)
+    refresh_turns = now - session.turns_ttl_refreshed_at >= turn_ttl - ttl
+    new_completed = session.completed_turns[session.persisted_completed:]
+
+    pipe = r.pipeline(transaction=False)
+    pipe.hset(key, mapping={
+        "schema_version": str(session.schema_version),
+        "startup_done": "1" if session.startup_done else "0",
+        "session_data": encode(session_data_to_dict(session.session_data)),
+        "current_turn_id": current.id if current else "",
+        "turns_ttl_refreshed_at": f"{now if refresh_turns else session.turns_ttl_refreshed_at:.3f}",
+    })
+    for turn in new_completed:
+        _write_turn(pipe, session_id, session, turn)
+        pipe.rpush(turns_key, turn.id)
+    if current is not None:
+        _write_turn(pipe, session_id, session, current)
+
+    for k in (key, f"{key}:memory", f"{key}:memory:versions", f"{key}:events"):
+        pipe.expire(k, ttl)
+    for turn in (session.completed_turns if refresh_turns else new_completed):
+        pipe.expire(_turn_key(session_id, turn.id), turn_ttl)
+    if refresh_turns or new_completed:
+        pipe.expire(turns_key, turn_ttl)
+    if current is not None:
+        pipe.expire(_turn_key(session_id, current.id), turn_ttl)
+    pipe.execute()
+    _mark_persisted(session)
+    _cache_turns(session_id, new_completed)
+    if refresh_turns:
+        session.turns_ttl_refreshed_at = now
+
+
+def delete_session(r: redis.Redis, session_id: str) -> None:
+    key = _session_key(session_id)
+    turn_ids = [_str(t) for t in r.lrange(_turns_key(session_id), 0, -1)]
+    current_turn_id = _str(r.hget(key, "current_turn_id")) if _str(r.type(key)) == "hash" else None
+    keys = [key, _turns_key(session_id), f"{key}:memory", f"{key}:memory:versions", f"{key}:events"]
+    keys += [_turn_key(session_id, t) for t in turn_ids + ([current_turn_id] if current_turn_id else [])]
+    r.delete(*keys)
+    with _turn_cache_lock:
+        _drop_session(session_id)
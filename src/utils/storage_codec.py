@@ -0,0 +1,145 @@
+"""
+Versioned binary codec for JSON values stored in Redis (session turns,
+session_data, event log payloads).
+
+Tool results (scraped HTML, shell logs, file contents) dominate the stored
+sessions and compress 5-20x, and Redis memory is the main cost on shared
+instances.  encode() turns a JSON-serializable value into
+
+    MAGIC (1 byte) | FORMAT_VERSION (1 byte) | compression id (1 byte) | body
+
+where body is compact UTF-8 JSON, compressed with zstd (when the zstandard
+package is installed) or zlib once it is at least SLBP_STORAGE_COMPRESS_MIN_BYTES
+long.  MAGIC is 0xA7, which can never start UTF-8 text, so decode() also
+reads the plain JSON text written before this codec existed.
+
+Values must be read back with a client that does not decode responses
+(redis_client.get_redis_binary()).
+
+Process-wide totals of raw/stored bytes and encode/decode time are kept for
+codec_stats(), which the connector logs.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = 0xA7
+FORMAT_VERSION = 1
+
+_RAW = 0
+_ZLIB = 1
+_ZSTD = 2
+
+_COMPRESS_MIN_BYTES = int(os.environ.get("SLBP_STORAGE_COMPRESS_MIN_BYTES", "512"))
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 3
+
+
+def _default_compression() -> int:
+    choice = os.environ.get("SLBP_STORAGE_COMPRESSION", "").lower()
+    if choice == "none":
+        return _RAW
+    if choice == "zlib" or zstandard is None:
+        return _ZLIB
+    return _ZSTD
+
+
+_compression = _default_compression()
+
+_local = threading.local()
+
+
+def _zstd_compressor():
+    c = getattr(_local, "zstd_c", None)
+    if c is None:
+        c = _local.zstd_c = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+    return c
+
+
+def _zstd_decompressor():
+    d = getattr(_local, "zstd_d", None)
+    if d is None:
+        d = _local.zstd_d = zstandard.ZstdDecompressor()
+    return d
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    "encoded": 0, "raw_bytes": 0, "stored_bytes": 0, "encode_s": 0.0,
+    "decoded": 0, "decode_s": 0.0,
+}
+
+
+def encode(value: Any) -> bytes:
+    started = time.perf_counter()
+    body = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    raw_len = len(body)
+    method = _RAW
+    if _compression != _RAW and raw_len >= _COMPRESS_MIN_BYTES:
+        if _compression == _ZSTD:
+            packed = _zstd_compressor().compress(body)
+        else:
+            packed = zlib.compress(body, _ZLIB_LEVEL)
+        if len(packed) < raw_len:
+            body, method = packed, _compression
+    out = bytes((MAGIC, FORMAT_VERSION, method)) + body
+    elapsed = time.perf_counter() - started
+    with _stats_lock:
+        _stats["encoded"] += 1
+        _stats["raw_bytes"] += raw_len
+        _stats["stored_bytes"] += len(out)
+        _stats["encode_s"] += elapsed
+    return out
+
+
+def decode(data: bytes | str | None, default: Any = None) -> Any:
+    """Decode an encode()d value or legacy JSON text; None/empty gives default."""
+    if not data:
+        return default
+    if isinstance(data, str):
+        return json.loads(data)
+    if data[0] != MAGIC:
+        return json.loads(data)
+    started = time.perf_counter()
+    version, method, body = data[1], data[2], data[3:]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported storage format version {version}")
+    if method == _ZLIB:
+        body = zlib.decompress(body)
+    elif method == _ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Stored value is zstd-compressed; install the zstandard package to read it.")
+        body = _zstd_decompressor().decompress(body)
+    elif method != _RAW:
+        raise ValueError(f"Unknown storage compression id {method}")
+    value = json.loads(body)
+    elapsed = time.perf_counter() - started
+    with _stats_lock:
+        _stats["decoded"] += 1
+        _stats["decode_s"] += elapsed
+    return value
+
+
+def codec_stats() -> dict:
+    """Totals since process start: compression ratio and average encode/decode time."""
+    with _stats_lock:
+        s = dict(_stats)
+    return {
+        "compression": {_RAW: "none", _ZLIB: "zlib", _ZSTD: "zstd"}[_compression],
+        "encoded": s["encoded"],
+        "raw_bytes": s["raw_bytes"],
+        "stored_bytes": s["stored_bytes"],
+        "ratio": s["raw_bytes"] / s["stored_bytes"] if s["stored_bytes"] else 1.0,
+        "avg_encode_ms": s["encode_s"] * 1000 / s["encoded"] if s["encoded"] else 0.0,
+        "avg_decode_ms": s["decode_s"] * 1000 / s["decoded"] if s["decoded"] else 0.0,
+    }
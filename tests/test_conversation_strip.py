@@ -0,0 +1,65 @@
+"""
+Tests for strip_to_budget()'s min_level handling when the payload cannot be
+measured (no budget, or a budget whose model window is unknown).
+
+Run with: ./python_in_env.sh -m pytest tests
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+import pytest  # noqa: E402
+
+from src.utils.conversation_strip import STRIP_LEVELS, strip_to_budget  # noqa: E402
+from src.utils.llm.tokens import TokenBudget  # noqa: E402
+
+
+def _tool_call(call_id: str) -> dict:
+    return {"id": call_id, "type": "function",
+            "function": {"name": "read_file", "arguments": json.dumps({"path": "a.txt"})}}
+
+
+def _conversation() -> list[dict]:
+    return [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "first question"},
+        {"role": "assistant", "content": "first answer"},
+        {"role": "user", "content": "second question"},
+        {"role": "assistant", "content": "second answer"},
+        {"role": "user", "content": "read the file"},
+        {"role": "assistant", "content": "", "tool_calls": [_tool_call("call_1")]},
+        {"role": "tool", "tool_call_id": "call_1", "content": "x" * 5000},
+    ]
+
+
+def _unknown_window_budget() -> TokenBudget:
+    budget = TokenBudget("no-such-model-for-tests")
+    assert budget.limit is None
+    return budget
+
+
+@pytest.mark.parametrize("make_budget", [lambda: None, _unknown_window_budget], ids=["no_budget", "unknown_limit"])
+@pytest.mark.parametrize("min_level", range(len(STRIP_LEVELS) + 1))
+def test_unmeasurable_budget_stops_at_min_level(make_budget, min_level):
+    messages = _conversation()
+    payload, level = strip_to_budget(messages, {}, budget=make_budget(), min_level=min_level)
+    if min_level == 0:
+        assert level is None
+        assert payload is messages
+    else:
+        assert level == STRIP_LEVELS[min_level - 1]
+
+
+@pytest.mark.parametrize("make_budget", [lambda: None, _unknown_window_budget], ids=["no_budget", "unknown_limit"])
+def test_drop_turns_without_budget_keeps_latest_result(make_budget):
+    payload, level = strip_to_budget(_conversation(), {}, budget=make_budget(),
+                                     min_level=STRIP_LEVELS.index("drop_turns") + 1)
+    assert level == "drop_turns"
+    assert [m["role"] for m in payload] == ["system", "user", "assistant", "tool"]
+    assert payload[-1]["content"] == "x" * 5000
@@ -0,0 +1,78 @@
+"""
+Tests for _plan_tool_waves(): which consecutive tool calls of one LLM
+response may run at the same time.
+
+Run with: ./python_in_env.sh -m pytest tests
+"""
+from __future__ import annotations
+
+import os
+import sys
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from src.ui_connector import socket_handlers  # noqa: E402
+from src.ui_connector.socket_handlers import _plan_tool_waves  # noqa: E402
+from src.utils.llm.streaming import ToolCall  # noqa: E402
+
+
+def _call(name: str, **arguments) -> ToolCall:
+    return ToolCall(id=f"call_{name}", name=name, arguments=arguments)
+
+
+def test_independent_reads_share_a_wave():
+    calls = [
+        _call("session_memory", action="get", key="a"),
+        _call("session_memory", action="get", key="b"),
+        _call("list_dir", path="."),
+    ]
+    assert _plan_tool_waves(calls) == [[0, 1, 2]]
+
+
+def test_conflicting_claims_start_a_new_wave():
+    calls = [
+        _call("session_memory", action="set", key="a", value="1"),
+        _call("session_memory", action="get", key="b"),
+        _call("session_memory", action="get", key="a"),
+        _call("session_memory", action="list"),
+    ]
+    assert _plan_tool_waves(calls) == [[0, 1], [2, 3]]
+
+
+def test_exclusive_calls_run_alone():
+    calls = [
+        _call("get_pwd"),
+        _call("report_impossible", reason="no"),
+        _call("get_pwd"),
+        _call("no_such_tool"),
+        _call("get_pwd"),
+    ]
+    assert _plan_tool_waves(calls) == [[0], [1], [2], [3], [4]]
+
+
+def test_calls_needing_approval_run_alone():
+    calls = [
+        _call("get_pwd"),
+        _call("create_text_file", path="a.txt", content="x"),
+        _call("list_dir", path="."),
+    ]
+    assert _plan_tool_waves(calls) == [[0], [1], [2]]
+
+
+def test_stub_keys_are_claimed_as_writes():
+    calls = [
+        _call("list_dir", path="."),
+        _call("list_working_tree"),
+        _call("session_memory", action="list"),
+    ]
+    assert _plan_tool_waves(calls) == [[0, 1, 2]]
+    stub_keys = {0: "stub_0", 1: "stub_1", 2: "stub_2"}
+    assert _plan_tool_waves(calls, stub_keys) == [[0, 1], [2]]
+
+
+def test_concurrency_of_one_runs_every_call_alone(monkeypatch):
+    monkeypatch.setattr(socket_handlers, "_tool_concurrency", 1)
+    calls = [_call("get_pwd"), _call("list_dir", path=".")]
+    assert _plan_tool_waves(calls) == [[0], [1]]
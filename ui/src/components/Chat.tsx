@@ -69,6 +69,8 @@ function backendTurnToFrontendTurn(d: {
       was_stubbed?: boolean
       started_at?: number
       finished_at?: number
+      result_size?: number
+      result_elided?: boolean
     }[]
     is_final: boolean
   }[]
@@ -77,6 +79,7 @@ function backendTurnToFrontendTurn(d: {
   impossible_reason?: string
   was_cancelled?: boolean
   completed: boolean
+  detail?: boolean
 }): Turn {
   return {
     id: d.id,
@@ -92,6 +95,7 @@ function backendTurnToFrontendTurn(d: {
         wasStubbed: tc.was_stubbed,
         startedAt: tc.started_at ?? undefined,
         finishedAt: tc.finished_at ?? undefined,
+        resultSize: tc.result_elided ? tc.result_size : undefined,
       })),
       isFinal: ex.is_final,
     })),
@@ -100,6 +104,7 @@ function backendTurnToFrontendTurn(d: {
     impossible: d.was_impossible ? (d.impossible_reason ?? 'Task was impossible') : undefined,
     cancelled: d.was_cancelled ? 'Turn was cancelled' : undefined,
     completed: d.completed,
+    detailLoaded: d.detail !== false,
     streaming: false,
     isInterimStreaming: false,
     interimCharCount: 0,
@@ -953,15 +958,25 @@ function renderTodoItems(items: TodoItem[], depth: number = 0): React.ReactNode[
 
 const MAX_STREAMING_CHARS = 300
 
-function ToolCallCard({ tc, onViewFull }: { tc: ToolCallEntry; onViewFull: (c: string) => void }) {
+function ToolCallCard({
+  tc,
+  onViewFull,
+  onFetchFull,
+}: {
+  tc: ToolCallEntry
+  onViewFull: (c: string) => void
+  onFetchFull: (toolId: string) => void
+}) {
   const hasResult = tc.result !== undefined
   const isStreaming = !hasResult && tc.streamingResult !== undefined
-  const truncated = hasResult && tc.result!.length > MAX_TOOL_CHARS
+  // A preview (resultSize set) only holds the start of the result
+  const fullLength = tc.resultSize ?? (hasResult ? tc.result!.length : 0)
+  const truncated = hasResult && fullLength > MAX_TOOL_CHARS
 
   let displayResult: string | undefined
   if (hasResult) {
     displayResult = truncated
-      ? tc.result!.slice(0, MAX_TOOL_CHARS) + `... (${tc.result!.length - MAX_TOOL_CHARS} more)`
+      ? tc.result!.slice(0, MAX_TOOL_CHARS) + `... (${fullLength - MAX_TOOL_CHARS} more)`
       : tc.result!
   } else if (isStreaming) {
     const sr = tc.streamingResult!
@@ -980,7 +995,10 @@ function ToolCallCard({ tc, onViewFull }: { tc: ToolCallEntry; onViewFull: (c: s
         <span css={css`display: flex; align-items: center; gap: 6px;`}>
           <ElapsedTimer startedAt={tc.startedAt} finishedAt={tc.finishedAt} />
           {truncated && (
-            <button css={viewFullButtonCss} onClick={() => onViewFull(tc.result!)}>
+            <button
+              css={viewFullButtonCss}
+              onClick={() => tc.resultSize !== undefined ? onFetchFull(tc.id) : onViewFull(tc.result!)}
+            >
               view full
             </button>
           )}
@@ -1043,11 +1061,15 @@ function ToolApprovalBubble({
 function TurnContainer({
   turn,
   onViewFull,
+  onFetchResult,
+  onLoadDetail,
   onApprove,
   onDeny,
 }: {
   turn: Turn
   onViewFull: (content: string) => void
+  onFetchResult: (turnId: string, toolId: string) => void
+  onLoadDetail: (turnId: string) => void
   onApprove: (id: string) => void
   onDeny: (id: string) => void
 }) {
@@ -1090,6 +1112,11 @@ function TurnContainer({
       {/* Left column: user message + AI content + impossible notice */}
       <div css={leftColumnCss}>
         <div css={userBubbleCss}>{turn.userText}</div>
+        {turn.detailLoaded === false && (
+          <button css={viewFullButtonCss} onClick={() => onLoadDetail(turn.id)}>
+            load turn
+          </button>
+        )}
         {(interimCharCount > 0 || isInterimStreaming) && (
           <div css={interimBubbleCss}>
             AI interim response: {interimCharCount} chars
@@ -1139,7 +1166,12 @@ function TurnContainer({
         {allToolCalls.length > 0 && (
           <div css={toolCallsGroupCss} ref={toolsRef} onScroll={onToolsScroll}>
             {allToolCalls.map(tc => (
-              <ToolCallCard key={tc.id} tc={tc} onViewFull={onViewFull} />
+              <ToolCallCard
+                key={tc.id}
+                tc={tc}
+                onViewFull={onViewFull}
+                onFetchFull={toolId => onFetchResult(turn.id, toolId)}
+              />
             ))}
           </div>
         )}
@@ -1500,8 +1532,12 @@ export default function Chat() {
       }
     }
 
-    // Event replay (always emitted after session_state, possibly with empty list)
-    function onEventReplay({ events }: { events: { id: string; type: string; data: Record<string, unknown> }[] }) {
+    // Event replay (emitted after session_state in pages, the last one with done=true)
+    function onEventReplay({ events, cursor }: {
+      events: { id: string; type: string; data: Record<string, unknown> }[]
+      cursor?: string
+      done?: boolean
+    }) {
       if (events && events.length > 0) {
         // Clear interrupted state on any streaming turns before replaying
         setThread(prev => prev.map(t => t.interrupted ? { ...t, interrupted: false, streaming: true } : t))
@@ -1512,8 +1548,10 @@ export default function Chat() {
         }
         updateLastEventId(events[events.length - 1].id)
       }
+      // Superseded events may have been left out of the page; resume after all of it
+      if (cursor && cursor !== '0-0') updateLastEventId(cursor)
 
-      // Replay complete — safe to show UI now
+      // The first page is enough to show the UI; later pages keep filling it in
       setIsLoadingBackendState(false)
     }
 
@@ -1719,6 +1757,27 @@ export default function Chat() {
       }))
     }
 
+    function onTurnDetail(data: { turn_id: string; turn: Parameters<typeof backendTurnToFrontendTurn>[0] | null }) {
+      if (!data.turn) return
+      const loaded = backendTurnToFrontendTurn(data.turn)
+      updateTurn(data.turn_id, t => ({ ...loaded, approvalItems: t.approvalItems }))
+    }
+
+    function onToolResultDetail(data: { turn_id: string; id: string; result: string | null }) {
+      if (data.result === null) return
+      const result = data.result
+      updateTurn(data.turn_id, t => ({
+        ...t,
+        exchanges: t.exchanges.map(ex => ({
+          ...ex,
+          toolCalls: ex.toolCalls.map(tc =>
+            tc.id === data.id ? { ...tc, result, resultSize: undefined } : tc
+          ),
+        })),
+      }))
+      setModalContent(result)
+    }
+
     socket.on('connect', onConnect)
     socket.on('disconnect', onDisconnect)
     socket.on('pwd_update', onPwdUpdate)
@@ -1748,6 +1807,8 @@ export default function Chat() {
     socket.on('approval_request', onApprovalRequest)
     socket.on('approval_resolved', onApprovalResolved)
     socket.on('approval_timeout', onApprovalTimeout)
+    socket.on('turn_detail', onTurnDetail)
+    socket.on('tool_result_detail', onToolResultDetail)
 
     // Connect after all handlers are registered so we never miss the connect event
     socket.connect()
@@ -1782,6 +1843,8 @@ export default function Chat() {
       socket.off('approval_request', onApprovalRequest)
       socket.off('approval_resolved', onApprovalResolved)
       socket.off('approval_timeout', onApprovalTimeout)
+      socket.off('turn_detail', onTurnDetail)
+      socket.off('tool_result_detail', onToolResultDetail)
       socket.disconnect()
     }
   // eslint-disable-next-line react-hooks/exhaustive-deps
@@ -1799,10 +1862,20 @@ export default function Chat() {
     socket.emit('approval_response', { id, approved: false })
   }, [])
 
+  const loadTurnDetail = useCallback((turnId: string) => {
+    socket.emit('get_turn_detail', { turnId })
+  }, [])
+
+  const fetchToolResult = useCallback((turnId: string, toolId: string) => {
+    socket.emit('get_tool_result', { turnId, toolId })
+  }, [])
+
   const cancelTurn = useCallback(() => {
-    socket.emit('cancel_turn')
+    // The turn id lets a cancel reach a turn still waiting in the job queue
+    const turnId = thread.length > 0 ? thread[thread.length - 1].id : undefined
+    socket.emit('cancel_turn', { turnId })
     setCancelling(true)
-  }, [socket])
+  }, [socket, thread])
 
   // ---------------------------------------------------------------------------
   // Send
@@ -1891,6 +1964,8 @@ export default function Chat() {
               key={turn.id}
               turn={turn}
               onViewFull={setModalContent}
+              onFetchResult={fetchToolResult}
+              onLoadDetail={loadTurnDetail}
               onApprove={approve}
               onDeny={deny}
             />
@@ -9,6 +9,7 @@ export interface ToolCallEntry {
   streamingResult?: string  // live output chunks before result arrives
   startedAt?: number        // ms timestamp — set after approval, before execute
   finishedAt?: number       // ms timestamp — set when result arrives
+  resultSize?: number       // full length when result is only a preview (fetch with get_tool_result)
 }
 
 export interface TodoItem {
@@ -42,6 +43,7 @@ export interface Turn {
   impossible?: string
   cancelled?: string
   completed: boolean
+  detailLoaded?: boolean    // false: header only, exchanges come from get_turn_detail
   // Live state (only meaningful on current/in-progress turn):
   streaming: boolean
   isInterimStreaming: boolean